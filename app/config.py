@@ -1,15 +1,17 @@
 """Configuration management for Travel Assistant Chatbot."""
 
 import os
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from typing import Optional
 
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
     
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
+    
     # Database
     database_url: str = "sqlite:///./travel_assistant.db"
     
@@ -20,6 +22,8 @@ class Settings(BaseSettings):
     # Optional headers for org/project-scoped keys
     openai_organization: Optional[str] = None
     openai_project: Optional[str] = None
+    # Max in-flight OpenAI requests per worker process; size to the key's rate limit
+    openai_concurrency: int = 32
     
     # OpenTripMap
     opentripmap_api_key: str
@@ -27,6 +31,8 @@ class Settings(BaseSettings):
     # RapidAPI Hotels (optional)
     rapidapi_key: Optional[str] = None
     rapidapi_hotels_enabled: bool = False
+    # Store each hotel's full RapidAPI object in hotels.raw_json (large rows)
+    persist_raw_hotel_json: bool = False
     
     # Admin credentials
     admin_username: str = "admin"
@@ -46,13 +52,23 @@ class Settings(BaseSettings):
     host: str = "0.0.0.0"
     port: int = 8000
     debug: bool = False
+    # Worker processes for production runs; ignored when debug enables reload
+    workers: int = max(1, os.cpu_count() or 1)
+    # Exit a worker after this many requests. Off by default: uvicorn's
+    # supervisor doesn't respawn exited workers, so each one is gone for good
+    limit_max_requests: Optional[int] = None
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    @cached_property
+    def admin_token(self) -> bytes:
+        """``username:password`` encoded once for the Basic-auth comparison."""
+        return f"{self.admin_username}:{self.admin_password}".encode()
 
 
-@lru_cache()
+@lru_cache(maxsize=None)
 def get_settings() -> Settings:
-    """Get cached settings instance."""
+    """Get cached settings instance.
+
+    The environment and ``.env`` are parsed and validated exactly once per
+    process; every later call returns the same object.
+    """
     return Settings()
\ No newline at end of file
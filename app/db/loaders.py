@@ -0,0 +1,23 @@
+"""Reusable eager-loading strategies.
+
+Loader options are built once at import and shared by the repositories, so
+each query only attaches them instead of rebuilding the option chain.
+"""
+
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+
+from app.db.models import Itinerary, ItineraryDay, ItineraryItem
+
+
+# Itinerary -> days -> items are one-to-many, so selectinload avoids the row
+# explosion of chained joins; place/hotel are many-to-one and ride along with
+# the items query. Anything else is a bug in the caller, so make it raise.
+ITINERARY_FULL_LOAD = (
+    selectinload(Itinerary.days)
+    .selectinload(ItineraryDay.items)
+    .options(
+        joinedload(ItineraryItem.place),
+        joinedload(ItineraryItem.hotel),
+    ),
+    raiseload("*"),
+)
@@ -1,6 +1,7 @@
 """Alembic environment setup."""
 
 import logging
+import os
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
@@ -21,6 +22,12 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# Migrate the database the app itself uses; alembic.ini only holds the
+# local default
+database_url = os.environ.get("DATABASE_URL")
+if database_url:
+    config.set_main_option("sqlalchemy.url", database_url.replace("%", "%%"))
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 target_metadata = Base.metadata
@@ -0,0 +1,117 @@
+"""Store GUIDs as 16-byte binary instead of CHAR(36) text
+
+Revision ID: 3f2a9c1d7b40
+Revises:
+Create Date: 2026-10-15 09:00:00.000000
+
+"""
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# GUID columns by table: primary keys and the foreign keys pointing at them
+GUID_COLUMNS = {
+    "sessions": ("id",),
+    "messages": ("id", "session_id"),
+    "itineraries": ("id", "session_id"),
+    "itinerary_days": ("id", "itinerary_id"),
+    "itinerary_items": ("id", "day_id", "ref_place_id", "ref_hotel_id"),
+    "places": ("id",),
+    "hotels": ("id",),
+    "api_cache": ("id",),
+    "llm_ledger": ("id", "session_id"),
+}
+
+
+def _convert_values(table: str, column: str, convert) -> None:
+    """Rewrite every value of a column with ``convert``, skipping NULLs."""
+    bind = op.get_bind()
+    values = bind.execute(
+        sa.text(f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL")
+    ).scalars().all()
+    updates = [
+        {"old": value, "new": new}
+        for value in values
+        if (new := convert(value)) is not None and new != value
+    ]
+    if updates:
+        bind.execute(
+            sa.text(f"UPDATE {table} SET {column} = :new WHERE {column} = :old"),
+            updates,
+        )
+
+
+def _to_bytes(value):
+    return uuid.UUID(value).bytes if isinstance(value, str) else None
+
+
+def _to_text(value):
+    return str(uuid.UUID(bytes=bytes(value))) if isinstance(value, (bytes, memoryview)) else None
+
+
+def _existing_guid_columns(binary: bool):
+    """Yield (table, column, nullable) for GUID columns stored as binary or text."""
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for table, columns in GUID_COLUMNS.items():
+        if table not in tables:
+            # Fresh database: create_all builds the table with binary GUIDs
+            continue
+        existing = {c["name"]: c for c in inspector.get_columns(table)}
+        for column in columns:
+            info = existing.get(column)
+            if info is None:
+                continue
+            if isinstance(info["type"], sa.LargeBinary) == binary:
+                yield table, column, info["nullable"]
+
+
+def upgrade() -> None:
+    # PostgreSQL has always used its native UUID type
+    if op.get_bind().dialect.name == "postgresql":
+        return
+
+    by_table = {}
+    for table, column, nullable in _existing_guid_columns(binary=False):
+        # Convert the data first: SQLite keeps a blob as is when the column
+        # type changes, whereas CAST would turn the text into 36 raw bytes
+        _convert_values(table, column, _to_bytes)
+        by_table.setdefault(table, []).append((column, nullable))
+
+    for table, columns in by_table.items():
+        with op.batch_alter_table(table) as batch_op:
+            for column, nullable in columns:
+                batch_op.alter_column(
+                    column,
+                    type_=sa.LargeBinary(16),
+                    existing_type=sa.String(36),
+                    existing_nullable=nullable,
+                )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        return
+
+    by_table = {}
+    for table, column, nullable in _existing_guid_columns(binary=True):
+        _convert_values(table, column, _to_text)
+        by_table.setdefault(table, []).append((column, nullable))
+
+    for table, columns in by_table.items():
+        with op.batch_alter_table(table) as batch_op:
+            for column, nullable in columns:
+                batch_op.alter_column(
+                    column,
+                    type_=sa.String(36),
+                    existing_type=sa.LargeBinary(16),
+                    existing_nullable=nullable,
+                )
@@ -0,0 +1,105 @@
+"""Store sessions.ip_hash as a BIGINT instead of 16 hex characters
+
+Revision ID: 5b9e2d4a7c13
+Revises: e1b83f6c0d29
+Create Date: 2026-10-15 09:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b9e2d4a7c13'
+down_revision = 'e1b83f6c0d29'
+branch_labels = None
+depends_on = None
+
+
+def _hex_to_int(value) -> int:
+    """Reinterpret an old 16-hex-digit hash as the signed 64-bit value it encodes.
+    The old SHA-256 hashes can't be recomputed with the new keyed BLAKE2b,
+    so converted sessions simply stop matching new requests, as they would
+    after a salt change; a malformed value becomes 0.
+    """
+    try:
+        return int.from_bytes(bytes.fromhex(value), "big", signed=True)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _int_to_hex(value) -> str:
+    return int(value).to_bytes(8, "big", signed=True).hex()
+
+
+def _ip_hash_column():
+    """Return the reflected ip_hash column, or None without a sessions table."""
+    inspector = sa.inspect(op.get_bind())
+    if "sessions" not in inspector.get_table_names():
+        # Fresh database: create_all builds the BIGINT column
+        return None
+    return next(c for c in inspector.get_columns("sessions") if c["name"] == "ip_hash")
+
+
+def _drop_ip_hash_indexes() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for index in inspector.get_indexes("sessions"):
+        if index["column_names"] == ["ip_hash"]:
+            op.drop_index(index["name"], table_name="sessions")
+
+
+def _rewrite(convert, type_, existing_type) -> None:
+    """Change the column type, then rewrite each session's value with ``convert``.
+    The values are read first: the type change may CAST them on the way.
+    """
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, ip_hash FROM sessions")).all()
+    with op.batch_alter_table("sessions") as batch_op:
+        batch_op.alter_column(
+            "ip_hash", type_=type_, existing_type=existing_type, existing_nullable=False
+        )
+    if rows:
+        bind.execute(
+            sa.text("UPDATE sessions SET ip_hash = :ip_hash WHERE id = :id"),
+            [{"id": row.id, "ip_hash": convert(row.ip_hash)} for row in rows],
+        )
+
+
+def upgrade() -> None:
+    column = _ip_hash_column()
+    if column is None or isinstance(column["type"], sa.Integer):
+        return
+
+    _drop_ip_hash_indexes()
+    if op.get_bind().dialect.name == "postgresql":
+        op.alter_column(
+            "sessions",
+            "ip_hash",
+            type_=sa.BigInteger(),
+            existing_type=sa.String(16),
+            existing_nullable=False,
+            postgresql_using="('x' || lpad(ip_hash, 16, '0'))::bit(64)::bigint",
+        )
+    else:
+        _rewrite(_hex_to_int, sa.BigInteger(), sa.String(16))
+    op.create_index("idx_sessions_ip_hash", "sessions", ["ip_hash"])
+
+
+def downgrade() -> None:
+    column = _ip_hash_column()
+    if column is None or not isinstance(column["type"], sa.Integer):
+        return
+
+    _drop_ip_hash_indexes()
+    if op.get_bind().dialect.name == "postgresql":
+        op.alter_column(
+            "sessions",
+            "ip_hash",
+            type_=sa.String(16),
+            existing_type=sa.BigInteger(),
+            existing_nullable=False,
+            postgresql_using="lpad(to_hex(ip_hash), 16, '0')",
+        )
+    else:
+        _rewrite(_int_to_hex, sa.String(16), sa.BigInteger())
+    op.create_index("idx_sessions_ip_hash", "sessions", ["ip_hash"])
@@ -0,0 +1,94 @@
+"""Generate llm_ledger.month_key from created_at in the database
+
+Revision ID: 8c41e7b2a5d3
+Revises: 3f2a9c1d7b40
+Create Date: 2026-10-15 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c41e7b2a5d3'
+down_revision = '3f2a9c1d7b40'
+branch_labels = None
+depends_on = None
+
+# Same expressions MonthKey compiles to; PostgreSQL needs an IMMUTABLE one
+MONTH_KEY_SQL = {
+    "postgresql": (
+        "lpad(extract(year from created_at)::int::text, 4, '0') || '-' || "
+        "lpad(extract(month from created_at)::int::text, 2, '0')"
+    ),
+}
+DEFAULT_MONTH_KEY_SQL = "strftime('%Y-%m', created_at)"
+
+
+def _month_key_sql() -> str:
+    return MONTH_KEY_SQL.get(op.get_bind().dialect.name, DEFAULT_MONTH_KEY_SQL)
+
+
+def _month_key_column():
+    """Return the reflected month_key column, or None without a ledger table."""
+    inspector = sa.inspect(op.get_bind())
+    if "llm_ledger" not in inspector.get_table_names():
+        # Fresh database: create_all builds the generated column
+        return None
+    return next(
+        (c for c in inspector.get_columns("llm_ledger") if c["name"] == "month_key"),
+        None,
+    )
+
+
+def _drop_month_key_indexes() -> None:
+    """Drop every index on month_key, so the column can be replaced."""
+    inspector = sa.inspect(op.get_bind())
+    for index in inspector.get_indexes("llm_ledger"):
+        if "month_key" in index["column_names"]:
+            op.drop_index(index["name"], table_name="llm_ledger")
+
+
+def upgrade() -> None:
+    column = _month_key_column()
+    if column is None or column.get("computed"):
+        return
+
+    _drop_month_key_indexes()
+    # On SQLite the batch rebuild puts the generated column in CREATE TABLE,
+    # since ALTER TABLE can't add a stored one
+    with op.batch_alter_table("llm_ledger", recreate="always") as batch_op:
+        batch_op.drop_column("month_key")
+        batch_op.add_column(
+            sa.Column(
+                "month_key",
+                sa.String(7),
+                sa.Computed(sa.text(_month_key_sql()), persisted=True),
+            )
+        )
+
+    # Covers the monthly SUM(cost_usd) so spend-cap checks never touch the table
+    op.create_index("idx_ledger_month_cost", "llm_ledger", ["month_key", "cost_usd"])
+    op.create_index(
+        "idx_ledger_month_blocked",
+        "llm_ledger",
+        ["month_key"],
+        postgresql_where=sa.column("blocked_after").is_(sa.true()),
+        sqlite_where=sa.column("blocked_after").is_(sa.true()),
+    )
+
+
+def downgrade() -> None:
+    column = _month_key_column()
+    if column is None or not column.get("computed"):
+        return
+
+    _drop_month_key_indexes()
+    with op.batch_alter_table("llm_ledger", recreate="always") as batch_op:
+        batch_op.drop_column("month_key")
+        batch_op.add_column(sa.Column("month_key", sa.String(7), nullable=True))
+    op.execute(f"UPDATE llm_ledger SET month_key = {_month_key_sql()}")
+    with op.batch_alter_table("llm_ledger") as batch_op:
+        batch_op.alter_column("month_key", existing_type=sa.String(7), nullable=False)
+
+    op.create_index("idx_ledger_month", "llm_ledger", ["month_key"])
@@ -0,0 +1,129 @@
+"""Store role, budget_tier and item_type as one-character codes
+
+Revision ID: c7d52e9f1a86
+Revises: 8c41e7b2a5d3
+Create Date: 2026-10-15 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d52e9f1a86'
+down_revision = '8c41e7b2a5d3'
+branch_labels = None
+depends_on = None
+
+# (table, column, CHECK constraint, PostgreSQL ENUM, (value, code) pairs)
+CODED_COLUMNS = (
+    ("messages", "role", "check_message_role", "message_role",
+     (("user", "u"), ("assistant", "a"), ("system", "s"))),
+    ("itineraries", "budget_tier", "check_budget_tier", "budget_tier",
+     (("budget", "b"), ("mid", "m"), ("premium", "p"))),
+    ("itinerary_items", "item_type", "check_item_type", "item_type",
+     (("poi", "p"), ("hotel", "h"), ("meal", "m"), ("transit", "t"))),
+)
+
+
+def _in_list(values) -> str:
+    return ", ".join(f"'{value}'" for value in values)
+
+
+def _recode(table: str, column: str, mapping) -> None:
+    """Rewrite a column's values in one UPDATE; unmapped values are kept."""
+    cases = " ".join(f"WHEN '{old}' THEN '{new}'" for old, new in mapping)
+    op.execute(f"UPDATE {table} SET {column} = CASE {column} {cases} ELSE {column} END")
+
+
+def _existing_columns():
+    """Yield the coded columns whose tables exist, with their reflected info."""
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for table, column, check_name, enum_name, codes in CODED_COLUMNS:
+        if table not in tables:
+            # Fresh database: create_all builds the coded column
+            continue
+        info = next(c for c in inspector.get_columns(table) if c["name"] == column)
+        checks = {c["name"] for c in inspector.get_check_constraints(table)}
+        yield table, column, check_name, enum_name, codes, info, check_name in checks
+
+
+def _is_coded(info, dialect_name: str) -> bool:
+    if dialect_name == "postgresql":
+        return isinstance(info["type"], postgresql.ENUM)
+    return getattr(info["type"], "length", None) == 1
+
+
+def upgrade() -> None:
+    dialect_name = op.get_bind().dialect.name
+    for table, column, check_name, enum_name, codes, info, has_check in _existing_columns():
+        if _is_coded(info, dialect_name):
+            continue
+        values = [value for value, _ in codes]
+
+        if dialect_name == "postgresql":
+            # The native ENUM holds the full values and replaces the CHECK
+            postgresql.ENUM(*values, name=enum_name).create(op.get_bind(), checkfirst=True)
+            if has_check:
+                op.drop_constraint(check_name, table, type_="check")
+            op.alter_column(
+                table,
+                column,
+                type_=postgresql.ENUM(*values, name=enum_name, create_type=False),
+                existing_type=sa.String(20),
+                existing_nullable=False,
+                postgresql_using=f"{column}::{enum_name}",
+            )
+            continue
+
+        # The old CHECK would reject the codes, so it goes before the UPDATE
+        if has_check:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_constraint(check_name, type_="check")
+        _recode(table, column, codes)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                column,
+                type_=sa.String(1),
+                existing_type=sa.String(20),
+                existing_nullable=False,
+            )
+            batch_op.create_check_constraint(
+                check_name, f"{column} IN ({_in_list(code for _, code in codes)})"
+            )
+
+
+def downgrade() -> None:
+    dialect_name = op.get_bind().dialect.name
+    for table, column, check_name, enum_name, codes, info, has_check in _existing_columns():
+        if not _is_coded(info, dialect_name):
+            continue
+        values = [value for value, _ in codes]
+
+        if dialect_name == "postgresql":
+            op.alter_column(
+                table,
+                column,
+                type_=sa.String(20),
+                existing_type=postgresql.ENUM(*values, name=enum_name, create_type=False),
+                existing_nullable=False,
+                postgresql_using=f"{column}::text",
+            )
+            postgresql.ENUM(name=enum_name).drop(op.get_bind(), checkfirst=True)
+            op.create_check_constraint(check_name, table, f"{column} IN ({_in_list(values)})")
+            continue
+
+        if has_check:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_constraint(check_name, type_="check")
+        _recode(table, column, [(code, value) for value, code in codes])
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                column,
+                type_=sa.String(20),
+                existing_type=sa.String(1),
+                existing_nullable=False,
+            )
+            batch_op.create_check_constraint(check_name, f"{column} IN ({_in_list(values)})")
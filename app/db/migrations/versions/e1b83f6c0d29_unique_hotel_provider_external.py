@@ -0,0 +1,87 @@
+"""Make hotels unique per (provider, external_id)
+
+Revision ID: e1b83f6c0d29
+Revises: c7d52e9f1a86
+Create Date: 2026-10-15 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1b83f6c0d29'
+down_revision = 'c7d52e9f1a86'
+branch_labels = None
+depends_on = None
+
+CONSTRAINT_NAME = "uq_hotel_provider_external"
+# Single-column index made redundant by the constraint's (provider, ...) prefix
+PROVIDER_INDEX = "ix_hotels_provider"
+
+
+def _has_constraint() -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(c["name"] == CONSTRAINT_NAME for c in inspector.get_unique_constraints("hotels"))
+
+
+def _remove_duplicates() -> None:
+    """Keep the most recently synced hotel of each duplicate group.
+    Itinerary items pointing at a removed row are moved to the kept one.
+    """
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, provider, external_id FROM hotels"
+        " WHERE external_id IS NOT NULL AND (provider, external_id) IN ("
+        "   SELECT provider, external_id FROM hotels WHERE external_id IS NOT NULL"
+        "   GROUP BY provider, external_id HAVING COUNT(*) > 1"
+        " )"
+        " ORDER BY provider, external_id,"
+        "   CASE WHEN last_synced_at IS NULL THEN 1 ELSE 0 END, last_synced_at DESC"
+    )).all()
+
+    kept = {}
+    moves = []
+    for hotel_id, provider, external_id in rows:
+        keep_id = kept.setdefault((provider, external_id), hotel_id)
+        if keep_id != hotel_id:
+            moves.append({"keep": keep_id, "dup": hotel_id})
+    if not moves:
+        return
+
+    bind.execute(
+        sa.text("UPDATE itinerary_items SET ref_hotel_id = :keep WHERE ref_hotel_id = :dup"),
+        moves,
+    )
+    bind.execute(sa.text("DELETE FROM hotels WHERE id = :dup"), moves)
+
+
+def _has_provider_index() -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(i["name"] == PROVIDER_INDEX for i in inspector.get_indexes("hotels"))
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "hotels" not in inspector.get_table_names():
+        # Fresh database: create_all adds the constraint
+        return
+
+    if _has_provider_index():
+        op.drop_index(PROVIDER_INDEX, table_name="hotels")
+    if _has_constraint():
+        return
+
+    _remove_duplicates()
+    with op.batch_alter_table("hotels") as batch_op:
+        batch_op.create_unique_constraint(CONSTRAINT_NAME, ["provider", "external_id"])
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "hotels" not in inspector.get_table_names() or not _has_constraint():
+        return
+
+    with op.batch_alter_table("hotels") as batch_op:
+        batch_op.drop_constraint(CONSTRAINT_NAME, type_="unique")
+    op.create_index(PROVIDER_INDEX, "hotels", ["provider"])
@@ -3,55 +3,81 @@ Defines the database schema for sessions, messages, itineraries,
 places, hotels, and LLM usage ledger.
 """
 
+import os
+import time as _time
 import uuid
 from datetime import datetime, date, time
 from typing import Optional
 
 from sqlalchemy import (
-    Column, String, DateTime, Date, Time, Integer, Float, Boolean,
-    Text, ForeignKey, Index, CheckConstraint, UniqueConstraint, TypeDecorator, JSON
+    Column, String, DateTime, Date, Time, Integer, BigInteger, Float, Boolean, LargeBinary,
+    Text, ForeignKey, Index, CheckConstraint, UniqueConstraint, TypeDecorator, JSON,
+    Computed, DDL, event
 )
-from sqlalchemy.dialects.postgresql import UUID as PostgreSQL_UUID, JSONB
+from sqlalchemy.dialects.postgresql import ENUM as PostgreSQL_ENUM, UUID as PostgreSQL_UUID, JSONB
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import column, func
+from sqlalchemy.sql.expression import FunctionElement
 
 from app.db.base import Base
 
 
+def uuid7() -> uuid.UUID:
+    """Generate a time-ordered UUID (version 7, RFC 9562).
+
+    The first 48 bits are the Unix time in milliseconds and the remaining 74
+    free bits are random, so new primary keys land at the right edge of the
+    B-tree instead of on random leaf pages.
+    Returns:
+        uuid.UUID: New UUIDv7 value.
+    """
+    timestamp_ms = _time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (
+        (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76                              # version
+        | (rand >> 62 & 0xFFF) << 64             # rand_a
+        | 0b10 << 62                             # RFC 4122 variant
+        | rand & 0x3FFF_FFFF_FFFF_FFFF           # rand_b
+    )
+    return uuid.UUID(int=value)
+
+
 class GUID(TypeDecorator):
     """Platform-independent GUID type.
     
     Uses PostgreSQL's UUID type when available,
-    otherwise uses CHAR(36), storing as stringified hex values.
+    otherwise stores the raw 16 bytes in a BLOB column. Databases created
+    with CHAR(36) text GUIDs are converted by the 3f2a9c1d7b40 migration.
     """
-    impl = String
+    impl = LargeBinary
     cache_ok = True
 
     def load_dialect_impl(self, dialect):
         if dialect.name == 'postgresql':
             return dialect.type_descriptor(PostgreSQL_UUID(as_uuid=True))
         else:
-            return dialect.type_descriptor(String(36))
+            return dialect.type_descriptor(LargeBinary(16))
 
     def process_bind_param(self, value, dialect):
         if value is None:
             return value
         elif dialect.name == 'postgresql':
             return value
+        elif isinstance(value, uuid.UUID):
+            return value.bytes
         else:
-            if not isinstance(value, uuid.UUID):
-                return str(value)
-            else:
-                return str(value)
+            return uuid.UUID(str(value)).bytes
 
     def process_result_value(self, value, dialect):
-        if value is None:
+        if value is None or isinstance(value, uuid.UUID):
             return value
+        elif isinstance(value, bytes):
+            return uuid.UUID(bytes=value)
         else:
-            if not isinstance(value, uuid.UUID):
-                return uuid.UUID(value)
-            else:
-                return value
+            # CHAR(36) text from a database that hasn't been migrated yet
+            return uuid.UUID(value)
 
 
 class JSONColumn(TypeDecorator):
@@ -70,22 +96,101 @@ class JSONColumn(TypeDecorator):
             return dialect.type_descriptor(JSON())
 
 
+class CodedEnum(TypeDecorator):
+    """Platform-independent compact enum type.
+    
+    Uses a native PostgreSQL ENUM when available, otherwise stores each
+    value as a single-character code. Python code always sees the full
+    string value.
+    """
+    impl = String
+    cache_ok = True
+
+    def __init__(self, enum_name: str, codes: tuple):
+        """Args:
+            enum_name (str): Name of the PostgreSQL ENUM type.
+            codes (tuple): ``(value, code)`` pairs; codes are one character.
+        """
+        super().__init__()
+        self.enum_name = enum_name
+        self.codes = codes
+        self._to_code = dict(codes)
+        self._from_code = {code: value for value, code in codes}
+
+    def native_enum(self) -> PostgreSQL_ENUM:
+        """PostgreSQL ENUM type for these values (created by the metadata hook)."""
+        values = [value for value, _ in self.codes]
+        return PostgreSQL_ENUM(*values, name=self.enum_name, create_type=False)
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(self.native_enum())
+        else:
+            return dialect.type_descriptor(String(1))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name == 'postgresql':
+            return value
+        # Unknown values pass through unchanged so the CHECK constraint rejects them
+        return self._to_code.get(value, value)
+
+    def process_result_value(self, value, dialect):
+        if value is None or dialect.name == 'postgresql':
+            return value
+        return self._from_code.get(value, value)
+
+
+def _unless_postgresql(ddl, target, bind, **kw) -> bool:
+    """DDL condition: skip CHECK constraints that a native ENUM already enforces."""
+    return kw["dialect"].name != "postgresql"
+
+
+MESSAGE_ROLE_CODES = (("user", "u"), ("assistant", "a"), ("system", "s"))
+BUDGET_TIER_CODES = (("budget", "b"), ("mid", "m"), ("premium", "p"))
+ITEM_TYPE_CODES = (("poi", "p"), ("hotel", "h"), ("meal", "m"), ("transit", "t"))
+
+
+class MonthKey(FunctionElement):
+    """Platform-independent 'YYYY-MM' rendering of a timestamp.
+
+    Used as the expression of generated columns, so each backend gets a
+    deterministic form it accepts there.
+    """
+    type = String(7)
+    inherit_cache = True
+
+
+@compiles(MonthKey)
+def _compile_month_key(element, compiler, **kw):
+    return "strftime('%%Y-%%m', %s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(MonthKey, "postgresql")
+def _compile_month_key_postgresql(element, compiler, **kw):
+    # to_char() is only STABLE; generated columns need IMMUTABLE expressions
+    arg = compiler.process(element.clauses, **kw)
+    return (
+        f"lpad(extract(year from {arg})::int::text, 4, '0') || '-' || "
+        f"lpad(extract(month from {arg})::int::text, 2, '0')"
+    )
+
+
 class Session(Base):
     """User session model.
     Represents a user session in the application. Inherits from Base.
     Columns:
         id (UUID): Primary key.
         created_at (DateTime): Timestamp of session creation.
-        ip_hash (String): Hashed IP address for basic identification.
+        ip_hash (BigInteger): Hashed IP address for basic identification.
     Relationships:
         messages (List[Message]): Chat messages in this session.
         itineraries (List[Itinerary]): Itineraries created in this session.
     """
     __tablename__ = "sessions"
     
-    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
-    created_at = Column(DateTime, nullable=False, default=func.now())
-    ip_hash = Column(String(16), nullable=False, index=True)
+    id = Column(GUID(), primary_key=True, default=uuid7)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=func.now())
+    ip_hash = Column(BigInteger, nullable=False)
     
     # Relationships
     messages = relationship("Message", back_populates="session", cascade="all, delete-orphan")
@@ -102,7 +207,7 @@ class Message(Base):
     Columns:
         id (UUID): Primary key.
         session_id (UUID): Foreign key to Session.
-        role (String): Role of the message sender (user, assistant, system).
+        role (CodedEnum): Role of the message sender (user, assistant, system).
         content (Text): Message content.
         tokens_in (Integer): Number of input tokens.
         tokens_out (Integer): Number of output tokens.
@@ -114,20 +219,20 @@ class Message(Base):
     """
     __tablename__ = "messages"
     
-    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(GUID(), primary_key=True, default=uuid7)
     session_id = Column(GUID(), ForeignKey("sessions.id"), nullable=False)
-    role = Column(String(20), nullable=False)
+    role = Column(CodedEnum('message_role', MESSAGE_ROLE_CODES), nullable=False)
     content = Column(Text, nullable=False)
     tokens_in = Column(Integer, nullable=True)
     tokens_out = Column(Integer, nullable=True)
     cost_usd = Column(Float, nullable=True)
-    created_at = Column(DateTime, nullable=False, default=func.now())
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=func.now())
     
     # Relationships
     session = relationship("Session", back_populates="messages")
     
     __table_args__ = (
-        CheckConstraint("role IN ('user', 'assistant', 'system')", name="check_message_role"),
+        CheckConstraint("role IN ('u', 'a', 's')", name="check_message_role").ddl_if(callable_=_unless_postgresql),
         Index('idx_messages_session_created', 'session_id', 'created_at'),
     )
 
@@ -142,7 +247,7 @@ class Itinerary(Base):
         country (String): Destination country.
         start_date (Date): Start date of the itinerary.
         end_date (Date): End date of the itinerary.
-        budget_tier (String): Budget tier (budget, mid, premium).
+        budget_tier (CodedEnum): Budget tier (budget, mid, premium).
         created_at (DateTime): Timestamp of itinerary creation.
         Relationships:
         session (Session): The session this itinerary belongs to.
@@ -150,21 +255,21 @@ class Itinerary(Base):
         """
     __tablename__ = "itineraries"
     
-    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(GUID(), primary_key=True, default=uuid7)
     session_id = Column(GUID(), ForeignKey("sessions.id"), nullable=False)
-    city = Column(String(100), nullable=False, index=True)
+    city = Column(String(100), nullable=False)
     country = Column(String(100), nullable=True)
     start_date = Column(Date, nullable=False)
     end_date = Column(Date, nullable=False)
-    budget_tier = Column(String(20), nullable=False)
-    created_at = Column(DateTime, nullable=False, default=func.now())
+    budget_tier = Column(CodedEnum('budget_tier', BUDGET_TIER_CODES), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=func.now())
     
     # Relationships
     session = relationship("Session", back_populates="itineraries")
     days = relationship("ItineraryDay", back_populates="itinerary", cascade="all, delete-orphan")
     
     __table_args__ = (
-        CheckConstraint("budget_tier IN ('budget', 'mid', 'premium')", name="check_budget_tier"),
+        CheckConstraint("budget_tier IN ('b', 'm', 'p')", name="check_budget_tier").ddl_if(callable_=_unless_postgresql),
         Index('idx_itineraries_city', 'city'),
         Index('idx_itineraries_session', 'session_id'),
     )
@@ -184,7 +289,7 @@ class ItineraryDay(Base):
     """
     __tablename__ = "itinerary_days"
     
-    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(GUID(), primary_key=True, default=uuid7)
     itinerary_id = Column(GUID(), ForeignKey("itineraries.id"), nullable=False)
     day_index = Column(Integer, nullable=False)
     date = Column(Date, nullable=False)
@@ -205,7 +310,7 @@ class ItineraryItem(Base):
     Columns:
         id (UUID): Primary key.
         day_id (UUID): Foreign key to ItineraryDay.
-        item_type (String): Type of item (poi, hotel, meal, transit).
+        item_type (CodedEnum): Type of item (poi, hotel, meal, transit).
         ref_place_id (UUID): Foreign key to Place (if applicable).
         ref_hotel_id (UUID): Foreign key to Hotel (if applicable).
         start_time (Time): Start time of the activity.
@@ -218,9 +323,9 @@ class ItineraryItem(Base):
     """
     __tablename__ = "itinerary_items"
     
-    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(GUID(), primary_key=True, default=uuid7)
     day_id = Column(GUID(), ForeignKey("itinerary_days.id"), nullable=False)
-    item_type = Column(String(20), nullable=False, index=True)
+    item_type = Column(CodedEnum('item_type', ITEM_TYPE_CODES), nullable=False)
     ref_place_id = Column(GUID(), ForeignKey("places.id"), nullable=True)
     ref_hotel_id = Column(GUID(), ForeignKey("hotels.id"), nullable=True)
     start_time = Column(Time, nullable=True)
@@ -233,7 +338,7 @@ class ItineraryItem(Base):
     hotel = relationship("Hotel", foreign_keys=[ref_hotel_id])
     
     __table_args__ = (
-        CheckConstraint("item_type IN ('poi', 'hotel', 'meal', 'transit')", name="check_item_type"),
+        CheckConstraint("item_type IN ('p', 'h', 'm', 't')", name="check_item_type").ddl_if(callable_=_unless_postgresql),
         Index('idx_items_day', 'day_id'),
         Index('idx_items_type', 'item_type'),
     )
@@ -261,8 +366,8 @@ class Place(Base):
         """
     __tablename__ = "places"
     
-    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
-    provider = Column(String(50), nullable=False, index=True)
+    id = Column(GUID(), primary_key=True, default=uuid7)
+    provider = Column(String(50), nullable=False)
     external_id = Column(String(200), nullable=False)
     name = Column(String(200), nullable=False, index=True)
     lat = Column(Float, nullable=False)
@@ -270,14 +375,13 @@ class Place(Base):
     categories = Column(JSONColumn(), nullable=True)  # Falls back to JSON for SQLite
     rating = Column(Float, nullable=True)
     address = Column(Text, nullable=True)
-    city = Column(String(100), nullable=True, index=True)
+    city = Column(String(100), nullable=True)
     country = Column(String(100), nullable=True, index=True)
     raw_json = Column(JSONColumn(), nullable=True)  # Falls back to JSON for SQLite
     last_synced_at = Column(DateTime, nullable=True)
     
     __table_args__ = (
         UniqueConstraint('provider', 'external_id', name='uq_place_provider_external'),
-        Index('idx_places_provider_ext', 'provider', 'external_id'),
         Index('idx_places_city_country', 'city', 'country'),
     )
 
@@ -305,16 +409,16 @@ class Hotel(Base):
     """
     __tablename__ = "hotels"
     
-    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
-    provider = Column(String(50), nullable=False, index=True)
+    id = Column(GUID(), primary_key=True, default=uuid7)
+    provider = Column(String(50), nullable=False)
     external_id = Column(String(200), nullable=True, index=True)
     name = Column(String(200), nullable=False, index=True)
     lat = Column(Float, nullable=True)
     lon = Column(Float, nullable=True)
     price_eur_per_night = Column(Float, nullable=True, index=True)
-    rating = Column(Float, nullable=True, index=True)
+    rating = Column(Float, nullable=True)
     address = Column(Text, nullable=True)
-    city = Column(String(100), nullable=True, index=True)
+    city = Column(String(100), nullable=True)
     country = Column(String(100), nullable=True, index=True)
     url = Column(Text, nullable=True)
     raw_json = Column(JSONColumn(), nullable=True)  # Falls back to JSON for SQLite
@@ -323,6 +427,8 @@ class Hotel(Base):
     __table_args__ = (
         Index('idx_hotels_city_price', 'city', 'price_eur_per_night'),
         Index('idx_hotels_rating', 'rating'),
+        # Conflict target for provider upserts
+        UniqueConstraint('provider', 'external_id', name='uq_hotel_provider_external'),
     )
 
 
@@ -342,20 +448,43 @@ class APICache(Base):
     """
     __tablename__ = "api_cache"
     
-    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(GUID(), primary_key=True, default=uuid7)
     provider = Column(String(50), nullable=False, index=True)
     endpoint = Column(String(200), nullable=False, index=True)
-    params_hash = Column(String(64), nullable=False, unique=True, index=True)
+    params_hash = Column(String(64), nullable=False, unique=True)
     response_json = Column(JSONColumn(), nullable=False)  # Falls back to JSON for SQLite
-    fetched_at = Column(DateTime, nullable=False, default=func.now())
+    fetched_at = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=func.now())
     ttl_seconds = Column(Integer, nullable=False)
     
     __table_args__ = (
-        Index('idx_cache_params_hash', 'params_hash'),
+        # params_hash lookups use the index behind its unique constraint
         Index('idx_cache_fetched', 'fetched_at'),
     )
 
 
+@event.listens_for(Base.metadata, "before_create")
+def _create_postgresql_enums(target, connection, **kw):
+    """Create the ENUM types behind CodedEnum columns before their tables.
+
+    SQLAlchemy only emits CREATE TYPE for enum types it sees directly on a
+    column, not ones chosen inside a TypeDecorator.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    for table in kw.get("tables") or target.sorted_tables:
+        for col in table.columns:
+            if isinstance(col.type, CodedEnum):
+                col.type.native_enum().create(connection, checkfirst=True)
+
+
+# The cache is re-derivable from the providers, so skip WAL for it on PostgreSQL
+event.listen(
+    APICache.__table__,
+    "after_create",
+    DDL("ALTER TABLE %(table)s SET UNLOGGED").execute_if(dialect="postgresql"),
+)
+
+
 class LLMLedger(Base):
     """LLM usage tracking for spend cap enforcement.
     Columns:
@@ -373,21 +502,29 @@ class LLMLedger(Base):
     """
     __tablename__ = "llm_ledger"
     
-    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(GUID(), primary_key=True, default=uuid7)
     session_id = Column(GUID(), ForeignKey("sessions.id"), nullable=True)
     model = Column(String(50), nullable=False)
     prompt_tokens = Column(Integer, nullable=False)
     completion_tokens = Column(Integer, nullable=False)
     cost_usd = Column(Float, nullable=False)
-    created_at = Column(DateTime, nullable=False, default=func.now())
-    month_key = Column(String(7), nullable=False, index=True)  # YYYY-MM format
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=func.now())
+    # YYYY-MM derived from created_at by the database
+    month_key = Column(String(7), Computed(MonthKey(column("created_at")), persisted=True))
     blocked_after = Column(Boolean, nullable=False, default=False)
     
     # Relationships
     session = relationship("Session", foreign_keys=[session_id])
     
     __table_args__ = (
-        Index('idx_ledger_month', 'month_key'),
-        Index('idx_ledger_session', 'session_id'),
+        # Covers the monthly SUM(cost_usd) so spend-cap checks never touch the table
+        Index('idx_ledger_month_cost', 'month_key', 'cost_usd'),
+        Index('idx_ledger_session_created', 'session_id', 'created_at'),
         Index('idx_ledger_created', 'created_at'),
+        # Blocked calls are rare; index only those rows for the admin counters
+        Index(
+            'idx_ledger_month_blocked', 'month_key',
+            postgresql_where=blocked_after.is_(True),
+            sqlite_where=blocked_after.is_(True),
+        ),
     )
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""Dialect-specific INSERT constructs for upserts.
+
+PostgreSQL and SQLite both support ``INSERT ... ON CONFLICT``, but through
+their own ``insert`` constructs; repositories pick the one matching the
+session's engine and fall back to read-then-write elsewhere.
+"""
+
+from typing import Any, Callable, Optional
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session as DBSession
+
+
+# Dialects with INSERT ... ON CONFLICT support, keyed by dialect name
+UPSERT_INSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+def upsert_insert(db: DBSession) -> Optional[Callable[..., Any]]:
+    """Get the ON CONFLICT-capable ``insert`` for the session's dialect.
+    Args:
+        db (DBSession): Database session.
+    Returns:
+        Optional[Callable[..., Any]]: The dialect's ``insert``, or None if it has no upsert.
+    """
+    return UPSERT_INSERTS.get(db.get_bind().dialect.name)
@@ -1,12 +1,16 @@
 """Dependency injection setup for FastAPI."""
 
 import hashlib
+import secrets
+from functools import lru_cache
 from typing import Generator, Optional
 
-from fastapi import Depends, HTTPException, status
+import httpx
+import orjson
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, configure_mappers, sessionmaker
 
 from app.config import Settings, get_settings
 from app.db.base import Base
@@ -17,16 +21,61 @@ engine = None
 SessionLocal = None
 
 
+def _json_serializer(value) -> str:
+    """Serialize JSON columns with orjson; SQLAlchemy expects a str back."""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Tune each new SQLite connection for concurrent reads and cheaper commits.
+
+    WAL lets readers proceed while a single writer commits, and with WAL
+    ``synchronous=NORMAL`` only fsyncs at checkpoints instead of every commit.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+        cursor.execute("PRAGMA cache_size=-65536")  # 64 MiB
+    finally:
+        cursor.close()
+
+
 def init_database(settings: Settings) -> None:
     """Initialize database connection."""
     global engine, SessionLocal
-    engine = create_engine(
-        settings.database_url,
-        connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
+    engine_options = dict(
         echo=settings.debug,
+        json_serializer=_json_serializer,
+        json_deserializer=orjson.loads,
+        # Room for every distinct ORM statement the repositories emit, so
+        # none of them get evicted and recompiled under load
+        query_cache_size=1200,
     )
+    if "sqlite" in settings.database_url:
+        engine = create_engine(
+            settings.database_url,
+            connect_args={"check_same_thread": False},
+            **engine_options,
+        )
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    else:
+        engine = create_engine(
+            settings.database_url,
+            pool_size=20,
+            max_overflow=10,
+            pool_pre_ping=True,
+            pool_recycle=1800,
+            **engine_options,
+        )
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     
+    # Resolve relationships and build mapper state now rather than on the
+    # first query of the first request
+    configure_mappers()
+    
     # Create tables
     Base.metadata.create_all(bind=engine)
 
@@ -43,19 +92,44 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_app_settings() -> Settings:
+    """Get the process-wide settings as a request dependency.
+
+    Declared ``async`` so FastAPI resolves it inline; a plain ``def``
+    dependency is dispatched to the threadpool on every request even though
+    ``get_settings`` only returns a cached object.
+    """
+    return get_settings()
+
+
+async def get_openai_client(request: Request) -> Optional[httpx.AsyncClient]:
+    """Get the shared OpenAI client created in the app lifespan, if any."""
+    return getattr(request.app.state, "openai_client", None)
+
+
+async def get_opentripmap_client(request: Request) -> Optional[httpx.AsyncClient]:
+    """Get the shared OpenTripMap client created in the app lifespan, if any."""
+    return getattr(request.app.state, "opentripmap_client", None)
+
+
+async def get_rapidapi_client(request: Request) -> Optional[httpx.AsyncClient]:
+    """Get the shared RapidAPI client created in the app lifespan, if any."""
+    return getattr(request.app.state, "rapidapi_client", None)
+
+
 # HTTP Basic Auth for admin
 security = HTTPBasic()
 
 
-def get_admin_user(
+async def get_admin_user(
     credentials: HTTPBasicCredentials = Depends(security),
-    settings: Settings = Depends(get_settings),
+    settings: Settings = Depends(get_app_settings),
 ) -> str:
     """Authenticate admin user."""
-    is_correct_username = credentials.username == settings.admin_username
-    is_correct_password = credentials.password == settings.admin_password
-    
-    if not (is_correct_username and is_correct_password):
+    # A single constant-time compare over the joined pair reveals nothing
+    # about which field was wrong or how long either one is
+    provided = f"{credentials.username}:{credentials.password}".encode()
+    if not secrets.compare_digest(provided, settings.admin_token):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
@@ -64,6 +138,23 @@ def get_admin_user(
     return credentials.username
 
 
-def hash_ip(ip: str, salt: str) -> str:
-    """Hash IP address with salt for privacy."""
-    return hashlib.sha256(f"{ip}{salt}".encode()).hexdigest()[:16]
\ No newline at end of file
+@lru_cache(maxsize=None)
+def _salted_hasher(salt: str) -> "hashlib._Hash":
+    """Build the keyed BLAKE2b state for a salt once; callers copy it."""
+    key = salt.encode()
+    if len(key) > hashlib.blake2b.MAX_KEY_SIZE:
+        key = hashlib.blake2b(key).digest()
+    return hashlib.blake2b(digest_size=8, key=key)
+
+
+def hash_ip(ip: str, salt: str) -> int:
+    """Hash IP address with salt for privacy.
+
+    Uses keyed BLAKE2b with the salt as the key and an 8-byte digest. The
+    digest is returned as a signed 64-bit integer so it fits a BIGINT column,
+    which keeps the session index keys at 8 bytes. The keyed state is built
+    once per salt and copied, so only the IP bytes are absorbed here.
+    """
+    hasher = _salted_hasher(salt).copy()
+    hasher.update(ip.encode("ascii", "replace"))
+    return int.from_bytes(hasher.digest(), "big", signed=True)
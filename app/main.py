@@ -2,14 +2,22 @@
 
 import logging
 from contextlib import asynccontextmanager
+from pathlib import Path
 
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import ORJSONResponse
 
+from app import deps
 from app.config import get_settings
-from app.deps import init_database
+from app.orchestration.llm_orchestrator import create_openai_client
+from app.providers.hotels.rapid_hotels import create_rapidapi_client
+from app.providers.hotels.static_stub import seed_stub_hotels
+from app.providers.opentripmap_client import create_opentripmap_client
 from app.web.routes import router
+from app.web.static_files import CachedStaticFiles
+
+
+WEB_DIR = Path(__file__).parent / "web"
 
 
 # Configure logging
@@ -20,15 +28,36 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
-    settings = get_settings()
+    # Reuse the instance create_app() resolved rather than looking it up again
+    settings = app.state.settings
     
     # Initialize database
-    init_database(settings)
+    deps.init_database(settings)
     logger.info("Database initialized")
     
+    # One pooled client per upstream API for the whole process, so chat
+    # requests reuse open TLS connections instead of handshaking every time
+    app.state.openai_client = create_openai_client(settings)
+    app.state.opentripmap_client = create_opentripmap_client()
+    app.state.rapidapi_client = None
+    
+    if settings.rapidapi_hotels_enabled and settings.rapidapi_key:
+        app.state.rapidapi_client = create_rapidapi_client(settings)
+    else:
+        # Seed the stub hotels once here rather than on the first chat request
+        db = deps.SessionLocal()
+        try:
+            seed_stub_hotels(db)
+        finally:
+            db.close()
+    
     yield
     
     # Cleanup if needed
+    await app.state.openai_client.aclose()
+    await app.state.opentripmap_client.aclose()
+    if app.state.rapidapi_client is not None:
+        await app.state.rapidapi_client.aclose()
     logger.info("Application shutting down")
 
 
@@ -42,15 +71,28 @@ def create_app() -> FastAPI:
         version="1.0.0",
         debug=settings.debug,
         lifespan=lifespan,
+        # JSON endpoints (health, itinerary export) are encoded with orjson
+        default_response_class=ORJSONResponse,
     )
+    app.state.settings = settings
     
     # Include routes
     app.include_router(router)
     
-    # Mount static files
-    app.mount("/static", StaticFiles(directory="app/web/static"), name="static")
+    # Mount static files. The stylesheet is cache-busted with a ?v= query
+    # in base.html, so it can be cached for good; favicons are not
+    # versioned, so they only get a week
+    app.mount(
+        "/static",
+        CachedStaticFiles(directory=WEB_DIR / "static", max_age=31536000, immutable=True),
+        name="static",
+    )
     # Mount assets (images, favicons, etc.)
-    app.mount("/assets", StaticFiles(directory="app/web/assets"), name="assets")
+    app.mount(
+        "/assets",
+        CachedStaticFiles(directory=WEB_DIR / "assets", max_age=604800),
+        name="assets",
+    )
     
     return app
 
@@ -59,12 +101,24 @@ app = create_app()
 
 
 if __name__ == "__main__":
+    import sys
+    
     import uvicorn
     
-    settings = get_settings()
+    settings = app.state.settings
     uvicorn.run(
         "app.main:app",
         host=settings.host,
         port=settings.port,
+        # The reloader only supports a single process; production runs one
+        # worker per core so blocking work in one process doesn't stall the rest
         reload=settings.debug,
+        workers=1 if settings.debug else settings.workers,
+        # Workers that hit the limit exit and are not replaced (see Settings)
+        limit_max_requests=None if settings.debug else settings.limit_max_requests,
+        # Pin the fast event loop and HTTP parser shipped with uvicorn[standard]
+        # rather than relying on auto-detection; uvloop has no Windows build
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        timeout_keep_alive=30,
     )
\ No newline at end of file
@@ -4,13 +4,64 @@ by the orchestration layer, such as searching for points of interest (POIs),
 hotels, and finalizing itineraries.
 Used by the llm_orchestrator to validate and execute actions requested by the LLM."""
 
-from typing import Dict, Any, List, Optional
-from pydantic import BaseModel, Field
+from datetime import date
+from types import MappingProxyType
+from typing import Annotated, Dict, Any, FrozenSet, List, Literal, Mapping, Optional, Union, get_args
 
+import orjson
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
-class SearchPOIsAction(BaseModel):
+__all__ = [
+    "BudgetTier",
+    "ActivityType",
+    "BUDGET_TIERS",
+    "ACTIVITY_TYPES",
+    "BaseAction",
+    "SearchPOIsAction",
+    "SearchHotelsAction",
+    "Activity",
+    "DayPlan",
+    "FinalizeItineraryAction",
+    "ActionResult",
+    "TravelAction",
+    "ACTION_ADAPTER",
+    "ACTION_NAMES",
+    "TOOL_SCHEMA",
+    "TOOL_SCHEMA_JSON",
+]
+
+
+BudgetTier = Literal["budget", "mid", "premium"]
+ActivityType = Literal["poi", "hotel", "meal", "transit"]
+
+# Set forms of the literals for callers that only need a membership test
+BUDGET_TIERS: FrozenSet[str] = frozenset(get_args(BudgetTier))
+ACTIVITY_TYPES: FrozenSet[str] = frozenset(get_args(ActivityType))
+
+
+class BaseAction(BaseModel):
+    """Common base for tool action arguments.
+    
+    Trust boundary: arguments coming from the LLM are untrusted and go
+    through ``model_validate``. Actions the orchestrator builds itself from
+    values it already holds (e.g. a follow-up search) use ``from_trusted``,
+    which skips validation entirely.
+    """
+
+    # Actions are never modified after parsing. Unknown keys are ignored
+    # rather than forbidden: the tool schema is one flat object shared by
+    # every action, so the LLM may send fields meant for another action.
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    @classmethod
+    def from_trusted(cls, **data: Any) -> "BaseAction":
+        """Build an action from already-valid data without re-validating it."""
+        return cls.model_construct(**data)
+
+
+class SearchPOIsAction(BaseAction):
     """Action to search for points of interest."""
-    action: str = Field(default="search_pois", description="Action type")
+    action: Literal["search_pois"] = Field(default="search_pois", description="Action type")
     city: str = Field(description="City name to search in")
     country: Optional[str] = Field(default=None, description="Country name for better matching")
     categories: Optional[List[str]] = Field(
@@ -20,27 +71,49 @@ class SearchPOIsAction(BaseModel):
     limit: Optional[int] = Field(default=20, description="Maximum number of POIs to return")
 
 
-class SearchHotelsAction(BaseModel):
+class SearchHotelsAction(BaseAction):
     """Action to search for hotels."""
-    action: str = Field(default="search_hotels", description="Action type")
+    action: Literal["search_hotels"] = Field(default="search_hotels", description="Action type")
     city: str = Field(description="City name to search in")
     country: Optional[str] = Field(default=None, description="Country name for better matching")
-    budget_tier: str = Field(
+    budget_tier: BudgetTier = Field(
         default="mid",
         description="Budget tier: 'budget', 'mid', or 'premium'"
     )
     limit: Optional[int] = Field(default=10, description="Maximum number of hotels to return")
 
 
-class FinalizeItineraryAction(BaseModel):
+class Activity(BaseModel):
+    """A single scheduled activity within an itinerary day."""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    type: ActivityType = Field(default="poi", description="Activity type")
+    name: str = Field(default="", description="Activity name")
+    external_id: Optional[str] = Field(default=None, description="Provider ID of the place or hotel")
+    start_time: Optional[str] = Field(default=None, description="Start time (HH:MM)")
+    end_time: Optional[str] = Field(default=None, description="End time (HH:MM)")
+    notes: Optional[str] = Field(default=None, description="Free-form notes")
+
+
+class DayPlan(BaseModel):
+    """One day of an itinerary with its activities."""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    day_index: int = Field(default=0, description="1-based day number")
+    date: str = Field(description="Date in YYYY-MM-DD format")
+    activities: List[Activity] = Field(default_factory=list, description="Activities for the day")
+
+
+class FinalizeItineraryAction(BaseAction):
     """Action to finalize and save the itinerary."""
-    action: str = Field(default="finalize_itinerary", description="Action type")
+    action: Literal["finalize_itinerary"] = Field(default="finalize_itinerary", description="Action type")
     city: str = Field(description="Destination city")
     country: Optional[str] = Field(default=None, description="Destination country")
-    start_date: str = Field(description="Start date in YYYY-MM-DD format")
-    end_date: str = Field(description="End date in YYYY-MM-DD format")
-    budget_tier: str = Field(description="Budget tier: 'budget', 'mid', or 'premium'")
-    days: List[Dict[str, Any]] = Field(description="List of day objects with activities")
+    # Sent as YYYY-MM-DD strings (see TOOL_SCHEMA); parsed to dates on ingress
+    start_date: date = Field(description="Start date in YYYY-MM-DD format")
+    end_date: date = Field(description="End date in YYYY-MM-DD format")
+    budget_tier: BudgetTier = Field(default="mid", description="Budget tier: 'budget', 'mid', or 'premium'")
+    days: List[DayPlan] = Field(description="List of day objects with activities")
 
 
 class ActionResult(BaseModel):
@@ -49,10 +122,43 @@ class ActionResult(BaseModel):
     success: bool = Field(description="Whether the action succeeded")
     data: Optional[Dict[str, Any]] = Field(default=None, description="Result data")
     error: Optional[str] = Field(default=None, description="Error message if failed")
+    empty: bool = Field(default=False, description="Whether a successful search found nothing")
+
+    # Results are only ever assembled by the orchestrator from values it
+    # already controls, so these constructors skip validation
+    @classmethod
+    def ok(cls, action: str, data: Dict[str, Any], empty: bool = False) -> "ActionResult":
+        """Build a successful result without validating ``data``."""
+        return cls.model_construct(action=action, success=True, data=data, error=None, empty=empty)
+
+    @classmethod
+    def fail(cls, action: str, error: str) -> "ActionResult":
+        """Build a failed result without validation."""
+        return cls.model_construct(action=action, success=False, data=None, error=error, empty=False)
+
+
+# Tagged union of the action models, discriminated on the ``action`` field.
+# Built once at import: constructing a TypeAdapter compiles a new validator,
+# so it must never happen per request.
+_ACTION_MODELS = (SearchPOIsAction, SearchHotelsAction, FinalizeItineraryAction)
+TravelAction = Annotated[Union[_ACTION_MODELS], Field(discriminator="action")]
+ACTION_ADAPTER: TypeAdapter[TravelAction] = TypeAdapter(TravelAction)
+
+# Action tags, taken from the models so the tool schema cannot drift from them
+ACTION_NAMES = tuple(model.model_fields["action"].default for model in _ACTION_MODELS)
+
+
+def _freeze(value: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
 
 
 # Tool schema for OpenAI function calling
-TOOL_SCHEMA = {
+_TOOL_SCHEMA = {
     "type": "function",
     "function": {
         "name": "execute_travel_action",
@@ -62,7 +168,7 @@ TOOL_SCHEMA = {
             "properties": {
                 "action": {
                     "type": "string",
-                    "enum": ["search_pois", "search_hotels", "finalize_itinerary"],
+                    "enum": list(ACTION_NAMES),
                     "description": "The action to execute"
                 },
                 "city": {
@@ -80,7 +186,7 @@ TOOL_SCHEMA = {
                 },
                 "budget_tier": {
                     "type": "string",
-                    "enum": ["budget", "mid", "premium"],
+                    "enum": list(get_args(BudgetTier)),
                     "description": "Budget tier for hotels or itinerary"
                 },
                 "limit": {
@@ -110,7 +216,7 @@ TOOL_SCHEMA = {
                                     "properties": {
                                         "type": {
                                             "type": "string",
-                                            "enum": ["poi", "hotel", "meal", "transit"]
+                                            "enum": list(get_args(ActivityType))
                                         },
                                         "name": {"type": "string"},
                                         "external_id": {"type": "string"},
@@ -130,4 +236,10 @@ TOOL_SCHEMA = {
             "additionalProperties": False
         }
     }
-}
\ No newline at end of file
+}
+
+# The schema is sent with every completion request: serialize it once here
+# and expose a read-only view so nothing can drift from the cached bytes.
+TOOL_SCHEMA_JSON: bytes = orjson.dumps(_TOOL_SCHEMA)
+TOOL_SCHEMA: Mapping[str, Any] = _freeze(_TOOL_SCHEMA)
+del _TOOL_SCHEMA
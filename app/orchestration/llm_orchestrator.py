@@ -2,19 +2,25 @@
 This is the main orchestration layer that manages LLM calls,
 tool executions and fallbacks, and itinerary creation."""
 
+import asyncio
 import json
 import re
 import logging
-from datetime import datetime, date
-from typing import Dict, Any, List, Optional, Tuple
+from functools import lru_cache
+from datetime import datetime, date, time
+from types import MappingProxyType
+from typing import AsyncIterator, Callable, Dict, Any, Final, List, Mapping, Optional, Tuple, Union
 import httpx
+import orjson
+from pydantic import ValidationError
 from sqlalchemy.orm import Session as DBSession
 
 from app.config import Settings
+from app.db.models import uuid7
 from app.orchestration.spend_cap import SpendCapManager
 from app.orchestration.actions_schema import (
     SearchPOIsAction, SearchHotelsAction, FinalizeItineraryAction,
-    ActionResult, TOOL_SCHEMA
+    ActionResult, ACTION_ADAPTER, TOOL_SCHEMA_JSON, TravelAction
 )
 from app.providers.opentripmap_client import OpenTripMapClient
 from app.providers.hotels.static_stub import StaticStubHotelProvider
@@ -26,20 +32,293 @@ from app.utils.tokens import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
+# Pre-serialized "tools" array, spliced verbatim into each request body
+_TOOLS_FRAGMENT = orjson.Fragment(b"[" + TOOL_SCHEMA_JSON + b"]")
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Static system prompt. It is always the first message and never varies, so
+# together with the fixed tool schema it forms an identical request prefix
+# that OpenAI's automatic prompt caching can reuse across sessions. Anything
+# per-request (form context, history) must come after it.
+_SYSTEM_PROMPT: Final[str] = """You are a helpful travel assistant that creates personalized city trip itineraries. 
+
+Your capabilities:
+- Search for points of interest (POIs) using search_pois action (this may return no results from APIs)
+- Search for hotels using search_hotels action  
+- Create and save complete itineraries using finalize_itinerary action
+
+CRITICAL: You have extensive knowledge of major destinations. When API tools return no POI results, DO NOT STOP - instead, use your own knowledge to create excellent itineraries with famous attractions!
+
+Guidelines:
+- Always be helpful and enthusiastic about travel planning
+- Ask clarifying questions if destination, dates, or budget are unclear
+- Try using tools first, but don't let API failures stop you from creating great itineraries
+- ALWAYS create detailed day-by-day itineraries, whether you get API data or not
+- Use your extensive knowledge of popular destinations when APIs fail
+- Consider the budget tier when making recommendations (budget/mid/premium)
+- Include a mix of must-see attractions, local experiences, and practical information
+- Always finalize the itinerary at the end so the user can export it
+
+Budget tiers:
+- Budget: Focus on free activities, budget accommodations (under €80/night), local food
+- Mid: Mix of paid attractions, mid-range hotels (€80-150/night), good restaurants  
+- Premium: High-end experiences, luxury hotels (€150+/night), fine dining
+
+When creating itineraries:
+1. Try search_pois to find attractions (but continue even if it returns no results)
+2. Try search_hotels to find accommodations (but continue even if it returns no results)
+3. Use your knowledge to create excellent recommendations with famous attractions and experiences
+4. Organize into a logical day-by-day structure
+5. Always use finalize_itinerary to save the complete plan
+
+Your knowledge includes major attractions for popular destinations:
+- Rome: Colosseum, Vatican City, Trevi Fountain, Spanish Steps, Pantheon, Roman Forum, Castel Sant'Angelo
+- Paris: Eiffel Tower, Louvre, Notre-Dame, Arc de Triomphe, Champs-Élysées, Montmartre, Musée d'Orsay
+- London: Big Ben, Tower of London, British Museum, Buckingham Palace, London Eye, Westminster Abbey
+- Barcelona: Sagrada Familia, Park Güell, Las Ramblas, Gothic Quarter, Casa Batlló
+- Amsterdam: Anne Frank House, Van Gogh Museum, Rijksmuseum, Jordaan District, Red Light District
+- And many more for other cities worldwide!
+
+IMPORTANT: Never say you "can't find POIs" and then stop. Always proceed to create itineraries using your knowledge!
+
+Keep responses engaging and informative. Focus on creating memorable travel experiences!"""
+
+
+def create_openai_client(settings: Settings) -> httpx.AsyncClient:
+    """Create a pooled async HTTP client for the OpenAI API.
+    Args:
+        settings (Settings): Application settings with the API credentials.
+    Returns:
+        httpx.AsyncClient: Client with auth headers and connection pooling set up.
+    """
+    headers = {"Authorization": f"Bearer {settings.openai_api_key}"}
+    # Optional org/project headers for scoped keys
+    if getattr(settings, "openai_organization", None):
+        headers["OpenAI-Organization"] = settings.openai_organization  # type: ignore
+    if getattr(settings, "openai_project", None):
+        headers["OpenAI-Project"] = settings.openai_project  # type: ignore
+
+    return httpx.AsyncClient(
+        base_url="https://api.openai.com/v1",
+        headers=headers,
+        timeout=httpx.Timeout(60.0),
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+    )
+
+
+@lru_cache(maxsize=None)
+def _llm_semaphore(limit: int) -> asyncio.Semaphore:
+    """Get the process-wide semaphore bounding in-flight OpenAI requests.
+    Orchestrators are created per request, so the semaphore lives at module
+    level and is shared by every orchestrator configured with the same limit.
+    Args:
+        limit (int): Maximum number of concurrent requests.
+    Returns:
+        asyncio.Semaphore: The shared semaphore for that limit.
+    """
+    return asyncio.Semaphore(limit)
+
+
+# "[...action...]" tag that introduces a pseudo tool call in plain text
+_PSEUDO_ACTION_TAG_RE = re.compile(r"\[[^\]]*action[^\]]*\]", re.IGNORECASE)
+_JSON_DECODER = json.JSONDecoder()
+
+def _may_contain_pseudo_call(content: str) -> bool:
+    """Cheap pre-check for a pseudo tool call: it needs a JSON object and an action tag."""
+    return "{" in content and "action" in content.lower()
+
+
+# Completion length requested from the model, also used for spend projections
+_MAX_COMPLETION_TOKENS: Final[int] = 1500
+_STREAM_OPTIONS: Final[Dict[str, bool]] = {"include_usage": True}
+
+# Canned assistant replies for failed turns, with their token estimates
+_LLM_ERROR_MSG: Final[str] = "I encountered an error processing your request. Please try again."
+_LLM_ERROR_TOKENS: Final[int] = estimate_tokens(_LLM_ERROR_MSG)
+_UNEXPECTED_ERROR_MSG: Final[str] = "I encountered an unexpected error. Please try again."
+_UNEXPECTED_ERROR_TOKENS: Final[int] = estimate_tokens(_UNEXPECTED_ERROR_MSG)
+
+def _parse_time(value: Optional[str]) -> Optional[time]:
+    """Parse an LLM-supplied HH:MM time, dropping values that aren't valid times."""
+    if not value:
+        return None
+    try:
+        return time.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _message_row(session_id: str, role: str, content: str, **fields: Any) -> Dict[str, Any]:
+    """Build the column values for one chat message, timestamped now."""
+    return {
+        "session_id": session_id,
+        "role": role,
+        "content": content,
+        "created_at": datetime.utcnow(),
+        **fields,
+    }
+
+
+# Common POI categories the LLM uses, mapped to OpenTripMap kinds
+_CATEGORY_TO_KINDS: Final[Dict[str, str]] = {
+    "museums": "museums",
+    "historic": "historic",
+    "restaurants": "foods",
+    "parks": "natural",
+    "attractions": "tourist_facilities",
+    "shopping": "shops",
+    "entertainment": "entertainment",
+}
+
+# Simplified city coordinate lookup for demo only
+# TODO: Integrate with a geocoding API for real data
+_CITY_COORDS: Mapping[str, Mapping[str, float]] = MappingProxyType({
+    name: MappingProxyType({"lat": lat, "lon": lon})
+    for name, (lat, lon) in {
+        "athens": (37.9755, 23.7348),
+        "paris": (48.8566, 2.3522),
+        "london": (51.5074, -0.1278),
+        "rome": (41.9028, 12.4964),
+        "madrid": (40.4168, -3.7038),
+        "berlin": (52.5200, 13.4050),
+        "amsterdam": (52.3676, 4.9041),
+        "prague": (50.0755, 14.4378),
+        "vienna": (48.2082, 16.3738),
+        "barcelona": (41.3851, 2.1734),
+    }.items()
+})
+
+
+@lru_cache(maxsize=512)
+def _lookup_city_coordinates(city_key: str) -> Optional[Mapping[str, float]]:
+    """Resolve a normalized (stripped, lowercased) city name to coordinates.
+
+    The table and its entries are read-only, so the shared mappings handed
+    out here can't be altered by a caller.
+
+    Memoized per process so repeat destinations skip the lookup; this is
+    also where a slower geocoding backend would slot in.
+    """
+    return _CITY_COORDS.get(city_key)
+
+
+@lru_cache(maxsize=256)
+def _format_form_context(destination: Optional[str],
+                         start_date: Optional[str],
+                         end_date: Optional[str],
+                         budget_tier: Optional[str],
+                        ) -> Optional[str]:
+    """Format the travel form fields as a system message.
+    Cached because a session usually resends the same form on every turn;
+    identical fields always produce identical text.
+    Args:
+        destination (Optional[str]): Destination city.
+        start_date (Optional[str]): Start date in YYYY-MM-DD format.
+        end_date (Optional[str]): End date in YYYY-MM-DD format.
+        budget_tier (Optional[str]): Budget tier: 'budget', 'mid', or 'premium'.
+    Returns:
+        Optional[str]: The context message, or None if no field is set.
+    """
+    context_parts = tuple(filter(None, (
+        destination and f"Destination: {destination}",
+        start_date and end_date and f"Travel dates: {start_date} to {end_date}",
+        budget_tier and f"Budget tier: {budget_tier}",
+    )))
+    if not context_parts:
+        return None
+    return "Travel planning context:\n" + "\n".join(context_parts)
+
+
+# Tool-result messages, one formatter per action: the summary handed to the
+# LLM for a follow-up call, and the reply shown to the user
+_POI_SUMMARY: Final[str] = "Found {count} POIs in {city} from external data."
+_POI_SUMMARY_EMPTY: Final[str] = (
+    "POI search for {city} returned no results from external APIs, "
+    "but I have extensive knowledge of {city}'s attractions."
+)
+_HOTEL_SUMMARY: Final[str] = "Found {count} {tier}-tier hotels in {city}."
+_HOTEL_SUMMARY_EMPTY: Final[str] = (
+    "Hotel search for {city} returned no results, "
+    "but I can recommend excellent {tier}-tier accommodations."
+)
+_POI_RESPONSE: Final[str] = (
+    "🏛️ Found {count} interesting places in {city}! "
+    "I'll include the best ones in your itinerary."
+)
+_HOTEL_RESPONSE: Final[str] = (
+    "🏨 Found {count} {tier}-range hotels in {city}! "
+    "I'll recommend the best options for your stay."
+)
+_HOTEL_RESPONSE_EMPTY: Final[str] = (
+    "I'll provide excellent hotel recommendations for {city} based on your {tier} budget."
+)
+_FINALIZE_RESPONSE: Final[str] = (
+    "✅ Perfect! I've created your {days}-day itinerary for {city}! "
+    "You can export it as JSON using the link below or continue chatting to refine it."
+)
+
+
+def _summarize_pois(data: Dict[str, Any]) -> str:
+    count, city = data.get("count", 0), data.get("city", "")
+    template = _POI_SUMMARY if count else _POI_SUMMARY_EMPTY
+    return template.format(count=count, city=city)
+
+
+def _summarize_hotels(data: Dict[str, Any]) -> str:
+    count = data.get("count", 0)
+    template = _HOTEL_SUMMARY if count else _HOTEL_SUMMARY_EMPTY
+    return template.format(count=count, tier=data.get("budget_tier", "mid"), city=data.get("city", ""))
+
+
+def _respond_pois(data: Dict[str, Any]) -> Optional[str]:
+    count = data.get("count", 0)
+    if not count:
+        return None
+    return _POI_RESPONSE.format(count=count, city=data.get("city", ""))
+
+
+def _respond_hotels(data: Dict[str, Any]) -> str:
+    count = data.get("count", 0)
+    template = _HOTEL_RESPONSE if count else _HOTEL_RESPONSE_EMPTY
+    return template.format(count=count, tier=data.get("budget_tier", "mid"), city=data.get("city", ""))
+
+
+def _respond_finalize(data: Dict[str, Any]) -> str:
+    return _FINALIZE_RESPONSE.format(days=data.get("days_count", 0), city=data.get("city", ""))
+
+
+_SUMMARY_FORMATTERS: Final[Dict[str, Callable[[Dict[str, Any]], str]]] = {
+    "search_pois": _summarize_pois,
+    "search_hotels": _summarize_hotels,
+}
+# A formatter returning None adds nothing to the reply
+_RESPONSE_FORMATTERS: Final[Dict[str, Callable[[Dict[str, Any]], Optional[str]]]] = {
+    "search_pois": _respond_pois,
+    "search_hotels": _respond_hotels,
+    "finalize_itinerary": _respond_finalize,
+}
+
+
 class LLMOrchestrator:
     """Orchestrates LLM calls and tool actions for travel planning."""
     
-    def __init__(self, settings: Settings, db: DBSession):
+    def __init__(self,
+                 settings: Settings,
+                 db: DBSession,
+                 openai_client: Optional[httpx.AsyncClient] = None,
+                 opentripmap_client: Optional[httpx.AsyncClient] = None,
+                 rapidapi_client: Optional[httpx.AsyncClient] = None,
+                ):
         self.settings = settings
         self.db = db
         self.spend_cap = SpendCapManager(settings, db)
         
         # Initialize providers
-        self.opentripmap = OpenTripMapClient(settings, db)
+        self.opentripmap = OpenTripMapClient(settings, db, http_client=opentripmap_client)
         
         # Hotel provider selection
         if settings.rapidapi_hotels_enabled and settings.rapidapi_key:
-            self.hotel_provider = RapidAPIHotelProvider(settings, db)
+            self.hotel_provider = RapidAPIHotelProvider(settings, db, http_client=rapidapi_client)
         else:
             self.hotel_provider = StaticStubHotelProvider(db)
         
@@ -48,19 +327,23 @@ class LLMOrchestrator:
         self.message_repo = MessageRepository(db)
         self.itinerary_repo = ItineraryRepository(db)
         
-        # OpenAI client
-        headers = {"Authorization": f"Bearer {settings.openai_api_key}"}
-        # Optional org/project headers for scoped keys
-        if getattr(settings, "openai_organization", None):
-            headers["OpenAI-Organization"] = settings.openai_organization  # type: ignore
-        if getattr(settings, "openai_project", None):
-            headers["OpenAI-Project"] = settings.openai_project  # type: ignore
-
-        self.openai_client = httpx.Client(
-            base_url="https://api.openai.com/v1",
-            headers=headers,
-            timeout=60.0
-        )
+        # OpenAI client: reuse the app-wide pooled client when one is given,
+        # otherwise create (and later close) a private one
+        self._owns_openai_client = openai_client is None
+        self.openai_client = openai_client or create_openai_client(settings)
+        self._llm_sem = _llm_semaphore(settings.openai_concurrency)
+        
+        # Completion parameters shared by every request; each call only adds
+        # its messages. The follow-up call keeps the tool schema and just
+        # disables tool use, so both requests share the same cacheable prefix.
+        self._base_request: Dict[str, Any] = {
+            "model": settings.openai_model,
+            "tools": _TOOLS_FRAGMENT,
+            "tool_choice": "auto",
+            "temperature": 0.7,
+            "max_tokens": _MAX_COMPLETION_TOKENS,
+        }
+        self._base_request_no_tools: Dict[str, Any] = {**self._base_request, "tool_choice": "none"}
     
     async def process_chat_message(self,
                                     session_id: str,
@@ -83,59 +366,47 @@ class LLMOrchestrator:
         Returns:
             Dict with keys: 'response', 'success', 'spend_capped', 'itinerary_id'
         """
-        # Check spend cap
-        if self.spend_cap.is_spend_cap_exceeded():
-            fallback_response = self.spend_cap.get_fallback_response()
-            # Store the user message and fallback response
-            self.message_repo.create_message(
-                session_id,
-                "user",
-                user_message,
-                tokens_in=estimate_tokens(user_message),
-            )
-            self.message_repo.create_message(
-                session_id,
-                "assistant",
-                fallback_response,
-                tokens_out=estimate_tokens(fallback_response),
-            )
-            
-            return {
-                "response": fallback_response,
-                "success": False,
-                "spend_capped": True,
-                "itinerary_id": None
-            }
+        # The user's message and the reply are written together in one
+        # transaction at the end of the turn; created_at is set explicitly so
+        # the pair keeps its order
+        user_row = _message_row(
+            session_id, "user", user_message, tokens_in=estimate_tokens(user_message)
+        )
         
         try:
-            # Store user message with estimated input tokens for display
-            self.message_repo.create_message(
-                session_id,
-                "user",
-                user_message,
-                tokens_in=estimate_tokens(user_message),
-            )
+            # Get conversation history once per turn; the new message is not
+            # stored yet, so it isn't included twice
+            history = self.message_repo.get_recent_history(session_id, limit=10)
             
-            # Get conversation history
             messages = self._build_conversation_context(
-                session_id, user_message, destination, start_date, end_date, budget_tier
+                history, user_message, destination, start_date, end_date, budget_tier
             )
             
-            # Make LLM call (pass form context so fallback preserves it)
+            if not self._spend_cap_allows(messages):
+                fallback_response = await self._store_spend_capped_turn(user_row, session_id)
+                return {
+                    "response": fallback_response,
+                    "success": False,
+                    "spend_capped": True,
+                    "itinerary_id": None
+                }
+            
+            # Make LLM call (the form context is already in messages)
             response = await self._call_llm_with_tools(
                 messages,
                 session_id,
-                destination=destination,
-                start_date=start_date,
-                end_date=end_date,
                 budget_tier=budget_tier,
             )
             
             if not response["success"]:
-                error_msg = "I encountered an error processing your request. Please try again."
-                self.message_repo.create_message(session_id, "assistant", error_msg)
+                await self._store_messages([
+                    user_row,
+                    _message_row(
+                        session_id, "assistant", _LLM_ERROR_MSG, tokens_out=_LLM_ERROR_TOKENS
+                    ),
+                ])
                 return {
-                    "response": error_msg,
+                    "response": _LLM_ERROR_MSG,
                     "success": False,
                     "spend_capped": False,
                     "itinerary_id": None
@@ -144,15 +415,18 @@ class LLMOrchestrator:
             assistant_message = response["content"]
             itinerary_id = response.get("itinerary_id")
             
-            # Store assistant message
-            self.message_repo.create_message(
-                session_id=session_id,
-                role="assistant",
-                content=assistant_message,
-                tokens_in=response.get("prompt_tokens"),
-                tokens_out=response.get("completion_tokens"),
-                cost_usd=response.get("cost_usd"),
-            )
+            # Store user and assistant messages
+            await self._store_messages([
+                user_row,
+                _message_row(
+                    session_id,
+                    "assistant",
+                    assistant_message,
+                    tokens_in=response.get("prompt_tokens"),
+                    tokens_out=response.get("completion_tokens"),
+                    cost_usd=response.get("cost_usd"),
+                ),
+            ])
             
             return {
                 "response": assistant_message,
@@ -163,27 +437,164 @@ class LLMOrchestrator:
             
         except Exception as e:
             logger.error(f"Error processing chat message: {e}")
-            error_msg = "I encountered an unexpected error. Please try again."
-            
             try:
-                self.message_repo.create_message(
-                    session_id,
-                    "assistant",
-                    error_msg,
-                    tokens_out=estimate_tokens(error_msg),
-                )
+                self.db.rollback()
+                await self._store_messages([
+                    user_row,
+                    _message_row(
+                        session_id,
+                        "assistant",
+                        _UNEXPECTED_ERROR_MSG,
+                        tokens_out=_UNEXPECTED_ERROR_TOKENS,
+                    ),
+                ])
             except Exception:
                 pass  # Don't fail if we can't store the error message
             
             return {
-                "response": error_msg,
+                "response": _UNEXPECTED_ERROR_MSG,
                 "success": False,
                 "spend_capped": False,
                 "itinerary_id": None
             }
     
+    async def stream_chat_message(self,
+                                  session_id: str,
+                                  user_message: str,
+                                  destination: Optional[str] = None,
+                                  start_date: Optional[str] = None,
+                                  end_date: Optional[str] = None,
+                                  budget_tier: Optional[str] = None,
+                                  result: Optional[Dict[str, Any]] = None,
+                                ) -> AsyncIterator[str]:
+        """
+        Process a chat message, yielding the assistant's reply as it arrives.
+        Same turn handling as process_chat_message, but text deltas are passed
+        on as soon as OpenAI sends them. Tool results are yielded once the
+        tool calls have run. The turn is stored when the reply is complete,
+        and the streamed text adds up to the stored reply.
+        Args:
+            session_id (str): User session ID.
+            user_message (str): Message from the user.
+            destination (Optional[str]): Destination city.
+            start_date (Optional[str]): Start date in YYYY-MM-DD format.
+            end_date (Optional[str]): End date in YYYY-MM-DD format.
+            budget_tier (Optional[str]): Budget tier: 'budget', 'mid', or 'premium'.
+            result (Optional[Dict[str, Any]]): Filled with 'success',
+                'spend_capped' and 'itinerary_id' once the stream ends.
+        Yields:
+            str: Chunks of the assistant's reply.
+        """
+        if result is None:
+            result = {}
+        result.update(success=False, spend_capped=False, itinerary_id=None)
+        user_row = _message_row(
+            session_id, "user", user_message, tokens_in=estimate_tokens(user_message)
+        )
+        
+        try:
+            history = self.message_repo.get_recent_history(session_id, limit=10)
+            messages = self._build_conversation_context(
+                history, user_message, destination, start_date, end_date, budget_tier
+            )
+            
+            if not self._spend_cap_allows(messages):
+                result["spend_capped"] = True
+                yield await self._store_spend_capped_turn(user_row, session_id)
+                return
+            
+            # Filled in by the stream once the reply is complete
+            response: Dict[str, Any] = {}
+            async for chunk in self._stream_llm_with_tools(
+                messages, session_id, response, budget_tier=budget_tier
+            ):
+                yield chunk
+            
+            if not response.get("success"):
+                await self._store_messages([
+                    user_row,
+                    _message_row(
+                        session_id, "assistant", _LLM_ERROR_MSG, tokens_out=_LLM_ERROR_TOKENS
+                    ),
+                ])
+                yield _LLM_ERROR_MSG
+                return
+            
+            await self._store_messages([
+                user_row,
+                _message_row(
+                    session_id,
+                    "assistant",
+                    response["content"],
+                    tokens_in=response.get("prompt_tokens"),
+                    tokens_out=response.get("completion_tokens"),
+                    cost_usd=response.get("cost_usd"),
+                ),
+            ])
+            result.update(success=True, itinerary_id=response.get("itinerary_id"))
+            
+        except Exception as e:
+            logger.error(f"Error streaming chat message: {e}")
+            try:
+                self.db.rollback()
+                await self._store_messages([
+                    user_row,
+                    _message_row(
+                        session_id,
+                        "assistant",
+                        _UNEXPECTED_ERROR_MSG,
+                        tokens_out=_UNEXPECTED_ERROR_TOKENS,
+                    ),
+                ])
+            except Exception:
+                pass  # Don't fail if we can't store the error message
+            yield _UNEXPECTED_ERROR_MSG
+    
+    def _spend_cap_allows(self, messages: List[Dict[str, str]]) -> bool:
+        """Check the spend cap before calling out.
+        Refuses when the cap is already reached or when this prompt plus a
+        full-length reply would cross it.
+        Args:
+            messages (List[Dict[str, str]]): Conversation messages about to be sent.
+        Returns:
+            bool: True if the LLM call may be made.
+        """
+        prompt_tokens_estimate = sum(estimate_tokens(m["content"]) for m in messages)
+        return self.spend_cap.can_make_call(
+            self.settings.openai_model, prompt_tokens_estimate, _MAX_COMPLETION_TOKENS
+        )
+    
+    async def _store_messages(self, rows: List[Dict[str, Any]]) -> None:
+        """Write a turn's message rows without blocking the event loop.
+        The insert and commit run in a worker thread; callers await it, so
+        the session is still only used by one thread at a time.
+        Args:
+            rows (List[Dict[str, Any]]): Message rows from _message_row.
+        """
+        await asyncio.to_thread(self.message_repo.create_messages, rows)
+    
+    async def _store_spend_capped_turn(self, user_row: Dict[str, Any], session_id: str) -> str:
+        """Store the user message with the spend-cap fallback reply.
+        Args:
+            user_row (Dict[str, Any]): The pending user message row.
+            session_id (str): User session ID.
+        Returns:
+            str: The fallback reply.
+        """
+        fallback_response = self.spend_cap.get_fallback_response()
+        await self._store_messages([
+            user_row,
+            _message_row(
+                session_id,
+                "assistant",
+                fallback_response,
+                tokens_out=estimate_tokens(fallback_response),
+            ),
+        ])
+        return fallback_response
+    
     def _build_conversation_context(self,
-                                    session_id: str,
+                                    history: List[Tuple[str, str]],
                                     current_message: str,
                                     destination: Optional[str] = None,
                                     start_date: Optional[str] = None,
@@ -192,7 +603,7 @@ class LLMOrchestrator:
                                 ) -> List[Dict[str, str]]:
         """Build conversation context for LLM.
         Args:
-            session_id (str): User session ID.
+            history (List[Tuple[str, str]]): Earlier (role, content) turns, oldest first.
             current_message (str): Message from the user.
             destination (Optional[str]): Destination city.
             start_date (Optional[str]): Start date in YYYY-MM-DD format.
@@ -207,23 +618,12 @@ class LLMOrchestrator:
         messages = [{"role": "system", "content": system_prompt}]
         
         # Add context from form if provided
-        context_parts = []
-        if destination:
-            context_parts.append(f"Destination: {destination}")
-        if start_date and end_date:
-            context_parts.append(f"Travel dates: {start_date} to {end_date}")
-        if budget_tier:
-            context_parts.append(f"Budget tier: {budget_tier}")
-        
-        if context_parts:
-            context_message = "Travel planning context:\n" + "\n".join(context_parts)
+        context_message = _format_form_context(destination, start_date, end_date, budget_tier)
+        if context_message:
             messages.append({"role": "system", "content": context_message})
         
-        # Add recent conversation history (last 10 messages)
-        recent_messages = self.message_repo.get_recent_messages(session_id, limit=10)
-        for msg in reversed(recent_messages):  # Reverse to get chronological order
-            if msg.role in ["user", "assistant"]:
-                messages.append({"role": msg.role, "content": msg.content})
+        # Add recent conversation history
+        messages.extend({"role": role, "content": content} for role, content in history)
         
         # Finally add current message
         messages.append({"role": "user", "content": current_message})
@@ -232,81 +632,36 @@ class LLMOrchestrator:
     
     def _get_system_prompt(self) -> str:
         """Get the system prompt for the travel assistant."""
-        return """You are a helpful travel assistant that creates personalized city trip itineraries. 
-
-Your capabilities:
-- Search for points of interest (POIs) using search_pois action (this may return no results from APIs)
-- Search for hotels using search_hotels action  
-- Create and save complete itineraries using finalize_itinerary action
-
-CRITICAL: You have extensive knowledge of major destinations. When API tools return no POI results, DO NOT STOP - instead, use your own knowledge to create excellent itineraries with famous attractions!
-
-Guidelines:
-- Always be helpful and enthusiastic about travel planning
-- Ask clarifying questions if destination, dates, or budget are unclear
-- Try using tools first, but don't let API failures stop you from creating great itineraries
-- ALWAYS create detailed day-by-day itineraries, whether you get API data or not
-- Use your extensive knowledge of popular destinations when APIs fail
-- Consider the budget tier when making recommendations (budget/mid/premium)
-- Include a mix of must-see attractions, local experiences, and practical information
-- Always finalize the itinerary at the end so the user can export it
-
-Budget tiers:
-- Budget: Focus on free activities, budget accommodations (under €80/night), local food
-- Mid: Mix of paid attractions, mid-range hotels (€80-150/night), good restaurants  
-- Premium: High-end experiences, luxury hotels (€150+/night), fine dining
-
-When creating itineraries:
-1. Try search_pois to find attractions (but continue even if it returns no results)
-2. Try search_hotels to find accommodations (but continue even if it returns no results)
-3. Use your knowledge to create excellent recommendations with famous attractions and experiences
-4. Organize into a logical day-by-day structure
-5. Always use finalize_itinerary to save the complete plan
-
-Your knowledge includes major attractions for popular destinations:
-- Rome: Colosseum, Vatican City, Trevi Fountain, Spanish Steps, Pantheon, Roman Forum, Castel Sant'Angelo
-- Paris: Eiffel Tower, Louvre, Notre-Dame, Arc de Triomphe, Champs-Élysées, Montmartre, Musée d'Orsay
-- London: Big Ben, Tower of London, British Museum, Buckingham Palace, London Eye, Westminster Abbey
-- Barcelona: Sagrada Familia, Park Güell, Las Ramblas, Gothic Quarter, Casa Batlló
-- Amsterdam: Anne Frank House, Van Gogh Museum, Rijksmuseum, Jordaan District, Red Light District
-- And many more for other cities worldwide!
-
-IMPORTANT: Never say you "can't find POIs" and then stop. Always proceed to create itineraries using your knowledge!
-
-Keep responses engaging and informative. Focus on creating memorable travel experiences!"""
+        return _SYSTEM_PROMPT
     
     async def _call_llm_with_tools(self,
                                     messages: List[Dict[str, str]],
                                     session_id: str,
                                     *,
-                                    destination: Optional[str] = None,
-                                    start_date: Optional[str] = None,
-                                    end_date: Optional[str] = None,
                                     budget_tier: Optional[str] = None,
                                 ) -> Dict[str, Any]:
         """Make LLM call with tool support.
         messages (List[Dict[str, str]]): Conversation messages.
         session_id (str): User session ID.
+        budget_tier (Optional[str]): Budget tier for a follow-up hotel search.
         Returns:
             Dict[str, Any]: LLM response with content and usage info.
         """
         
         try:
             # Prepare request
-            request_data = {
-                "model": self.settings.openai_model,
-                "messages": messages,
-                "tools": [TOOL_SCHEMA],
-                "tool_choice": "auto",
-                "temperature": 0.7,
-                "max_tokens": 1500,
-            }
+            request_data = {**self._base_request, "messages": messages}
             
             # Make API call
-            response = self.openai_client.post("/chat/completions", json=request_data)
+            async with self._llm_sem:
+                response = await self.openai_client.post(
+                    "/chat/completions",
+                    content=orjson.dumps(request_data),
+                    headers=_JSON_HEADERS,
+                )
             response.raise_for_status()
             
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # Extract usage info
             usage = data.get("usage", {})
@@ -336,9 +691,7 @@ Keep responses engaging and informative. Focus on creating memorable travel expe
                     session_id,
                     prompt_tokens,
                     completion_tokens,
-                    destination=destination,
-                    start_date=start_date,
-                    end_date=end_date,
+                    messages=messages,
                     budget_tier=budget_tier,
                 )
 
@@ -349,13 +702,17 @@ Keep responses engaging and informative. Focus on creating memorable travel expe
                     result["content"] = combined
                 return result
             
-            # Some models may emit a pseudo tool call in plain text instead of tool_calls
+            content = message.get("content") or ""
+            
+            # Some models may emit a pseudo tool call in plain text instead of
+            # tool_calls; only replies that could hold one are parsed
             pseudo_calls = None
             preface_text = ""
-            try:
-                pseudo_calls, preface_text = self._parse_pseudo_tool_calls(message.get("content") or "")
-            except Exception:
-                pseudo_calls = None
+            if _may_contain_pseudo_call(content):
+                try:
+                    pseudo_calls, preface_text = self._parse_pseudo_tool_calls(content)
+                except Exception:
+                    pseudo_calls = None
 
             if pseudo_calls:
                 result = await self._handle_tool_calls(
@@ -363,9 +720,7 @@ Keep responses engaging and informative. Focus on creating memorable travel expe
                     session_id,
                     prompt_tokens,
                     completion_tokens,
-                    destination=destination,
-                    start_date=start_date,
-                    end_date=end_date,
+                    messages=messages,
                     budget_tier=budget_tier,
                 )
                 # Preserve any friendly preface the model wrote before the tool call
@@ -379,7 +734,7 @@ Keep responses engaging and informative. Focus on creating memorable travel expe
             # Regular response when there are no tools involved
             return {
                 "success": True,
-                "content": message.get("content", ""),
+                "content": content,
                 "prompt_tokens": prompt_tokens,
                 "completion_tokens": completion_tokens,
             }
@@ -399,15 +754,152 @@ Keep responses engaging and informative. Focus on creating memorable travel expe
             logger.error(f"Unexpected error in LLM call: {e}")
             return {"success": False, "error": str(e)}
     
+    async def _stream_llm_with_tools(self,
+                                     messages: List[Dict[str, str]],
+                                     session_id: str,
+                                     response: Dict[str, Any],
+                                     *,
+                                     budget_tier: Optional[str] = None,
+                                ) -> AsyncIterator[str]:
+        """Streaming variant of _call_llm_with_tools.
+        Text deltas are yielded as they arrive. Tool-call deltas are buffered
+        until the stream ends and then handled as in the non-streaming path.
+        A pseudo tool call starts with its "[...action...]" tag, so from the
+        first "[" on the text is held back until the stream ends: the preface
+        is then sent and the raw call dropped, exactly as it is stored.
+        Args:
+            messages (List[Dict[str, str]]): Conversation messages.
+            session_id (str): User session ID.
+            response (Dict[str, Any]): Filled with the same keys that
+                _call_llm_with_tools returns once the reply is complete.
+            budget_tier (Optional[str]): Budget tier for a follow-up hotel search.
+        Yields:
+            str: Chunks of the assistant's reply.
+        """
+        response["success"] = False
+        try:
+            request_data = {
+                **self._base_request,
+                "messages": messages,
+                "stream": True,
+                # Usage arrives in a final chunk with no choices
+                "stream_options": _STREAM_OPTIONS,
+            }
+            
+            content_parts: List[str] = []
+            # Length of the text already yielded; None while nothing is held back
+            sent: Optional[int] = None
+            # Tool calls arrive in fragments keyed by their index
+            tool_calls: Dict[int, Dict[str, Any]] = {}
+            prompt_tokens = 0
+            completion_tokens = 0
+            
+            async with self._llm_sem, self.openai_client.stream(
+                "POST",
+                "/chat/completions",
+                content=orjson.dumps(request_data),
+                headers=_JSON_HEADERS,
+            ) as stream:
+                stream.raise_for_status()
+                async for line in stream.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    payload = line[5:].strip()
+                    if payload == "[DONE]":
+                        break
+                    chunk = orjson.loads(payload)
+                    
+                    usage = chunk.get("usage")
+                    if usage:
+                        prompt_tokens = usage.get("prompt_tokens", 0)
+                        completion_tokens = usage.get("completion_tokens", 0)
+                    
+                    for choice in chunk.get("choices") or ():
+                        delta = choice.get("delta") or {}
+                        text = delta.get("content")
+                        if text and sent is None:
+                            bracket = text.find("[")
+                            if bracket == -1:
+                                yield text
+                            else:
+                                # Could be the start of a pseudo tool call
+                                sent = sum(map(len, content_parts)) + bracket
+                                if bracket:
+                                    yield text[:bracket]
+                        if text:
+                            content_parts.append(text)
+                        for fragment in delta.get("tool_calls") or ():
+                            call = tool_calls.setdefault(
+                                fragment.get("index", 0),
+                                {"function": {"name": "", "arguments": ""}},
+                            )
+                            function = fragment.get("function") or {}
+                            call["function"]["name"] += function.get("name") or ""
+                            call["function"]["arguments"] += function.get("arguments") or ""
+            
+            self.spend_cap.record_llm_call(
+                session_id=session_id,
+                model=self.settings.openai_model,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+            )
+            
+            content = "".join(content_parts)
+            preface_text = content
+            calls = [tool_calls[i] for i in sorted(tool_calls)]
+            if not calls and _may_contain_pseudo_call(content):
+                # Some models may emit a pseudo tool call in plain text instead of tool_calls
+                try:
+                    calls, preface_text = self._parse_pseudo_tool_calls(content)
+                except Exception:
+                    calls = None
+            
+            if not calls:
+                if sent is not None and content[sent:]:
+                    yield content[sent:]
+                response.update(
+                    success=True,
+                    content=content,
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                )
+                return
+            
+            # Send the rest of the preface; the pseudo call itself never goes out
+            if sent is not None and preface_text[sent:]:
+                yield preface_text[sent:]
+            
+            result = await self._handle_tool_calls(
+                calls,
+                session_id,
+                prompt_tokens,
+                completion_tokens,
+                messages=messages,
+                budget_tier=budget_tier,
+            )
+            # The preface has been sent as is, so the stored reply keeps it
+            # unstripped and matches the streamed text
+            tool_content = result.get("content") or ""
+            if tool_content and preface_text.strip():
+                tool_content = "\n\n" + tool_content
+            if tool_content:
+                yield tool_content
+            response.update(result, content=preface_text + tool_content)
+            
+        except httpx.HTTPError as e:
+            logger.error(f"OpenAI API error: {e}")
+            response["error"] = str(e)
+        except Exception as e:
+            logger.error(f"Unexpected error in streamed LLM call: {e}")
+            response["error"] = str(e)
+    
     async def _handle_tool_calls(self,
                                 tool_calls: List[Dict[str, Any]],
                                 session_id: str,
                                 prompt_tokens: int,
                                 completion_tokens: int,
                                 *,
-                                destination: Optional[str] = None,
-                                start_date: Optional[str] = None,
-                                end_date: Optional[str] = None,
+                                messages: Optional[List[Dict[str, str]]] = None,
                                 budget_tier: Optional[str] = None,
                             ) -> Dict[str, Any]:
         """Handle tool calls from LLM. Called by _call_llm_with_tools.
@@ -418,46 +910,58 @@ Keep responses engaging and informative. Focus on creating memorable travel expe
             session_id (str): The session ID for tracking.
             prompt_tokens (int): Number of prompt tokens used.
             completion_tokens (int): Number of completion tokens used.
+            messages (Optional[List[Dict[str, str]]]): The conversation sent with
+                the original request, reused for the follow-up call.
+            budget_tier (Optional[str]): Budget tier for a follow-up hotel search.
         Returns:
             Dict[str, Any]: The response from handling tool calls.
         """
         
-        results = []
         itinerary_id = None
         finalize_city: Optional[str] = None
         finalize_country: Optional[str] = None
         
-        for tool_call in tool_calls:
-            if tool_call["function"]["name"] == "execute_travel_action":
-                try:
-                    args = json.loads(tool_call["function"]["arguments"])
-                    result = await self._execute_action(args, session_id)
-                    results.append(result)
-                    
-                    # Check if this was a finalize_itinerary action
-                    if result.action == "finalize_itinerary" and result.success:
-                        itinerary_id = result.data.get("itinerary_id")
-                        # Capture city/country for potential follow-up hotel search
-                        finalize_city = result.data.get("city")
-                        finalize_country = result.data.get("country")
-                        
-                except json.JSONDecodeError as e:
-                    logger.error(f"Invalid JSON in tool call: {e}")
-                    results.append(ActionResult(
-                        action="unknown",
-                        success=False,
-                        error="Invalid tool call format"
-                    ))
+        # Parse every call up front; rejected ones are already failed results
+        parsed = [
+            self._parse_action(tool_call["function"]["arguments"])
+            for tool_call in tool_calls
+            if tool_call["function"]["name"] == "execute_travel_action"
+        ]
+        results: List[Optional[ActionResult]] = [
+            item if isinstance(item, ActionResult) else None for item in parsed
+        ]
         
-        # Determine if any tool failures should trigger fallback continuation
-        poi_failed = any(
-            r.action == "search_pois" and r.success and isinstance(r.data, dict) and r.data.get("count", 0) == 0
-            for r in results
-        )
-        hotel_failed = any(
-            r.action == "search_hotels" and r.success and isinstance(r.data, dict) and r.data.get("count", 0) == 0
-            for r in results
+        # Searches are independent of each other, so their provider calls
+        # overlap; a failure in one doesn't affect the others
+        searches = [
+            (i, item) for i, item in enumerate(parsed)
+            if isinstance(item, (SearchPOIsAction, SearchHotelsAction))
+        ]
+        search_results = await asyncio.gather(
+            *(self._run_action(action, session_id) for _, action in searches),
+            return_exceptions=True,
         )
+        for (i, action), result in zip(searches, search_results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error executing action {action.action}: {result}")
+                result = ActionResult.fail(action.action, str(result))
+            results[i] = result
+        
+        # Finalization writes the itinerary and runs after the searches, in order
+        for i, item in enumerate(parsed):
+            if not isinstance(item, FinalizeItineraryAction):
+                continue
+            result = await self._run_action(item, session_id)
+            results[i] = result
+            if result.success:
+                itinerary_id = result.data.get("itinerary_id")
+                # Capture city/country for potential follow-up hotel search
+                finalize_city = result.data.get("city")
+                finalize_country = result.data.get("country")
+        
+        # Determine if any tool failures should trigger fallback continuation
+        poi_failed = any(r.action == "search_pois" and r.empty for r in results)
+        hotel_failed = any(r.action == "search_hotels" and r.empty for r in results)
         itinerary_created = any(r.action == "finalize_itinerary" and r.success for r in results)
 
         # If an itinerary was created but no hotel search was performed, proactively run one
@@ -471,15 +975,15 @@ Keep responses engaging and informative. Focus on creating memorable travel expe
                     finalize_city,
                     budget_tier or "mid",
                 )
-                auto_hotel_args = {
-                    "action": "search_hotels",
-                    "city": finalize_city,
+                # Built from an already-validated finalize result: no re-validation
+                auto_hotel_action = SearchHotelsAction.from_trusted(
+                    city=finalize_city,
                     # Include country if available from finalize result
-                    **({"country": finalize_country} if finalize_country else {}),
-                    "budget_tier": budget_tier or "mid",
-                    "limit": 10,
-                }
-                auto_hotel_result = await self._search_hotels_action(auto_hotel_args)
+                    country=finalize_country,
+                    budget_tier=budget_tier or "mid",
+                    limit=10,
+                )
+                auto_hotel_result = await self._search_hotels_action(auto_hotel_action)
                 results.append(auto_hotel_result)
             except Exception as e:
                 logger.warning(f"Auto hotel search failed: {e}")
@@ -496,50 +1000,26 @@ Keep responses engaging and informative. Focus on creating memorable travel expe
             
             # Continue the conversation by making another LLM call without tools.
             # This allows the LLM to proceed with its own knowledge.
-            # Hacky.
+            # The original messages are re-sent unchanged with the tool summary
+            # appended, and the same tool schema is attached with tool use
+            # disabled, so the whole earlier prompt is a cacheable prefix.
             try:
-                # Get original context
-                original_messages = self.message_repo.get_recent_messages(session_id, limit=8)
-                conversation_context = []
-                
-                # Add system prompt
-                system_prompt = self._get_system_prompt()
-                conversation_context.append({"role": "system", "content": system_prompt})
-
-                # Include original form context so the model doesn't ask again
-                context_parts: List[str] = []
-                if destination:
-                    context_parts.append(f"Destination: {destination}")
-                if start_date and end_date:
-                    context_parts.append(f"Travel dates: {start_date} to {end_date}")
-                if budget_tier:
-                    context_parts.append(f"Budget tier: {budget_tier}")
-                if context_parts:
-                    context_message = "Travel planning context:\n" + "\n".join(context_parts)
-                    conversation_context.append({"role": "system", "content": context_message})
-
-                # Summarize tool results for continuity
-                conversation_context.append({
-                    "role": "system",
-                    "content": f"Tool results: {tool_summary}"
-                })
+                conversation_context = [
+                    *(messages or []),
+                    {"role": "system", "content": f"Tool results: {tool_summary}"},
+                ]
                 
-                # Add recent history (excluding the most recent user message which is being processed)
-                for msg in reversed(original_messages):
-                    if msg.role in ["user", "assistant"]:
-                        conversation_context.append({"role": msg.role, "content": msg.content})
+                # Make LLM call without tool use to continue the conversation
+                request_data = {**self._base_request_no_tools, "messages": conversation_context}
                 
-                # Make LLM call without tools to continue the conversation
-                request_data = {
-                    "model": self.settings.openai_model,
-                    "messages": conversation_context,
-                    "temperature": 0.7,
-                    "max_tokens": 1500,
-                }
-                
-                response = self.openai_client.post("/chat/completions", json=request_data)
+                async with self._llm_sem:
+                    response = await self.openai_client.post(
+                        "/chat/completions",
+                        content=orjson.dumps(request_data),
+                        headers=_JSON_HEADERS,
+                    )
                 response.raise_for_status()
-                data = response.json()
+                data = orjson.loads(response.content)
                 
                 # Extract usage info
                 usage = data.get("usage", {})
@@ -580,82 +1060,102 @@ Keep responses engaging and informative. Focus on creating memorable travel expe
             "itinerary_id": itinerary_id,
         }
     
-    async def _execute_action(self, args: Dict[str, Any], session_id: str) -> ActionResult:
-        """Execute a travel action.
+    async def _execute_action(self,
+                              arguments: Union[str, bytes, Dict[str, Any]],
+                              session_id: str,
+                            ) -> ActionResult:
+        """Validate and execute a travel action.
         Args:
-            args (Dict[str, Any]): Action arguments.
+            arguments (Union[str, bytes, Dict[str, Any]]): Raw action arguments
+                from the LLM, either the JSON text of a tool call or a decoded dict.
             session_id (str): User session ID.
         Returns:
             ActionResult: The result of the action execution.
         """
-        action_type = args.get("action")
-        
+        action = self._parse_action(arguments)
+        if isinstance(action, ActionResult):
+            return action
+        return await self._run_action(action, session_id)
+    
+    def _parse_action(self, arguments: Union[str, bytes, Dict[str, Any]]) -> Union[TravelAction, ActionResult]:
+        """Validate raw tool-call arguments into an action model.
+        Args:
+            arguments (Union[str, bytes, Dict[str, Any]]): JSON text or decoded dict.
+        Returns:
+            Union[TravelAction, ActionResult]: The parsed action, or a failed
+            result describing why the arguments were rejected.
+        """
         try:
-            if action_type == "search_pois":
-                return await self._search_pois_action(args)
-            elif action_type == "search_hotels":
-                return await self._search_hotels_action(args)
-            elif action_type == "finalize_itinerary":
-                return await self._finalize_itinerary_action(args, session_id)
-            else:
-                return ActionResult(
-                    action=action_type or "unknown",
-                    success=False,
-                    error=f"Unknown action: {action_type}"
-                )
+            # One pass: the discriminated union decodes the JSON, picks the
+            # model from the "action" tag and validates only against that one
+            if isinstance(arguments, dict):
+                return ACTION_ADAPTER.validate_python(arguments)
+            return ACTION_ADAPTER.validate_json(arguments)
+        except ValidationError as e:
+            errors = e.errors()
+            error_type = errors[0]["type"]
+            if error_type in ("json_invalid", "dict_type"):
+                logger.error(f"Invalid JSON in tool call: {errors[0]['msg']}")
+                return ActionResult.fail("unknown", "Invalid tool call format")
+            if error_type in ("union_tag_invalid", "union_tag_not_found"):
+                action_type = errors[0].get("ctx", {}).get("tag")
+                return ActionResult.fail(action_type or "unknown", f"Unknown action: {action_type}")
+            # Drop the leading union tag from each error location
+            action_type = errors[0]["loc"][0]
+            problems = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc'][1:])}: {err['msg']}"
+                for err in errors
+            )
+            return ActionResult.fail(str(action_type), f"Invalid arguments: {problems}")
+    
+    async def _run_action(self, action: TravelAction, session_id: str) -> ActionResult:
+        """Dispatch a validated action to its handler.
+        Args:
+            action (TravelAction): Parsed action model.
+            session_id (str): User session ID.
+        Returns:
+            ActionResult: The result of the action execution.
+        """
+        try:
+            match action:
+                case SearchPOIsAction():
+                    return await self._search_pois_action(action)
+                case SearchHotelsAction():
+                    return await self._search_hotels_action(action)
+                case FinalizeItineraryAction():
+                    return await self._finalize_itinerary_action(action, session_id)
                 
         except Exception as e:
-            logger.error(f"Error executing action {action_type}: {e}")
-            return ActionResult(
-                action=action_type or "unknown",
-                success=False,
-                error=str(e)
-            )
+            logger.error(f"Error executing action {action.action}: {e}")
+            return ActionResult.fail(action.action, str(e))
     
-    async def _search_pois_action(self, args: Dict[str, Any]) -> ActionResult:
+    async def _search_pois_action(self, action: SearchPOIsAction) -> ActionResult:
         """Execute search_pois action with fallback to LLM knowledge.
         If POIS search fails (e.g. API error or no results), return 
         success=True and let LLM handle with its own knowledge.
         Args:
-            args (Dict[str, Any]): Action arguments.
+            action (SearchPOIsAction): Validated action arguments.
         Returns:
             ActionResult: The result of the POI search.
         """
-        city = args.get("city", "")
-        country = args.get("country")
-        categories = args.get("categories", [])
-        limit = args.get("limit", 20)
+        city = action.city
+        country = action.country
+        categories = action.categories or []
+        limit = action.limit
         
         if not city:
-            return ActionResult(
-                action="search_pois",
-                success=False,
-                error="City is required"
-            )
+            return ActionResult.fail("search_pois", "City is required")
         
         # Try to get POIs from external API first
         pois = []
         api_success = False
         
         # Convert categories to OpenTripMap format
-        kinds = None
-        if categories:
-            # Map common categories to OpenTripMap kinds
-            category_mapping = {
-                "museums": "museums",
-                "historic": "historic", 
-                "restaurants": "foods",
-                "parks": "natural",
-                "attractions": "tourist_facilities",
-                "shopping": "shops",
-                "entertainment": "entertainment",
-            }
-            mapped_kinds = []
-            for cat in categories:
-                if cat.lower() in category_mapping:
-                    mapped_kinds.append(category_mapping[cat.lower()])
-            if mapped_kinds:
-                kinds = ",".join(mapped_kinds)
+        mapped_kinds = [
+            _CATEGORY_TO_KINDS[cat] for cat in map(str.lower, categories)
+            if cat in _CATEGORY_TO_KINDS
+        ]
+        kinds = ",".join(mapped_kinds) if mapped_kinds else None
         
         # Search using coordinates
         city_coords = self._get_city_coordinates(city, country)
@@ -674,10 +1174,9 @@ Keep responses engaging and informative. Focus on creating memorable travel expe
                 logger.warning(f"POI API failed for {city}: {e}")
         
         # Always return success - let LLM handle empty results with its own knowledge
-        return ActionResult(
-            action="search_pois",
-            success=True,
-            data={
+        return ActionResult.ok(
+            "search_pois",
+            {
                 "city": city,
                 "country": country,
                 "categories": categories,
@@ -685,28 +1184,25 @@ Keep responses engaging and informative. Focus on creating memorable travel expe
                 "count": len(pois),
                 "api_success": api_success,
                 "use_llm_knowledge": len(pois) == 0  # Signal to LLM to use its own knowledge
-            }
+            },
+            empty=not pois,
         )
     
-    async def _search_hotels_action(self, args: Dict[str, Any]) -> ActionResult:
+    async def _search_hotels_action(self, action: SearchHotelsAction) -> ActionResult:
         """Execute search_hotels action.
         Basic, no-fallback hotel search.
         Args:
-            args (Dict[str, Any]): Action arguments.
+            action (SearchHotelsAction): Validated action arguments.
         Returns:
             ActionResult: The result of the hotel search.
         """
-        city = args.get("city", "")
-        country = args.get("country")
-        budget_tier = args.get("budget_tier", "mid")
-        limit = args.get("limit", 10)
+        city = action.city
+        country = action.country
+        budget_tier = action.budget_tier
+        limit = action.limit
         
         if not city:
-            return ActionResult(
-                action="search_hotels",
-                success=False,
-                error="City is required"
-            )
+            return ActionResult.fail("search_hotels", "City is required")
         
         hotels = await self.hotel_provider.search_hotels(
             city=city,
@@ -715,85 +1211,45 @@ Keep responses engaging and informative. Focus on creating memorable travel expe
             limit=limit
         )
         
-        return ActionResult(
-            action="search_hotels",
-            success=True,
-            data={
+        return ActionResult.ok(
+            "search_hotels",
+            {
                 "city": city,
                 "budget_tier": budget_tier,
                 "hotels": hotels,
                 "count": len(hotels)
-            }
+            },
+            empty=not hotels,
         )
     
-    async def _finalize_itinerary_action(self, args: Dict[str, Any], session_id: str) -> ActionResult:
+    async def _finalize_itinerary_action(self, action: FinalizeItineraryAction, session_id: str) -> ActionResult:
         """Execute finalize_itinerary action.
         Args:
-            args (Dict[str, Any]): Action arguments.
+            action (FinalizeItineraryAction): Validated action arguments.
             session_id (str): User session ID.
         Returns:
             ActionResult: The result of the itinerary finalization.
         """
         try:
             # Extract itinerary data
-            city = args.get("city", "")
-            country = args.get("country")
-            start_date_str = args.get("start_date", "")
-            end_date_str = args.get("end_date", "")
-            budget_tier = args.get("budget_tier", "mid")
-            days_data = args.get("days", [])
-            
-            if not all([city, start_date_str, end_date_str, days_data]):
-                return ActionResult(
-                    action="finalize_itinerary",
-                    success=False,
-                    error="Missing required fields: city, start_date, end_date, days"
-                )
+            city = action.city
+            country = action.country
+            start_date = action.start_date
+            end_date = action.end_date
+            budget_tier = action.budget_tier
+            days_data = action.days
             
-            # Parse dates
-            start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-            end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
+            if not all([city, start_date, end_date, days_data]):
+                return ActionResult.fail("finalize_itinerary", "Missing required fields: city, start_date, end_date, days")
             
-            # Create itinerary
-            itinerary = self.itinerary_repo.create_itinerary(
-                session_id=session_id,
-                city=city,
-                country=country,
-                start_date=start_date,
-                end_date=end_date,
-                budget_tier=budget_tier,
-            )
-            
-            # Create days and items
-            for day_data in days_data:
-                day_index = day_data.get("day_index", 0)
-                day_date_str = day_data.get("date", "")
-                activities = day_data.get("activities", [])
-                
-                day_date = datetime.strptime(day_date_str, "%Y-%m-%d").date()
-                
-                # Create day
-                day = self.itinerary_repo.create_day(
-                    itinerary_id=str(itinerary.id),
-                    day_index=day_index,
-                    date_value=day_date,
-                )
-                
-                # Create activities
-                for activity in activities:
-                    self.itinerary_repo.create_item(
-                        day_id=str(day.id),
-                        item_type=activity.get("type", "poi"),
-                        start_time=activity.get("start_time"),
-                        end_time=activity.get("end_time"),
-                        notes=f"{activity.get('name', '')} - {activity.get('notes', '')}".strip(' -'),
-                    )
+            # The inserts are blocking DB work; run them in a worker thread so
+            # other requests keep being served while the itinerary is written
+            itinerary_id = await asyncio.to_thread(self._save_itinerary, action, session_id)
             
-            return ActionResult(
-                action="finalize_itinerary",
-                success=True,
-                data={
-                    "itinerary_id": str(itinerary.id),
+            return ActionResult.ok(
+                "finalize_itinerary",
+                {
+                    "itinerary_id": itinerary_id,
                     "city": city,
                     "country": country,
                     "budget_tier": budget_tier,
@@ -802,69 +1258,82 @@ Keep responses engaging and informative. Focus on creating memorable travel expe
             )
             
         except ValueError as e:
-            return ActionResult(
-                action="finalize_itinerary",
-                success=False,
-                error=f"Invalid date format: {e}"
-            )
+            return ActionResult.fail("finalize_itinerary", f"Invalid date format: {e}")
         except Exception as e:
             logger.error(f"Error finalizing itinerary: {e}")
-            return ActionResult(
-                action="finalize_itinerary",
-                success=False,
-                error=str(e)
+            return ActionResult.fail("finalize_itinerary", str(e))
+    
+    def _save_itinerary(self, action: FinalizeItineraryAction, session_id: str) -> str:
+        """Persist a finalized itinerary with its days and items.
+        Runs in a worker thread; the DB session is not touched by anything
+        else while the calling coroutine awaits it.
+        Args:
+            action (FinalizeItineraryAction): Validated action arguments.
+            session_id (str): User session ID.
+        Returns:
+            str: ID of the created itinerary.
+        """
+        # IDs are generated here so every row can be built in one pass and
+        # written with one INSERT per table
+        itinerary_id = uuid7()
+        day_rows: List[Dict[str, Any]] = []
+        item_rows: List[Dict[str, Any]] = []
+        for day_data in action.days:
+            day_id = uuid7()
+            day_rows.append({
+                "id": day_id,
+                "itinerary_id": itinerary_id,
+                "day_index": day_data.day_index,
+                "date": date.fromisoformat(day_data.date),
+            })
+            item_rows.extend(
+                {
+                    "id": uuid7(),
+                    "day_id": day_id,
+                    "item_type": activity.type,
+                    "ref_place_id": None,
+                    "ref_hotel_id": None,
+                    "start_time": _parse_time(activity.start_time),
+                    "end_time": _parse_time(activity.end_time),
+                    "notes": f"{activity.name} - {activity.notes or ''}".strip(' -'),
+                }
+                for activity in day_data.activities
             )
+        
+        self.itinerary_repo.create_itinerary_bulk(
+            {
+                "id": itinerary_id,
+                "session_id": session_id,
+                "city": action.city,
+                "country": action.country,
+                "start_date": action.start_date,
+                "end_date": action.end_date,
+                "budget_tier": action.budget_tier,
+                "created_at": datetime.utcnow(),
+            },
+            day_rows,
+            item_rows,
+        )
+        
+        return str(itinerary_id)
     
-    def _get_city_coordinates(self, city: str, country: Optional[str]) -> Optional[Dict[str, float]]:
+    def _get_city_coordinates(self, city: str, country: Optional[str]) -> Optional[Mapping[str, float]]:
         """Get approximate coordinates for a city.
         Args:
             city (str): City name.
             country (Optional[str]): Country name.
         Returns:
-            Optional[Dict[str, float]]: Dictionary with 'lat' and 'lon' or None.
+            Optional[Mapping[str, float]]: Read-only mapping with 'lat' and 'lon' or None.
         """
-        # Simplified city coordinate lookup for demo only
-        # TODO: Integrate with a geocoding API for real data
-        city_coords = {
-            "athens": {"lat": 37.9755, "lon": 23.7348},
-            "paris": {"lat": 48.8566, "lon": 2.3522},
-            "london": {"lat": 51.5074, "lon": -0.1278},
-            "rome": {"lat": 41.9028, "lon": 12.4964},
-            "madrid": {"lat": 40.4168, "lon": -3.7038},
-            "berlin": {"lat": 52.5200, "lon": 13.4050},
-            "amsterdam": {"lat": 52.3676, "lon": 4.9041},
-            "prague": {"lat": 50.0755, "lon": 14.4378},
-            "vienna": {"lat": 48.2082, "lon": 16.3738},
-            "barcelona": {"lat": 41.3851, "lon": 2.1734},
-        }
-        
-        return city_coords.get(city.lower())
+        return _lookup_city_coordinates(city.strip().lower())
     
     def _generate_tool_summary_for_llm(self, results: List[ActionResult]) -> str:
         """Generate a concise summary of tool results for LLM continuation."""
-        summaries = []
-        
-        for result in results:
-            if result.action == "search_pois":
-                data = result.data
-                city = data.get("city", "")
-                count = data.get("count", 0)
-                
-                if count == 0:
-                    summaries.append(f"POI search for {city} returned no results from external APIs, but I have extensive knowledge of {city}'s attractions.")
-                else:
-                    summaries.append(f"Found {count} POIs in {city} from external data.")
-            
-            elif result.action == "search_hotels":
-                data = result.data
-                city = data.get("city", "")
-                count = data.get("count", 0)
-                tier = data.get("budget_tier", "mid")
-                
-                if count == 0:
-                    summaries.append(f"Hotel search for {city} returned no results, but I can recommend excellent {tier}-tier accommodations.")
-                else:
-                    summaries.append(f"Found {count} {tier}-tier hotels in {city}.")
+        summaries = [
+            handler(result.data)
+            for result in results
+            if result.success and (handler := _SUMMARY_FORMATTERS.get(result.action))
+        ]
         
         if not summaries:
             return "Tool execution completed. Ready to proceed with itinerary creation."
@@ -883,6 +1352,17 @@ Keep responses engaging and informative. Focus on creating memorable travel expe
         if not results:
             return "I couldn't execute the requested actions. Please try again."
         
+        if len(results) == 1:
+            # Usual case of one action per turn: format it directly
+            result = results[0]
+            if not result.success:
+                return f"❌ {result.action} failed: {result.error}"
+            formatter = _RESPONSE_FORMATTERS.get(result.action)
+            if formatter is None:
+                return "Actions completed successfully!"
+            # An empty POI search yields no part: continue with LLM generation
+            return formatter(result.data) or ""
+        
         response_parts = []
         poi_search_failed = False
         
@@ -891,60 +1371,43 @@ Keep responses engaging and informative. Focus on creating memorable travel expe
                 response_parts.append(f"❌ {result.action} failed: {result.error}")
                 continue
             
-            if result.action == "search_pois":
-                data = result.data
-                count = data.get("count", 0)
-                city = data.get("city", "")
-                use_llm_knowledge = data.get("use_llm_knowledge", False)
-                
-                if count > 0:
-                    response_parts.append(
-                        f"🏛️ Found {count} interesting places in {city}! "
-                        f"I'll include the best ones in your itinerary."
-                    )
-                else:
-                    # API returned no results - this is just informational for the user
-                    poi_search_failed = True
-                    # Don't add any message here - let the system handle it seamlessly
-            
-            elif result.action == "search_hotels":
-                data = result.data
-                count = data.get("count", 0)
-                city = data.get("city", "")
-                tier = data.get("budget_tier", "mid")
-                
-                if count > 0:
-                    response_parts.append(
-                        f"🏨 Found {count} {tier}-range hotels in {city}! "
-                        f"I'll recommend the best options for your stay."
-                    )
-                else:
-                    response_parts.append(f"I'll provide excellent hotel recommendations for {city} based on your {tier} budget.")
-            
-            elif result.action == "finalize_itinerary":
-                data = result.data
-                city = data.get("city", "")
-                itinerary_id = data.get("itinerary_id", "")
-                days_count = data.get("days_count", 0)
-                
-                response_parts.append(
-                    f"✅ Perfect! I've created your {days_count}-day itinerary for {city}! "
-                    f"You can export it as JSON using the link below or continue chatting to refine it."
-                )
+            formatter = _RESPONSE_FORMATTERS.get(result.action)
+            part = formatter(result.data) if formatter else None
+            if part:
+                response_parts.append(part)
+            elif result.action == "search_pois":
+                # API returned no results - don't add any message here,
+                # let the system handle it seamlessly
+                poi_search_failed = True
         
-        # If POI search failed and no itinerary was created, return empty string
-        # This will signal that the conversation should continue without a tool response
-        if poi_search_failed and not any(r.action == "finalize_itinerary" for r in results):
-            if not response_parts:  # Only POI search happened and failed
-                return ""  # Empty response means continue with LLM generation
+        # If only empty POI searches happened, return empty string. This signals
+        # that the conversation should continue without a tool response. A
+        # finalize_itinerary result always adds a part, so no separate check
+        # for a created itinerary is needed.
+        if poi_search_failed and not response_parts:
+            return ""  # Empty response means continue with LLM generation
         
         return " ".join(response_parts) if response_parts else "Actions completed successfully!"
     
+    async def aclose(self):
+        """Clean up resources, including HTTP clients this instance created.
+        Shared clients passed in from the app lifespan are left open.
+        """
+        try:
+            if self._owns_openai_client:
+                await self.openai_client.aclose()
+            await self.opentripmap.aclose()
+            if hasattr(self.hotel_provider, 'aclose'):
+                await self.hotel_provider.aclose()
+        except Exception:
+            pass  # Ignore cleanup errors
+        self.close()
+    
     def close(self):
-        """Clean up resources."""
+        """Clean up provider resources.
+        Async clients (OpenAI, OpenTripMap, RapidAPI) can only be closed from ``aclose``.
+        """
         try:
-            self.openai_client.close()
-            self.opentripmap.close()
             if hasattr(self.hotel_provider, 'close'):
                 self.hotel_provider.close()
         except Exception:
@@ -974,40 +1437,37 @@ Keep responses engaging and informative. Focus on creating memorable travel expe
         same shape as OpenAI's tool_calls with function name and JSON string arguments.
         The `preface_text` is any content before the first pseudo call.
         """
-        pattern = re.compile(r"\[[^\]]*action[^\]]*\]", re.IGNORECASE)
-        first_match = pattern.search(content)
+        # Fast path: without a JSON object there can be no pseudo call, which
+        # is the case for almost every ordinary assistant reply
+        if "{" not in content:
+            return None, ""
+        
+        first_match = _PSEUDO_ACTION_TAG_RE.search(content)
         if not first_match:
             return None, ""
 
         preface = content[:first_match.start()]
         calls: List[Dict[str, Any]] = []
 
-        for m in pattern.finditer(content):
+        for m in _PSEUDO_ACTION_TAG_RE.finditer(content):
             # Find the start of JSON block after the tag
             brace_start = content.find("{", m.end())
             if brace_start == -1:
                 continue
-            # Extract balanced JSON braces
-            depth = 0
-            i = brace_start
-            while i < len(content):
-                ch = content[i]
-                if ch == "{":
-                    depth += 1
-                elif ch == "}":
-                    depth -= 1
-                    if depth == 0:
-                        json_str = content[brace_start:i + 1]
-                        calls.append({
-                            "function": {
-                                # Keep the single known function name the tool schema expects
-                                "name": "execute_travel_action",
-                                "arguments": json_str,
-                            }
-                        })
-                        break
-                i += 1
-            # If braces never balanced, skip this match
+            # Let the C JSON scanner find where the object ends; unlike brace
+            # counting this is not fooled by braces inside string values
+            try:
+                _, end = _JSON_DECODER.raw_decode(content, brace_start)
+            except ValueError:
+                # Not a complete JSON value, skip this match
+                continue
+            calls.append({
+                "function": {
+                    # Keep the single known function name the tool schema expects
+                    "name": "execute_travel_action",
+                    "arguments": content[brace_start:end],
+                }
+            })
 
         if not calls:
             return None, preface
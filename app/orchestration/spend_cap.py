@@ -1,15 +1,28 @@
 """Spend cap management for LLM usage."""
 
 import logging
-from datetime import datetime
-from typing import Optional
+import time
+from typing import Dict, Optional, Tuple
 from sqlalchemy.orm import Session as DBSession
 
 from app.config import Settings
 from app.repositories.ledger import LedgerRepository
+from app.utils.dates import current_month_key
 
 logger = logging.getLogger(__name__)
 
+# (prompt, completion) cost per token in USD, from the per-1K prices
+# (as of 2024, adjust as needed)
+_PRICING_PER_TOKEN: Dict[str, Tuple[float, float]] = {
+    "gpt-4": (0.03 / 1000, 0.06 / 1000),
+    "gpt-4-turbo": (0.01 / 1000, 0.03 / 1000),
+    "gpt-3.5-turbo": (0.0015 / 1000, 0.002 / 1000),
+}
+_DEFAULT_PRICING = _PRICING_PER_TOKEN["gpt-4"]
+
+# How long a month's spend total is reused before it is queried again
+_SPEND_CACHE_TTL_SECONDS = 15.0
+
 
 class SpendCapManager:
     """Manages LLM spend cap enforcement."""
@@ -19,6 +32,30 @@ class SpendCapManager:
         self.db = db
         self.ledger_repo = LedgerRepository(db)
         self.monthly_cap_usd = settings.monthly_spend_cap_usd
+        # month_key -> (spent_usd, expires_at on the monotonic clock). A chat
+        # turn checks the cap before calling out and records every call, so
+        # this saves the repeated SUM queries within a turn.
+        self._spend_cache: Dict[str, Tuple[float, float]] = {}
+    
+    def _current_status(self, month_key: Optional[str] = None) -> Tuple[float, float, bool]:
+        """Get the month's spend and everything derived from it.
+        Runs at most one query; a total fetched in the last few seconds is reused.
+        Args:
+            month_key (Optional[str]): Month in 'YYYY-MM' format. Defaults to current month
+        Returns:
+            Tuple[float, float, bool]: Spent USD, remaining USD, and whether the cap is reached.
+        """
+        if month_key is None:
+            month_key = current_month_key()
+        
+        now = time.monotonic()
+        cached = self._spend_cache.get(month_key)
+        if cached is not None and now < cached[1]:
+            spent = cached[0]
+        else:
+            spent = self.ledger_repo.get_monthly_spend(month_key)
+            self._spend_cache[month_key] = (spent, now + _SPEND_CACHE_TTL_SECONDS)
+        return spent, max(0.0, self.monthly_cap_usd - spent), spent >= self.monthly_cap_usd
     
     def is_spend_cap_exceeded(self, month_key: Optional[str] = None) -> bool:
         """Check if the monthly spend cap has been exceeded.
@@ -27,10 +64,7 @@ class SpendCapManager:
         Returns:
             bool: True if cap exceeded, False otherwise.
         """
-        if month_key is None:
-            month_key = datetime.utcnow().strftime("%Y-%m")
-        
-        return self.ledger_repo.is_spend_cap_exceeded(self.monthly_cap_usd, month_key)
+        return self._current_status(month_key)[2]
     
     def get_remaining_budget(self, month_key: Optional[str] = None) -> float:
         """Get remaining budget for the month.
@@ -39,11 +73,7 @@ class SpendCapManager:
         Returns:
             float: Remaining budget in USD.
         """
-        if month_key is None:
-            month_key = datetime.utcnow().strftime("%Y-%m")
-        
-        spent = self.ledger_repo.get_monthly_spend(month_key)
-        return max(0.0, self.monthly_cap_usd - spent)
+        return self._current_status(month_key)[1]
     
     def get_spend_status(self, month_key: Optional[str] = None) -> dict:
         """Get comprehensive spend status.
@@ -53,10 +83,9 @@ class SpendCapManager:
             dict: Spend status including cap, spent, remaining, percentage used, and flags.
         """
         if month_key is None:
-            month_key = datetime.utcnow().strftime("%Y-%m")
+            month_key = current_month_key()
         
-        spent = self.ledger_repo.get_monthly_spend(month_key)
-        remaining = max(0.0, self.monthly_cap_usd - spent)
+        spent, remaining, exceeded = self._current_status(month_key)
         percentage = (spent / self.monthly_cap_usd) * 100 if self.monthly_cap_usd > 0 else 0
         
         return {
@@ -65,7 +94,7 @@ class SpendCapManager:
             "spent_usd": spent,
             "remaining_usd": remaining,
             "percentage_used": percentage,
-            "is_capped": spent >= self.monthly_cap_usd,
+            "is_capped": exceeded,
             "is_warning": percentage >= 80,  # Warning at 80%
         }
     
@@ -86,29 +115,9 @@ class SpendCapManager:
         Note: These are approximate costs and may differ from actual billing.
         Update these rates based on your OpenAI pricing.
         """
-        # Cost per 1K tokens (as of 2024, adjust as needed)
-        pricing = {
-            "gpt-4": {
-                "prompt": 0.03,      # $0.03 per 1K prompt tokens
-                "completion": 0.06   # $0.06 per 1K completion tokens
-            },
-            "gpt-4-turbo": {
-                "prompt": 0.01,
-                "completion": 0.03
-            },
-            "gpt-3.5-turbo": {
-                "prompt": 0.0015,
-                "completion": 0.002
-            },
-        }
-        
         # Default to gpt-4 pricing if model not found
-        model_pricing = pricing.get(model, pricing["gpt-4"])
-        
-        prompt_cost = (prompt_tokens / 1000) * model_pricing["prompt"]
-        completion_cost = (completion_tokens / 1000) * model_pricing["completion"]
-        
-        return prompt_cost + completion_cost
+        prompt_rate, completion_rate = _PRICING_PER_TOKEN.get(model, _DEFAULT_PRICING)
+        return prompt_tokens * prompt_rate + completion_tokens * completion_rate
     
     def can_make_call(
         self,
@@ -124,14 +133,13 @@ class SpendCapManager:
         Returns:
             bool: True if call can be made, False otherwise.
         """
-        if self.is_spend_cap_exceeded():
+        _, remaining, exceeded = self._current_status()
+        if exceeded:
             return False
         
         estimated_cost = self.estimate_call_cost(
             model, estimated_prompt_tokens, estimated_completion_tokens
         )
-        
-        remaining = self.get_remaining_budget()
         return estimated_cost <= remaining
     
     def record_llm_call(
@@ -147,13 +155,13 @@ class SpendCapManager:
         if actual_cost_usd is None:
             actual_cost_usd = self.estimate_call_cost(model, prompt_tokens, completion_tokens)
         
-        # Check if this call puts us over the cap
-        blocked_after = False
-        if not self.is_spend_cap_exceeded():  # Before this call
-            # Simulate the spend to see if it would exceed cap
-            current_spend = self.ledger_repo.get_monthly_spend()
-            if (current_spend + actual_cost_usd) >= self.monthly_cap_usd:
-                blocked_after = True
+        # Check if this call puts us over the cap: it wasn't reached before
+        # this call, but the spend including it reaches it
+        month_key = current_month_key()
+        current_spend, _, exceeded = self._current_status(month_key)
+        blocked_after = (
+            not exceeded and (current_spend + actual_cost_usd) >= self.monthly_cap_usd
+        )
         
         # Record in ledger
         self.ledger_repo.record_usage(
@@ -165,6 +173,12 @@ class SpendCapManager:
             blocked_after=blocked_after,
         )
         
+        # Keep the memoized total current instead of querying it again
+        self._spend_cache[month_key] = (
+            current_spend + actual_cost_usd,
+            time.monotonic() + _SPEND_CACHE_TTL_SECONDS,
+        )
+        
         if blocked_after:
             logger.warning(
                 f"Monthly spend cap of ${self.monthly_cap_usd} reached after this call. "
@@ -1,5 +1,7 @@
 """RapidAPI hotel provider implementation."""
 
+import asyncio
+import importlib.util
 import logging
 from typing import List, Dict, Any, Optional
 import httpx
@@ -12,30 +14,62 @@ from app.repositories.cache import CacheRepository
 
 logger = logging.getLogger(__name__)
 
+# RapidAPI plans are rate limited per key, so requests from all concurrent
+# hotel searches in this process share a small number of slots
+_RAPIDAPI_MAX_CONCURRENCY = 4
+_rapidapi_semaphore = asyncio.Semaphore(_RAPIDAPI_MAX_CONCURRENCY)
+
+# Fail fast on connect but give slow hotel searches time to answer, and keep
+# connections alive so the location and hotel lookups of a search share one
+_RAPIDAPI_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+_RAPIDAPI_LIMITS = httpx.Limits(
+    max_connections=20,
+    max_keepalive_connections=10,
+    keepalive_expiry=60.0,
+)
+# HTTP/2 needs the optional h2 package (httpx[http2]); fall back to HTTP/1.1
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def create_rapidapi_client(settings: Settings) -> httpx.AsyncClient:
+    """Create a pooled async HTTP client for the RapidAPI hotels endpoint.
+    Args:
+        settings (Settings): Application settings with the API key.
+    Returns:
+        httpx.AsyncClient: Client with the RapidAPI headers, timeouts and pool limits.
+    """
+    # Avoid setting a None API key header when key isn't configured
+    headers = {
+        "X-RapidAPI-Host": "booking-com.p.rapidapi.com",
+    }
+    if settings.rapidapi_key:
+        headers["X-RapidAPI-Key"] = settings.rapidapi_key
+
+    return httpx.AsyncClient(
+        timeout=_RAPIDAPI_TIMEOUT,
+        limits=_RAPIDAPI_LIMITS,
+        http2=_HTTP2_AVAILABLE,
+        headers=headers,
+    )
+
 
 class RapidAPIHotelProvider(HotelProvider):
     """Hotel provider using RapidAPI hotels endpoint."""
     
-    def __init__(self, settings: Settings, db: DBSession):
+    def __init__(self, settings: Settings, db: DBSession, http_client: Optional[httpx.AsyncClient] = None):
         super().__init__(db)
         self.api_key = settings.rapidapi_key
         self.base_url = "https://booking-com.p.rapidapi.com/v1"
         self.cache_ttl = settings.api_cache_ttl_seconds
+        self.persist_raw_json = settings.persist_raw_hotel_json
         self.hotel_repo = HotelRepository(db)
         self.cache_repo = CacheRepository(db)
         
-        # HTTP client with timeout and headers
-        # Avoid setting a None API key header when key isn't configured
-        headers = {
-            "X-RapidAPI-Host": "booking-com.p.rapidapi.com",
-        }
-        if self.api_key:
-            headers["X-RapidAPI-Key"] = self.api_key
-
-        self.client = httpx.Client(
-            timeout=30.0,
-            headers=headers,
-        )
+        # Async client so hotel lookups don't block the event loop: reuse the
+        # app-wide pooled client when one is given, otherwise create (and
+        # later close) a private one
+        self._owns_client = http_client is None
+        self.client = http_client or create_rapidapi_client(settings)
     
     async def search_hotels(self,
                             city: str,
@@ -79,6 +113,17 @@ class RapidAPIHotelProvider(HotelProvider):
         
         return self._normalize_hotels(hotels_data, city, country)
     
+    async def _get(self, url: str, params: Dict[str, Any]) -> httpx.Response:
+        """Send a GET request once a process-wide RapidAPI slot is free.
+        Args:
+            url (str): Endpoint URL.
+            params (Dict[str, Any]): Query parameters.
+        Returns:
+            httpx.Response: The response.
+        """
+        async with _rapidapi_semaphore:
+            return await self.client.get(url, params=params)
+    
     async def _search_location(self, city: str, country: Optional[str]) -> Optional[Dict[str, Any]]:
         """Search for location to get destination ID.
         Args:
@@ -96,11 +141,13 @@ class RapidAPIHotelProvider(HotelProvider):
             "locale": "en-us"
         }
         
-        # Check cache
+        # Check cache; the key is reused when caching a miss
+        cache_key = self.cache_repo.make_cache_key("rapidapi_hotels", "locations", params)
         cached = self.cache_repo.get_cached_response(
             provider="rapidapi_hotels",
             endpoint="locations",
-            params=params
+            params=params,
+            key=cache_key,
         )
         
         if cached:
@@ -110,7 +157,7 @@ class RapidAPIHotelProvider(HotelProvider):
         try:
             # Primary endpoint attempt
             url = f"{self.base_url}/locations/search"
-            response = self.client.get(url, params=params)
+            response = await self._get(url, params)
             response.raise_for_status()
 
             data = response.json()
@@ -122,6 +169,7 @@ class RapidAPIHotelProvider(HotelProvider):
                 params=params,
                 response=data,
                 ttl_seconds=self.cache_ttl * 24,  # Location data is more stable
+                key=cache_key,
             )
 
             results = data.get("result", [])
@@ -132,10 +180,12 @@ class RapidAPIHotelProvider(HotelProvider):
             logger.info("Primary location endpoint returned no results for %s; trying fallback", search_query)
 
             fb_params = {"name": search_query, "locale": "en-us"}
+            fb_cache_key = self.cache_repo.make_cache_key("rapidapi_hotels", "locations_fallback", fb_params)
             cached_fb = self.cache_repo.get_cached_response(
                 provider="rapidapi_hotels",
                 endpoint="locations_fallback",
                 params=fb_params,
+                key=fb_cache_key,
             )
             if cached_fb:
                 logger.info("Cache hit for fallback location search: %s", search_query)
@@ -145,7 +195,7 @@ class RapidAPIHotelProvider(HotelProvider):
                 return None
 
             fb_url = f"{self.base_url}/hotels/locations"
-            fb_response = self.client.get(fb_url, params=fb_params)
+            fb_response = await self._get(fb_url, fb_params)
             fb_response.raise_for_status()
             fb_data = fb_response.json()
 
@@ -156,6 +206,7 @@ class RapidAPIHotelProvider(HotelProvider):
                 params=fb_params,
                 response=fb_data,
                 ttl_seconds=self.cache_ttl * 24,
+                key=fb_cache_key,
             )
 
             # Some variants return a list at top-level; others under "result"
@@ -205,11 +256,13 @@ class RapidAPIHotelProvider(HotelProvider):
             **price_filters
         }
         
-        # Check cache
+        # Check cache; the key is reused when caching a miss
+        cache_key = self.cache_repo.make_cache_key("rapidapi_hotels", "hotels_search", params)
         cached = self.cache_repo.get_cached_response(
             provider="rapidapi_hotels",
             endpoint="hotels_search",
-            params=params
+            params=params,
+            key=cache_key,
         )
         
         if cached:
@@ -218,7 +271,7 @@ class RapidAPIHotelProvider(HotelProvider):
         
         try:
             url = f"{self.base_url}/hotels/search"
-            response = self.client.get(url, params=params)
+            response = await self._get(url, params)
             response.raise_for_status()
             
             data = response.json()
@@ -230,6 +283,7 @@ class RapidAPIHotelProvider(HotelProvider):
                 params=params,
                 response=data,
                 ttl_seconds=self.cache_ttl,
+                key=cache_key,
             )
             
             results = data.get("result", [])
@@ -274,6 +328,7 @@ class RapidAPIHotelProvider(HotelProvider):
             List[Dict[str, Any]]: List of normalized hotel data.
         """
         normalized = []
+        to_store: List[Dict[str, Any]] = []
         
         for hotel in hotels_data:
             try:
@@ -310,20 +365,28 @@ class RapidAPIHotelProvider(HotelProvider):
                     "price_eur_per_night": price_eur,
                     "url": hotel.get("url", ""),
                     "provider": "rapidapi",
-                    "raw_json": hotel,
                 }
-                
-                # Store in database
-                if hotel_id:
-                    db_hotel = self.hotel_repo.create_or_update_hotel(**normalized_hotel)
-                    normalized_hotel["hotel_id"] = str(db_hotel.id)
+                if self.persist_raw_json:
+                    normalized_hotel["raw_json"] = hotel
                 
                 normalized.append(normalized_hotel)
+                if hotel_id:
+                    to_store.append(normalized_hotel)
                 
             except Exception as e:
                 logger.warning(f"Error normalizing hotel data: {e}")
                 continue
         
+        # Store in database: all hotels with a provider ID in one upsert
+        if to_store:
+            try:
+                hotel_ids = self.hotel_repo.bulk_upsert_hotels(to_store)
+                for hotel in to_store:
+                    hotel["hotel_id"] = hotel_ids[hotel["external_id"]]
+            except Exception as e:
+                logger.warning(f"Error storing RapidAPI hotels: {e}")
+                self.db.rollback()
+        
         logger.info(f"Normalized {len(normalized)} hotels from RapidAPI")
         return normalized
     
@@ -331,13 +394,7 @@ class RapidAPIHotelProvider(HotelProvider):
         """Get the provider name."""
         return "rapidapi"
     
-    def close(self):
-        """Close the HTTP client."""
-        self.client.close()
-    
-    def __del__(self):
-        """Cleanup on deletion."""
-        try:
-            self.close()
-        except Exception:
-            pass  # Ignore errors during cleanup
\ No newline at end of file
+    async def aclose(self):
+        """Close the HTTP client if this instance created it."""
+        if self._owns_client:
+            await self.client.aclose()
\ No newline at end of file
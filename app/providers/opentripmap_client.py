@@ -1,8 +1,15 @@
 """OpenTripMap API client with caching and normalization."""
 
+import asyncio
+import importlib.util
 import logging
-from typing import List, Dict, Any, Optional
+import random
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
 import httpx
+import orjson
 from sqlalchemy.orm import Session as DBSession
 
 from app.config import Settings
@@ -11,19 +18,191 @@ from app.repositories.places import PlaceRepository
 
 logger = logging.getLogger(__name__)
 
+_OPENTRIPMAP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+_OPENTRIPMAP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+# HTTP/2 needs the optional h2 package (httpx[http2]); fall back to HTTP/1.1
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+# Place detail requests in flight at once for a single get_place_details_many
+_DETAILS_CONCURRENCY = 10
+# Largest response body accepted; a normal search result is well under 1 MiB
+_MAX_RESPONSE_BYTES = 4 * 1024 * 1024
+# Transient failures are retried a few times with jittered exponential
+# backoff; anything else (4xx, bad JSON) fails straight away
+_MAX_ATTEMPTS = 3
+_RETRY_BASE_DELAY = 0.25  # seconds
+_RETRYABLE_STATUS = frozenset({502, 503, 504})
+# Address components joined, in order, into a place's address line
+_ADDRESS_FIELDS = ("house_number", "road", "city", "country")
+
+# Process-wide memo of recent API responses in front of the DB cache, so a
+# repeated lookup (the same city again) is a dict hit instead of a query.
+# Cache key -> (expires_at on the monotonic clock, response JSON).
+_RESPONSE_MEMO_SIZE = 1024
+_response_memo: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+
+def _memo_get(key: str) -> Optional[Any]:
+    """Get a memoized response if it hasn't expired."""
+    entry = _response_memo.get(key)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        del _response_memo[key]
+        return None
+    _response_memo.move_to_end(key)
+    return entry[1]
+
+
+def _cacheable(place: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a normalized place without its raw provider JSON."""
+    return {k: v for k, v in place.items() if k != "raw_json"}
+
+
+def _memo_put(key: str, response: Any, ttl_seconds: float) -> None:
+    """Memoize a response, evicting the least recently used one when full."""
+    _response_memo[key] = (time.monotonic() + ttl_seconds, response)
+    _response_memo.move_to_end(key)
+    if len(_response_memo) > _RESPONSE_MEMO_SIZE:
+        _response_memo.popitem(last=False)
+
+
+def create_opentripmap_client() -> httpx.AsyncClient:
+    """Create a pooled async HTTP client for the OpenTripMap API.
+    Returns:
+        httpx.AsyncClient: Client with the OpenTripMap timeouts and pool limits.
+    """
+    return httpx.AsyncClient(
+        timeout=_OPENTRIPMAP_TIMEOUT,
+        limits=_OPENTRIPMAP_LIMITS,
+        http2=_HTTP2_AVAILABLE,
+    )
+
 
 class OpenTripMapClient:
     """Client for OpenTripMap POI API with caching."""
     
-    def __init__(self, settings: Settings, db: DBSession):
+    def __init__(self, settings: Settings, db: DBSession, http_client: Optional[httpx.AsyncClient] = None):
         self.api_key = settings.opentripmap_api_key
         self.base_url = "https://api.opentripmap.com/0.1/en/places"
         self.cache_ttl = settings.api_cache_ttl_seconds
         self.cache_repo = CacheRepository(db)
         self.places_repo = PlaceRepository(db)
         
-        # HTTP client with timeout
-        self.client = httpx.Client(timeout=30.0)
+        # Async client so POI lookups don't block the event loop: reuse the
+        # app-wide pooled client when one is given, otherwise create (and
+        # later close) a private one
+        self._owns_client = http_client is None
+        self.client = http_client or create_opentripmap_client()
+    
+    async def _get_json(self, url: str, params: Dict[str, Any]) -> Any:
+        """GET a URL and decode its JSON body, retrying transient failures.
+        Timeouts and 502/503/504 responses are retried up to _MAX_ATTEMPTS
+        times in total, with jittered exponential backoff between attempts.
+        Retries go through self.client, which in the app is the lifespan's
+        shared pool, so they reuse kept-alive connections where possible.
+        Args:
+            url (str): Request URL.
+            params (Dict[str, Any]): Query parameters.
+        Returns:
+            Any: Decoded response JSON.
+        Raises:
+            httpx.HTTPError: On an error status or transport failure.
+            ValueError: If the body is too large or isn't valid JSON.
+        """
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            try:
+                return await self._get_json_once(url, params)
+            except (httpx.HTTPStatusError, httpx.TimeoutException) as e:
+                retryable = (
+                    isinstance(e, httpx.TimeoutException)
+                    or e.response.status_code in _RETRYABLE_STATUS
+                )
+                if not retryable or attempt == _MAX_ATTEMPTS:
+                    raise
+                delay = _RETRY_BASE_DELAY * 2 ** (attempt - 1) * (1 + random.random())
+                logger.info(f"Retrying OpenTripMap request in {delay:.2f}s after: {e}")
+                await asyncio.sleep(delay)
+    
+    async def _get_json_once(self, url: str, params: Dict[str, Any]) -> Any:
+        """GET a URL once and decode its JSON body.
+        The body is streamed and the request is abandoned as soon as it
+        grows past _MAX_RESPONSE_BYTES, rather than buffering an arbitrarily
+        large response first.
+        Args:
+            url (str): Request URL.
+            params (Dict[str, Any]): Query parameters.
+        Returns:
+            Any: Decoded response JSON.
+        Raises:
+            httpx.HTTPStatusError: On an error status.
+            ValueError: If the body is too large or isn't valid JSON.
+        """
+        async with self.client.stream("GET", url, params=params) as response:
+            response.raise_for_status()
+            
+            declared = response.headers.get("content-length")
+            if declared is not None and int(declared) > _MAX_RESPONSE_BYTES:
+                raise ValueError(f"OpenTripMap response of {declared} bytes is too large")
+            
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) > _MAX_RESPONSE_BYTES:
+                    raise ValueError("OpenTripMap response is too large")
+        
+        return orjson.loads(body)
+    
+    def _get_cached(self, endpoint: str, params: Dict[str, Any], key: str) -> Optional[Any]:
+        """Get a cached response from the in-process memo, else the DB cache.
+        Args:
+            endpoint (str): API endpoint.
+            params (Dict[str, Any]): Request parameters.
+            key (str): Key from make_cache_key.
+        Returns:
+            Optional[Any]: Cached response JSON or None on a miss.
+        """
+        cached = _memo_get(key)
+        if cached is not None:
+            return cached
+        entry = self.cache_repo.get_cached_entry(
+            provider="opentripmap",
+            endpoint=endpoint,
+            params=params,
+            key=key,
+        )
+        if entry is None:
+            return None
+        cached = entry.response_json
+        if cached:
+            # Memoize only for what is left of the row's TTL, so the memo
+            # never serves a response the DB cache already considers stale
+            remaining = (self.cache_repo.expires_at(entry) - datetime.utcnow()).total_seconds()
+            _memo_put(key, cached, remaining)
+        return cached
+    
+    def _store_cached(self,
+                    endpoint: str,
+                    params: Dict[str, Any],
+                    response: Any,
+                    key: Optional[str] = None,
+                ) -> None:
+        """Cache a response in the DB and the in-process memo.
+        Args:
+            endpoint (str): API endpoint.
+            params (Dict[str, Any]): Request parameters.
+            response (Any): Response JSON.
+            key (Optional[str]): Key from make_cache_key, built here if omitted.
+        """
+        key = key or self.cache_repo.make_cache_key("opentripmap", endpoint, params)
+        self.cache_repo.cache_response(
+            provider="opentripmap",
+            endpoint=endpoint,
+            params=params,
+            response=response,
+            ttl_seconds=self.cache_ttl,
+            key=key,
+        )
+        _memo_put(key, response, self.cache_ttl)
     
     async def search_places_by_bbox(self,
                                     bbox: str,  # "lon_min,lat_min,lon_max,lat_max"
@@ -49,39 +228,27 @@ class OpenTripMapClient:
         if kinds:
             params["kinds"] = kinds
         
-        # Check cache first
-        cached = self.cache_repo.get_cached_response(
-            provider="opentripmap",
-            endpoint="bbox_search",
-            params=params
-        )
+        # Check cache first; the key is reused when caching a fresh response
+        key = self.cache_repo.make_cache_key("opentripmap", "bbox_search", params)
+        cached = self._get_cached("bbox_search", params, key)
         
         if cached:
             logger.info(f"Cache hit for bbox search: {bbox}")
-            return self._normalize_search_response(cached)
+            return self._cached_places(cached)
         
         # Make API call
         try:
             url = f"{self.base_url}/bbox"
-            response = self.client.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = await self._get_json(url, params)
+            normalized = self._normalize_search_response(data)
             
-            # Try to cache the response, but don't fail if caching fails
+            # Try to cache the places, but don't fail if caching fails
             try:
-                self.cache_repo.cache_response(
-                    provider="opentripmap",
-                    endpoint="bbox_search",
-                    params=params,
-                    response=data,
-                    ttl_seconds=self.cache_ttl,
-                )
+                self._store_cached("bbox_search", params, self._places_payload(normalized), key)
             except Exception as cache_error:
                 logger.warning(f"Failed to cache OpenTripMap response: {cache_error}")
                 # Continue processing even if caching fails
             
-            normalized = self._normalize_search_response(data)
             logger.info(f"API call successful for bbox: {bbox}, found {len(normalized)} places")
             return normalized
             
@@ -122,57 +289,39 @@ class OpenTripMapClient:
         if kinds:
             params["kinds"] = kinds
         
-        # Check cache first
-        cached = self.cache_repo.get_cached_response(
-            provider="opentripmap",
-            endpoint="radius_search",
-            params=params
-        )
+        # Check cache first; the key is reused when caching a fresh response
+        key = self.cache_repo.make_cache_key("opentripmap", "radius_search", params)
+        cached = self._get_cached("radius_search", params, key)
         
         if cached:
             logger.info(f"Cache hit for radius search: {lat},{lon}")
-            return self._normalize_search_response(cached)
+            return self._cached_places(cached)
         
         # Make API call
         try:
             url = f"{self.base_url}/radius"
-            response = self.client.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = await self._get_json(url, params)
+            normalized = self._normalize_search_response(data)
             
-            # Try to cache the response, but don't fail if caching fails
+            # Try to cache the places, but don't fail if caching fails
             try:
-                self.cache_repo.cache_response(
-                    provider="opentripmap",
-                    endpoint="radius_search",
-                    params=params,
-                    response=data,
-                    ttl_seconds=self.cache_ttl,
-                )
+                self._store_cached("radius_search", params, self._places_payload(normalized), key)
             except Exception as cache_error:
                 logger.warning(f"Failed to cache OpenTripMap response: {cache_error}")
                 # Continue processing even if caching fails
             
-            normalized = self._normalize_search_response(data)
             # If geojson returned 0 places, try a fallback call using JSON format
             if not normalized:
                 try:
                     fallback_params = dict(params)
                     fallback_params["format"] = "json"
-                    fallback_response = self.client.get(url, params=fallback_params)
-                    fallback_response.raise_for_status()
-                    fallback_data = fallback_response.json()
+                    fallback_data = await self._get_json(url, fallback_params)
                     normalized = self._normalize_search_response(fallback_data)
                     if normalized:
                         # Best-effort cache the fallback response too
                         try:
-                            self.cache_repo.cache_response(
-                                provider="opentripmap",
-                                endpoint="radius_search",
-                                params=fallback_params,
-                                response=fallback_data,
-                                ttl_seconds=self.cache_ttl,
+                            self._store_cached(
+                                "radius_search", fallback_params, self._places_payload(normalized)
                             )
                         except Exception:
                             pass
@@ -196,44 +345,84 @@ class OpenTripMapClient:
         Returns:
             Optional[Dict[str, Any]]: Normalized place detail data or None if not found.
         """
-        params = {
-            "apikey": self.api_key,
-        }
+        key = self._place_details_key(xid)
         
         # Check cache first
-        cached = self.cache_repo.get_cached_response(
-            provider="opentripmap",
-            endpoint="place_details",
-            params={"xid": xid, **params}
-        )
+        cached = self._get_cached("place_details", {"xid": xid, "apikey": self.api_key}, key)
         
         if cached:
             logger.info(f"Cache hit for place details: {xid}")
-            return self._normalize_place_detail(cached)
+            return self._cached_detail(cached)
+        
+        return await self._fetch_place_details(xid, key)
+    
+    async def get_place_details_many(self, xids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Get detailed information about several places.
+        Cached places are read with one query; the rest are fetched
+        concurrently, at most _DETAILS_CONCURRENCY at a time.
+        Args:
+            xids (List[str]): External IDs of the places.
+        Returns:
+            List[Optional[Dict[str, Any]]]: Normalized place detail data, or None
+                for a place that wasn't found, in the order of ``xids``.
+        """
+        keys = [self._place_details_key(xid) for xid in xids]
+        cached = {key: response for key in keys if (response := _memo_get(key)) is not None}
+        cached.update(self.cache_repo.get_cached_responses([key for key in keys if key not in cached]))
+        semaphore = asyncio.Semaphore(_DETAILS_CONCURRENCY)
+        
+        async def fetch(xid: str, key: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await self._fetch_place_details(xid, key)
+        
+        misses = [(i, xid, key) for i, (xid, key) in enumerate(zip(xids, keys)) if key not in cached]
+        fetched = await asyncio.gather(*(fetch(xid, key) for _, xid, key in misses))
+        
+        results: List[Optional[Dict[str, Any]]] = [
+            None if key not in cached else self._cached_detail(cached[key])
+            for key in keys
+        ]
+        for (i, _, _), detail in zip(misses, fetched):
+            results[i] = detail
+        
+        logger.info(f"Place details for {len(xids)} places, {len(xids) - len(misses)} from cache")
+        return results
+    
+    def _place_details_key(self, xid: str) -> str:
+        """Build the cache key of a place details request."""
+        return self.cache_repo.make_cache_key(
+            "opentripmap", "place_details", {"xid": xid, "apikey": self.api_key}
+        )
+    
+    async def _fetch_place_details(self, xid: str, key: str) -> Optional[Dict[str, Any]]:
+        """Fetch place details from the API and cache them.
+        Args:
+            xid (str): External ID of the place.
+            key (str): Cache key from _place_details_key.
+        Returns:
+            Optional[Dict[str, Any]]: Normalized place detail data or None on error.
+        """
+        params = {
+            "apikey": self.api_key,
+        }
         
-        # Make API call
         try:
             url = f"{self.base_url}/xid/{xid}"
-            response = self.client.get(url, params=params)
-            response.raise_for_status()
+            data = await self._get_json(url, params)
+            normalized = self._normalize_place_detail(data)
             
-            data = response.json()
-            
-            # Try to cache the response, but don't fail if caching fails
-            try:
-                self.cache_repo.cache_response(
-                    provider="opentripmap",
-                    endpoint="place_details",
-                    params={"xid": xid, **params},
-                    response=data,
-                    ttl_seconds=self.cache_ttl,
-                )
-            except Exception as cache_error:
-                logger.warning(f"Failed to cache OpenTripMap response: {cache_error}")
-                # Continue processing even if caching fails
+            # Try to cache the place, but don't fail if caching fails
+            if normalized is not None:
+                try:
+                    self._store_cached(
+                        "place_details", {"xid": xid, **params}, {"normalized": _cacheable(normalized)}, key
+                    )
+                except Exception as cache_error:
+                    logger.warning(f"Failed to cache OpenTripMap response: {cache_error}")
+                    # Continue processing even if caching fails
             
             logger.info(f"API call successful for place details: {xid}")
-            return self._normalize_place_detail(data)
+            return normalized
             
         except httpx.HTTPError as e:
             logger.error(f"OpenTripMap API error for place {xid}: {e}")
@@ -242,6 +431,41 @@ class OpenTripMapClient:
             logger.error(f"Unexpected error getting place details for {xid}: {e}")
             return None
     
+    def _places_payload(self, places: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the cache payload of normalized places.
+        Places are cached already normalized and stored, so a cache hit
+        neither re-normalizes nor re-upserts them. The raw provider JSON is
+        left out to keep entries small.
+        Args:
+            places (List[Dict[str, Any]]): Normalized places.
+        Returns:
+            Dict[str, Any]: Payload for _store_cached.
+        """
+        return {"normalized": [_cacheable(place) for place in places]}
+    
+    def _cached_places(self, cached: Any) -> List[Dict[str, Any]]:
+        """Get the places of a cached search response.
+        Args:
+            cached (Any): Cached payload; entries written before places were
+                cached normalized hold the raw API response.
+        Returns:
+            List[Dict[str, Any]]: Normalized places, copied from the cache.
+        """
+        if isinstance(cached, dict) and "normalized" in cached:
+            return [dict(place) for place in cached["normalized"]]
+        return self._normalize_search_response(cached)
+    
+    def _cached_detail(self, cached: Any) -> Optional[Dict[str, Any]]:
+        """Get the place of a cached details response.
+        Args:
+            cached (Any): Cached payload, normalized or a raw API response.
+        Returns:
+            Optional[Dict[str, Any]]: Normalized place detail data, copied from the cache.
+        """
+        if isinstance(cached, dict) and "normalized" in cached:
+            return dict(cached["normalized"])
+        return self._normalize_place_detail(cached)
+    
     def _normalize_places(self, features: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Normalize place data from API response.
         Args:
@@ -249,43 +473,58 @@ class OpenTripMapClient:
         Returns:
             List[Dict[str, Any]]: List of normalized place data.
         """
-        normalized = []
+        try:
+            normalized = [
+                self._feature_to_place(feature, properties)
+                for feature in features
+                if isinstance(properties := feature.get("properties", {}), dict)
+            ]
+        except Exception as e:
+            logger.warning(f"Error normalizing places: {e}")
+            return []
         
-        for feature in features:
+        # Store in database for caching: all places with an ID in one upsert
+        to_store = [place for place in normalized if place["external_id"]]
+        if to_store:
             try:
-                properties = feature.get("properties", {})
-                geometry = feature.get("geometry", {})
-                coordinates = geometry.get("coordinates", [0, 0])
-                
-                normalized_place = {
-                    "external_id": properties.get("xid", ""),
-                    "name": properties.get("name", "Unnamed Place"),
-                    "lat": coordinates[1] if len(coordinates) > 1 else 0,
-                    "lon": coordinates[0] if len(coordinates) > 0 else 0,
-                    "categories": self._parse_kinds(properties.get("kinds", "")),
-                    "rating": properties.get("rate", None),
-                    "address": None,  # Not available in basic search
-                    "city": None,     # Will be inferred
-                    "country": None,  # Will be inferred
-                    "raw_json": feature,
-                }
-                
-                # Store in database for caching
-                if normalized_place["external_id"]:
-                    place = self.places_repo.create_or_update_place(
-                        provider="opentripmap",
-                        **normalized_place
-                    )
-                    normalized_place["place_id"] = str(place.id)
-                
-                normalized.append(normalized_place)
-                
+                place_ids = self.places_repo.bulk_upsert_places(
+                    [{"provider": "opentripmap", **place} for place in to_store]
+                )
+                for place in to_store:
+                    place["place_id"] = place_ids[place["external_id"]]
             except Exception as e:
-                logger.warning(f"Error normalizing place: {e}")
-                continue
+                logger.warning(f"Error storing OpenTripMap places: {e}")
+                self.places_repo.db.rollback()
         
         return normalized
 
+    def _feature_to_place(self, feature: Dict[str, Any], properties: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the normalized place of one GeoJSON feature.
+        Args:
+            feature (Dict[str, Any]): Place feature from the API.
+            properties (Dict[str, Any]): The feature's properties.
+        Returns:
+            Dict[str, Any]: Normalized place data.
+        """
+        coordinates = (feature.get("geometry") or {}).get("coordinates")
+        if isinstance(coordinates, (list, tuple)) and len(coordinates) >= 2:
+            lon, lat = coordinates[0], coordinates[1]
+        else:
+            lon = lat = 0
+        
+        return {
+            "external_id": properties.get("xid", ""),
+            "name": properties.get("name", "Unnamed Place"),
+            "lat": lat,
+            "lon": lon,
+            "categories": self._parse_kinds(properties.get("kinds", "")),
+            "rating": properties.get("rate", None),
+            "address": None,  # Not available in basic search
+            "city": None,     # Will be inferred
+            "country": None,  # Will be inferred
+            "raw_json": feature,
+        }
+
     def _normalize_search_response(self, data: Any) -> List[Dict[str, Any]]:
         """Normalize either GeoJSON FeatureCollection or JSON list response.
         Args:
@@ -376,7 +615,7 @@ class OpenTripMapClient:
         """
         if not kinds_string:
             return []
-        return [kind.strip() for kind in kinds_string.split(",") if kind.strip()]
+        return [stripped for kind in kinds_string.split(",") if (stripped := kind.strip())]
     
     def _format_address(self, address_info: Dict[str, Any]) -> Optional[str]:
         """Format address from address components.
@@ -388,21 +627,12 @@ class OpenTripMapClient:
         if not address_info:
             return None
         
-        components = []
-        for field in ["house_number", "road", "city", "country"]:
-            value = address_info.get(field)
-            if value:
-                components.append(str(value))
-        
-        return ", ".join(components) if components else None
-    
-    def close(self):
-        """Close the HTTP client."""
-        self.client.close()
+        address = ", ".join(
+            str(value) for field in _ADDRESS_FIELDS if (value := address_info.get(field))
+        )
+        return address or None
     
-    def __del__(self):
-        """Cleanup on deletion."""
-        try:
-            self.close()
-        except Exception:
-            pass  # Ignore errors during cleanup
\ No newline at end of file
+    async def aclose(self):
+        """Close the HTTP client if this instance created it."""
+        if self._owns_client:
+            await self.client.aclose()
\ No newline at end of file
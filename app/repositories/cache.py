@@ -1,12 +1,14 @@
 """Cache repository for API response caching."""
 
 import hashlib
-import json
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+import orjson
 from sqlalchemy.orm import Session as DBSession
 
 from app.db.models import APICache
+from app.db.upsert import upsert_insert
 
 
 class CacheRepository:
@@ -15,44 +17,49 @@ class CacheRepository:
     def __init__(self, db: DBSession):
         self.db = db
     
-    def _hash_params(self, params: Dict[str, Any]) -> str:
-        """Create a hash of parameters for cache key.
+    def make_cache_key(self, provider: str, endpoint: str, params: Dict[str, Any]) -> str:
+        """Build the cache key for a request.
+        The provider and endpoint are hashed along with the params, so the key
+        alone identifies an entry. Callers that read and then write the same
+        entry build the key once and pass it to both calls.
         Args:
+            provider (str): Data provider name.
+            endpoint (str): API endpoint.
             params (Dict[str, Any]): Parameters dictionary.
         Returns:
-            str: SHA256 hash of the parameters.
+            str: 128-bit BLAKE2b hex digest of the canonical request.
         """
-        params_str = json.dumps(params, sort_keys=True, default=str)
-        return hashlib.sha256(params_str.encode()).hexdigest()
+        canonical = orjson.dumps([provider, endpoint, params], option=orjson.OPT_SORT_KEYS, default=str)
+        return hashlib.blake2b(canonical, digest_size=16).hexdigest()
     
-    def get_cached_response(
-        self, provider: str, endpoint: str, params: Dict[str, Any]
-    ) -> Optional[Dict[str, Any]]:
-        """Get cached response if still valid.
+    def get_cached_entry(self,
+                         provider: str,
+                         endpoint: str,
+                         params: Dict[str, Any],
+                         key: Optional[str] = None,
+                        ) -> Optional[APICache]:
+        """Get the cache entry for a request if still valid.
         Args:
             provider (str): Data provider name.
             endpoint (str): API endpoint.
             params (Dict[str, Any]): Parameters dictionary.
+            key (Optional[str]): Key from make_cache_key, built here if omitted.
         Returns:
-            Optional[Dict[str, Any]]: Cached response JSON or None if not found/expired
+            Optional[APICache]: The cache entry or None if not found/expired
         """
-        params_hash = self._hash_params(params)
+        params_hash = key or self.make_cache_key(provider, endpoint, params)
         
+        # The key covers provider and endpoint, so its unique index is enough
         cache_entry = (
             self.db.query(APICache)
-            .filter(
-                APICache.provider == provider,
-                APICache.endpoint == endpoint,
-                APICache.params_hash == params_hash,
-            )
+            .filter(APICache.params_hash == params_hash)
             .first()
         )
         
         if cache_entry:
             # Check if cache is still valid
-            expires_at = cache_entry.fetched_at + timedelta(seconds=cache_entry.ttl_seconds)
-            if datetime.utcnow() <= expires_at:
-                return cache_entry.response_json
+            if datetime.utcnow() <= self.expires_at(cache_entry):
+                return cache_entry
             else:
                 # Remove expired cache
                 self.db.delete(cache_entry)
@@ -60,12 +67,56 @@ class CacheRepository:
         
         return None
     
+    def get_cached_response(self,
+                            provider: str,
+                            endpoint: str,
+                            params: Dict[str, Any],
+                            key: Optional[str] = None,
+                        ) -> Optional[Dict[str, Any]]:
+        """Get cached response if still valid.
+        Args:
+            provider (str): Data provider name.
+            endpoint (str): API endpoint.
+            params (Dict[str, Any]): Parameters dictionary.
+            key (Optional[str]): Key from make_cache_key, built here if omitted.
+        Returns:
+            Optional[Dict[str, Any]]: Cached response JSON or None if not found/expired
+        """
+        cache_entry = self.get_cached_entry(provider, endpoint, params, key=key)
+        return cache_entry.response_json if cache_entry else None
+    
+    @staticmethod
+    def expires_at(cache_entry: APICache) -> datetime:
+        """Get the UTC time a cache entry stops being valid."""
+        return cache_entry.fetched_at + timedelta(seconds=cache_entry.ttl_seconds)
+    
+    def get_cached_responses(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the still valid cached responses for many keys in one query.
+        Expired entries are skipped but not deleted; the next cache_response
+        for the same key overwrites them.
+        Args:
+            keys (List[str]): Keys from make_cache_key.
+        Returns:
+            Dict[str, Dict[str, Any]]: Cached response JSON by key, for hits only.
+        """
+        if not keys:
+            return {}
+        
+        now = datetime.utcnow()
+        entries = self.db.query(APICache).filter(APICache.params_hash.in_(keys)).all()
+        return {
+            entry.params_hash: entry.response_json
+            for entry in entries
+            if now <= self.expires_at(entry)
+        }
+    
     def cache_response(self,
                         provider: str,
                         endpoint: str,
                         params: Dict[str, Any],
                         response: Dict[str, Any],
                         ttl_seconds: int,
+                        key: Optional[str] = None,
                     ) -> APICache:
         """Cache an API response.
         Args:
@@ -74,71 +125,53 @@ class CacheRepository:
             params (Dict[str, Any]): Parameters dictionary.
             response (Dict[str, Any]): Response data to cache.
             ttl_seconds (int): Time-to-live for the cache entry.
+            key (Optional[str]): Key from make_cache_key, built here if omitted.
         Returns:
             APICache: Created or updated cache entry.
         """
-        params_hash = self._hash_params(params)
+        params_hash = key or self.make_cache_key(provider, endpoint, params)
+        values = dict(
+            provider=provider,
+            endpoint=endpoint,
+            params_hash=params_hash,
+            response_json=response,
+            fetched_at=datetime.utcnow(),
+            ttl_seconds=ttl_seconds,
+        )
         
-        try:
-            # Try to update existing entry first
-            existing = (
-                self.db.query(APICache)
-                .filter(
-                    APICache.provider == provider,
-                    APICache.endpoint == endpoint,
-                    APICache.params_hash == params_hash,
-                )
-                .first()
-            )
-            
-            if existing:
-                # Update existing entry
-                existing.response_json = response
-                existing.fetched_at = datetime.utcnow()
-                existing.ttl_seconds = ttl_seconds
-                self.db.commit()
-                self.db.refresh(existing)
-                return existing
-            else:
-                # Create new cache entry
-                cache_entry = APICache(
-                    provider=provider,
-                    endpoint=endpoint,
-                    params_hash=params_hash,
-                    response_json=response,
-                    ttl_seconds=ttl_seconds,
-                )
-                
-                self.db.add(cache_entry)
-                self.db.commit()
-                self.db.refresh(cache_entry)
-                return cache_entry
-                
-        except Exception as e:
-            # If there's a constraint error, rollback and try to get existing entry
-            self.db.rollback()
-            
-            existing = (
-                self.db.query(APICache)
-                .filter(
-                    APICache.provider == provider,
-                    APICache.endpoint == endpoint,
-                    APICache.params_hash == params_hash,
-                )
-                .first()
-            )
-            
-            if existing:
-                # Update the existing entry
-                existing.response_json = response
-                existing.fetched_at = datetime.utcnow()
-                existing.ttl_seconds = ttl_seconds
-                self.db.commit()
-                self.db.refresh(existing)
-                return existing
-            else:
-                # Re-raise the error if we can't resolve it
-                raise e
+        dialect_insert = upsert_insert(self.db)
+        if dialect_insert is not None:
+            # Single INSERT ... ON CONFLICT DO UPDATE: no read-before-write and
+            # no unique-violation race between concurrent writers
+            stmt = dialect_insert(APICache).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[APICache.params_hash],
+                set_={
+                    column: stmt.excluded[column]
+                    for column in ("provider", "endpoint", "response_json", "fetched_at", "ttl_seconds")
+                },
+            ).returning(APICache)
+            cache_entry = self.db.scalars(
+                stmt, execution_options={"populate_existing": True}
+            ).one()
+            self.db.commit()
+            return cache_entry
+        
+        existing = (
+            self.db.query(APICache)
+            .filter(APICache.params_hash == params_hash)
+            .first()
+        )
+        if existing:
+            for column, value in values.items():
+                setattr(existing, column, value)
+            cache_entry = existing
+        else:
+            cache_entry = APICache(**values)
+            self.db.add(cache_entry)
+        self.db.commit()
+        self.db.refresh(cache_entry)
+        return cache_entry
     
     def clear_expired_cache(self) -> int:
         """Clear all expired cache entries. Returns number of entries cleared.
@@ -1,9 +1,27 @@
 """Hotels repository for database operations."""
 
-from typing import List, Optional
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set
+from sqlalchemy import bindparam, insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session as DBSession
 
 from app.db.models import Hotel
+from app.db.upsert import upsert_insert
+
+
+# Columns refreshed when an upserted hotel already exists
+_HOTEL_UPSERT_COLUMNS = (
+    "name", "lat", "lon", "price_eur_per_night", "rating",
+    "address", "city", "country", "url", "raw_json",
+)
+
+# Stored external IDs of a provider among a set of candidates. Built once with
+# bound parameters (the ID list expands at execution), so every call reuses
+# the same statement and its cached compiled form.
+_EXISTING_EXTERNAL_IDS = select(Hotel.external_id).where(
+    Hotel.provider == bindparam("provider"),
+    Hotel.external_id.in_(bindparam("external_ids", expanding=True)),
+)
 
 
 class HotelRepository:
@@ -25,6 +43,7 @@ class HotelRepository:
                                 country: Optional[str] = None,
                                 url: Optional[str] = None,
                                 raw_json: Optional[dict] = None,
+                                commit: bool = True,
                             ) -> Hotel:
         """Create or update a hotel.
         Args:
@@ -40,6 +59,8 @@ class HotelRepository:
             country (Optional[str]): Country name.
             url (Optional[str]): Hotel URL.
             raw_json (Optional[dict]): Raw JSON data from provider.
+            commit (bool): Commit right away. When False the hotel is only
+                flushed, leaving the commit to the caller.
         Returns:
             Hotel: Created or updated hotel object.
         """
@@ -82,10 +103,114 @@ class HotelRepository:
             )
             self.db.add(hotel)
         
+        if not commit:
+            self.db.flush()
+            return hotel
+        
         self.db.commit()
         self.db.refresh(hotel)
         return hotel
     
+    def bulk_upsert_hotels(self, rows: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Create or update many hotels of one provider in a single statement.
+        Uses one INSERT ... ON CONFLICT (provider, external_id) DO UPDATE
+        where the dialect supports it, otherwise falls back to
+        create_or_update_hotel per row inside a single transaction.
+        Args:
+            rows (List[Dict[str, Any]]): Keyword arguments of create_or_update_hotel,
+                each with a non-empty external_id and all with the same keys.
+        Returns:
+            Dict[str, str]: Hotel ID by external_id.
+        """
+        if not rows:
+            return {}
+        
+        # A statement can't update the same row twice: keep the last duplicate
+        unique_rows = list({row["external_id"]: row for row in rows}.values())
+        
+        dialect_insert = upsert_insert(self.db)
+        if dialect_insert is None:
+            ids = {
+                row["external_id"]: str(self.create_or_update_hotel(**row, commit=False).id)
+                for row in unique_rows
+            }
+            self.db.commit()
+            return ids
+        
+        # Only columns the rows carry are refreshed, so an omitted column
+        # (e.g. raw_json) keeps its stored value
+        stmt = dialect_insert(Hotel).values(unique_rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Hotel.provider, Hotel.external_id],
+            set_={key: stmt.excluded[key] for key in _HOTEL_UPSERT_COLUMNS if key in unique_rows[0]},
+        ).returning(Hotel.external_id, Hotel.id)
+        ids = {external_id: str(hotel_id) for external_id, hotel_id in self.db.execute(stmt)}
+        self.db.commit()
+        return ids
+    
+    def existing_external_ids(self, provider: str, external_ids: Sequence[str]) -> Set[str]:
+        """Find which of the given external IDs a provider already has stored.
+        Args:
+            provider (str): Data provider name.
+            external_ids (Sequence[str]): Candidate external hotel identifiers.
+        Returns:
+            Set[str]: The external IDs that exist.
+        """
+        if not external_ids:
+            return set()
+        return set(
+            self.db.scalars(
+                _EXISTING_EXTERNAL_IDS,
+                {"provider": provider, "external_ids": list(external_ids)},
+            )
+        )
+    
+    def insert_missing_hotels(self,
+                              provider: str,
+                              rows: Sequence[Mapping[str, Any]],
+                            ) -> List[Mapping[str, Any]]:
+        """Insert the hotels of a provider that aren't stored yet.
+        Existing hotels are found with one SELECT on external_id, and the
+        missing ones are written with one INSERT. Stored hotels are left
+        untouched. The INSERT uses ON CONFLICT DO NOTHING where the dialect
+        supports it, so concurrent callers (workers seeding at startup) that
+        both saw a hotel missing don't fail on the unique constraint.
+        Args:
+            provider (str): Data provider name.
+            rows (Sequence[Mapping[str, Any]]): Hotel column values, each with
+                an external_id and all with the same keys.
+        Returns:
+            List[Mapping[str, Any]]: The rows that were inserted.
+        """
+        if not rows:
+            return []
+        
+        existing = self.existing_external_ids(provider, [row["external_id"] for row in rows])
+        missing = [row for row in rows if row["external_id"] not in existing]
+        if not missing:
+            return []
+        
+        dialect_insert = upsert_insert(self.db)
+        if dialect_insert is not None:
+            stmt = (
+                dialect_insert(Hotel)
+                .values([dict(row) for row in missing])
+                .on_conflict_do_nothing(index_elements=[Hotel.provider, Hotel.external_id])
+                .returning(Hotel.external_id)
+            )
+            inserted = set(self.db.scalars(stmt))
+            self.db.commit()
+            return [row for row in missing if row["external_id"] in inserted]
+        
+        try:
+            self.db.execute(insert(Hotel), [dict(row) for row in missing])
+            self.db.commit()
+        except IntegrityError:
+            # Another writer inserted them first
+            self.db.rollback()
+            return []
+        return missing
+    
     def get_hotel(self, hotel_id: str) -> Optional[Hotel]:
         """Get hotel by ID.
         Args:
@@ -1,9 +1,11 @@
 """Itinerary repository for database operations."""
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import date
-from sqlalchemy.orm import Session as DBSession, joinedload
+from sqlalchemy import insert
+from sqlalchemy.orm import Session as DBSession
 
+from app.db.loaders import ITINERARY_FULL_LOAD
 from app.db.models import Itinerary, ItineraryDay, ItineraryItem
 
 
@@ -45,6 +47,27 @@ class ItineraryRepository:
         self.db.refresh(itinerary)
         return itinerary
     
+    def create_itinerary_bulk(self,
+                              itinerary: Dict[str, Any],
+                              days: List[Dict[str, Any]],
+                              items: List[Dict[str, Any]],
+                            ) -> None:
+        """Insert an itinerary with all its days and items in one transaction.
+        Each table gets a single executemany INSERT. Rows must carry
+        pre-generated ``id`` values so days and items can reference their
+        parents without reading anything back.
+        Args:
+            itinerary (Dict[str, Any]): Itinerary column values.
+            days (List[Dict[str, Any]]): Day rows referencing the itinerary id.
+            items (List[Dict[str, Any]]): Item rows referencing their day ids.
+        """
+        self.db.execute(insert(Itinerary), [itinerary])
+        if days:
+            self.db.execute(insert(ItineraryDay), days)
+        if items:
+            self.db.execute(insert(ItineraryItem), items)
+        self.db.commit()
+    
     def get_itinerary(self, itinerary_id: str) -> Optional[Itinerary]:
         """Get itinerary by ID with all related data.
         Args:
@@ -54,9 +77,7 @@ class ItineraryRepository:
         """
         return (
             self.db.query(Itinerary)
-            .options(
-                joinedload(Itinerary.days).joinedload(ItineraryDay.items)
-            )
+            .options(*ITINERARY_FULL_LOAD)
             .filter(Itinerary.id == itinerary_id)
             .first()
         )
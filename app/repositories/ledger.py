@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session as DBSession
 from sqlalchemy import func, desc
 
 from app.db.models import LLMLedger
+from app.utils.dates import current_month_key
 
 
 class LedgerRepository:
@@ -33,16 +34,13 @@ class LedgerRepository:
         Returns:
             LLMLedger: Created ledger entry.
         """
-        now = datetime.utcnow()
-        month_key = now.strftime("%Y-%m")
-        
+        # month_key is generated by the database from created_at
         ledger_entry = LLMLedger(
             session_id=session_id,
             model=model,
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
             cost_usd=cost_usd,
-            month_key=month_key,
             blocked_after=blocked_after,
         )
         
@@ -60,7 +58,7 @@ class LedgerRepository:
             float: Total spend for the month.
         """
         if month_key is None:
-            month_key = datetime.utcnow().strftime("%Y-%m")
+            month_key = current_month_key()
         
         result = (
             self.db.query(func.sum(LLMLedger.cost_usd))
@@ -89,7 +87,7 @@ class LedgerRepository:
             Dict[str, Any]: Monthly statistics including total cost, tokens, calls, and blocked calls
         """
         if month_key is None:
-            month_key = datetime.utcnow().strftime("%Y-%m")
+            month_key = current_month_key()
         
         # Total spend and tokens
         totals = (
@@ -105,10 +103,11 @@ class LedgerRepository:
         
         # Blocked calls count
         blocked_calls = (
-            self.db.query(func.count(LLMLedger.id))
+            self.db.query(func.count())
+            .select_from(LLMLedger)
             .filter(
                 LLMLedger.month_key == month_key,
-                LLMLedger.blocked_after == True
+                LLMLedger.blocked_after.is_(True),
             )
             .scalar() or 0
         )
@@ -1,8 +1,8 @@
 """Message repository for database operations."""
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session as DBSession
-from sqlalchemy import desc
+from sqlalchemy import desc, insert, select
 
 from app.db.models import Message
 
@@ -45,6 +45,18 @@ class MessageRepository:
         self.db.refresh(message)
         return message
     
+    def create_messages(self, rows: List[Dict[str, Any]]) -> None:
+        """Create several messages with one INSERT and a single commit.
+        Args:
+            rows (List[Dict[str, Any]]): Column values per message; at least
+                session_id, role and content. Pass created_at explicitly when
+                the rows must keep a particular order.
+        """
+        if not rows:
+            return
+        self.db.execute(insert(Message), rows)
+        self.db.commit()
+    
     def get_messages_by_session(self, session_id: str) -> List[Message]:
         """Get all messages for a session ordered by creation time.
         Args:
@@ -82,4 +94,25 @@ class MessageRepository:
             .order_by(desc(Message.created_at))
             .limit(limit)
             .all()
-        )
\ No newline at end of file
+        )
+    
+    def get_recent_history(self, session_id: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """Get the latest user/assistant turns of a session for LLM context.
+        Only the role and content columns are selected, so no ORM objects
+        are built.
+        Args:
+            session_id (str): Session identifier.
+            limit (int): Number of recent messages to retrieve.
+        Returns:
+            List[Tuple[str, str]]: (role, content) pairs in chronological order.
+        """
+        rows = self.db.execute(
+            select(Message.role, Message.content)
+            .where(
+                Message.session_id == session_id,
+                Message.role.in_(("user", "assistant")),
+            )
+            .order_by(desc(Message.created_at))
+            .limit(limit)
+        ).all()
+        return [(role, content) for role, content in reversed(rows)]
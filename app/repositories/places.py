@@ -1,9 +1,17 @@
 """Places repository for database operations."""
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import Session as DBSession
 
 from app.db.models import Place
+from app.db.upsert import upsert_insert
+
+
+# Columns refreshed when an upserted place already exists
+_PLACE_UPSERT_COLUMNS = (
+    "name", "lat", "lon", "categories", "rating",
+    "address", "city", "country", "raw_json",
+)
 
 
 class PlaceRepository:
@@ -24,6 +32,7 @@ class PlaceRepository:
                                 city: Optional[str] = None,
                                 country: Optional[str] = None,
                                 raw_json: Optional[dict] = None,
+                                commit: bool = True,
                             ) -> Place:
         """Create or update a place.
         Args:
@@ -38,6 +47,8 @@ class PlaceRepository:
             city (Optional[str]): City name.
             country (Optional[str]): Country name.
             raw_json (Optional[dict]): Raw JSON data from provider.
+            commit (bool): Commit right away. When False the place is only
+                flushed, leaving the commit to the caller.
         Returns:
             Place: Created or updated place object.
         """
@@ -76,10 +87,51 @@ class PlaceRepository:
             )
             self.db.add(place)
         
+        if not commit:
+            self.db.flush()
+            return place
+        
         self.db.commit()
         self.db.refresh(place)
         return place
     
+    def bulk_upsert_places(self, rows: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Create or update many places of one provider in a single statement.
+        Uses one INSERT ... ON CONFLICT (provider, external_id) DO UPDATE
+        where the dialect supports it, otherwise falls back to
+        create_or_update_place per row inside a single transaction.
+        Args:
+            rows (List[Dict[str, Any]]): Keyword arguments of create_or_update_place,
+                each with a non-empty external_id and all with the same keys.
+        Returns:
+            Dict[str, str]: Place ID by external_id.
+        """
+        if not rows:
+            return {}
+        
+        # A statement can't update the same row twice: keep the last duplicate
+        unique_rows = list({row["external_id"]: row for row in rows}.values())
+        
+        dialect_insert = upsert_insert(self.db)
+        if dialect_insert is None:
+            ids = {
+                row["external_id"]: str(self.create_or_update_place(**row, commit=False).id)
+                for row in unique_rows
+            }
+            self.db.commit()
+            return ids
+        
+        # One multi-row VALUES statement. A search returns at most a few
+        # dozen places, too few for COPY into a staging table to pay off.
+        stmt = dialect_insert(Place).values(unique_rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Place.provider, Place.external_id],
+            set_={key: stmt.excluded[key] for key in _PLACE_UPSERT_COLUMNS if key in unique_rows[0]},
+        ).returning(Place.external_id, Place.id)
+        ids = {external_id: str(place_id) for external_id, place_id in self.db.execute(stmt)}
+        self.db.commit()
+        return ids
+    
     def get_place(self, place_id: str) -> Optional[Place]:
         """Get place by ID.
         Args:
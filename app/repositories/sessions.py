@@ -1,5 +1,6 @@
 """Session repository for database operations."""
 
+import uuid
 from typing import Optional
 from sqlalchemy.orm import Session as DBSession
 
@@ -36,12 +37,14 @@ class SessionRepository:
         Returns:
             Optional[Session]: Session object or None if not found.
         """
-        return self.db.query(Session).filter(Session.id == session_id).first()
+        # Primary-key get() is answered from the identity map when the session
+        # was already loaded or created in this unit of work, skipping the SELECT
+        return self.db.get(Session, uuid.UUID(str(session_id)))
     
-    def get_sessions_by_ip_hash(self, ip_hash: str) -> list[Session]:
+    def get_sessions_by_ip_hash(self, ip_hash: int) -> list[Session]:
         """Get sessions by IP hash.
         Args:
-            ip_hash (str): Hashed IP address.
+            ip_hash (int): Hashed IP address.
         Returns:
             list[Session]: List of session objects.
         """
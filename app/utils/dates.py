@@ -0,0 +1,37 @@
+"""Date helpers shared by the spend tracking code.
+
+The spend cap and the ledger key everything by the current UTC month. That
+key is looked up several times per chat turn, so it is computed once and
+reused until the month rolls over instead of being re-formatted each call.
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import Tuple
+
+# (valid_until as a UNIX timestamp, "YYYY-MM")
+_month_cache: Tuple[float, str] = (0.0, "")
+
+
+def _next_month_start(now: datetime) -> datetime:
+    """Return midnight UTC on the first day of the month after ``now``."""
+    if now.month == 12:
+        return now.replace(year=now.year + 1, month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    return now.replace(month=now.month + 1, day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def current_month_key() -> str:
+    """Get the current UTC month as a 'YYYY-MM' key.
+
+    Returns:
+        str: The month key, e.g. '2024-05'.
+    """
+    global _month_cache
+    valid_until, key = _month_cache
+    if time.time() < valid_until:
+        return key
+
+    now = datetime.now(timezone.utc)
+    key = f"{now.year:04d}-{now.month:02d}"
+    _month_cache = (_next_month_start(now).timestamp(), key)
+    return key
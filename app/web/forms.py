@@ -4,6 +4,8 @@ from datetime import date
 from typing import Optional
 from pydantic import BaseModel, Field, validator
 
+from app.orchestration.actions_schema import BUDGET_TIERS
+
 
 class ChatForm(BaseModel):
     """Form for chat messages."""
@@ -18,7 +20,7 @@ class ChatForm(BaseModel):
     @validator('budget_tier')
     def validate_budget_tier(cls, v):
         """Validate budget tier value."""
-        if v is not None and v not in ['budget', 'mid', 'premium']:
+        if v is not None and v not in BUDGET_TIERS:
             raise ValueError('Budget tier must be budget, mid, or premium')
         return v
     
@@ -2,16 +2,27 @@
 
 import logging
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, Dict, Any
 
+import httpx
+import orjson
+
 from fastapi import APIRouter, Depends, HTTPException, Request, Form, status
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, FileResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
-from app.config import get_settings, Settings
-from app.deps import get_db, get_admin_user, hash_ip
+from app.config import Settings
+from app.deps import (
+    get_app_settings,
+    get_db,
+    get_admin_user,
+    get_openai_client,
+    get_opentripmap_client,
+    get_rapidapi_client,
+    hash_ip,
+)
 from app.orchestration.llm_orchestrator import LLMOrchestrator
 from app.repositories.sessions import SessionRepository
 from app.repositories.messages import MessageRepository
@@ -19,6 +30,7 @@ from app.repositories.itineraries import ItineraryRepository
 from app.repositories.ledger import LedgerRepository
 from app.repositories.cache import CacheRepository
 from app.web.forms import ChatForm
+from app.utils.dates import current_month_key
 from app.utils.tokens import estimate_tokens
 
 logger = logging.getLogger(__name__)
@@ -100,6 +112,65 @@ except Exception:
         return (text or "").replace("\n", "<br>")
 
 
+def _parse_chat_form(
+    message: str,
+    city: Optional[str],
+    country: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    budget_tier: Optional[str],
+) -> ChatForm:
+    """Validate the submitted chat form fields.
+    Raises:
+        HTTPException: 400 if a date or any other field is invalid.
+    """
+    form_data = {
+        "message": message,
+        "city": city,
+        "country": country,
+        "budget_tier": budget_tier,
+    }
+    
+    # Parse dates if provided
+    if start_date:
+        try:
+            form_data["start_date"] = date.fromisoformat(start_date)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid start date format")
+    
+    if end_date:
+        try:
+            form_data["end_date"] = date.fromisoformat(end_date)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid end date format")
+    
+    # Validate using Pydantic
+    try:
+        return ChatForm(**form_data)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _resolve_session(request: Request, db: Session, settings: Settings, session_id: Optional[str]):
+    """Get the submitted session, or create a new one if it is missing or invalid."""
+    session_repo = SessionRepository(db)
+    if session_id:
+        try:
+            session = session_repo.get_session(str(uuid.UUID(session_id)))
+            if session:
+                return session
+        except ValueError:
+            pass  # Invalid UUID, create new session
+    return session_repo.create_session(request.client.host, settings.ip_hash_salt)
+
+
+def _destination_context(form: ChatForm) -> Optional[str]:
+    """Combine structured destination fields for LLM context only."""
+    if form.city and form.country:
+        return f"{form.city}, {form.country}"
+    return form.city or form.country or None
+
+
 @router.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """Home page with chat interface."""
@@ -125,83 +196,36 @@ async def chat(
     budget_tier: Optional[str] = Form("mid"),
     session_id: Optional[str] = Form(None),
     db: Session = Depends(get_db),
-    settings: Settings = Depends(get_settings),
+    settings: Settings = Depends(get_app_settings),
+    openai_client: Optional[httpx.AsyncClient] = Depends(get_openai_client),
+    opentripmap_client: Optional[httpx.AsyncClient] = Depends(get_opentripmap_client),
+    rapidapi_client: Optional[httpx.AsyncClient] = Depends(get_rapidapi_client),
 ):
     """Handle chat form submission."""
     
     try:
-        # Validate form data
-        form_data = {
-            "message": message,
-            "city": city,
-            "country": country,
-            "budget_tier": budget_tier,
-        }
-        
-        # Parse dates if provided
-        parsed_start_date = None
-        parsed_end_date = None
-        if start_date:
-            try:
-                parsed_start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-                form_data["start_date"] = parsed_start_date
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid start date format")
-        
-        if end_date:
-            try:
-                parsed_end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-                form_data["end_date"] = parsed_end_date
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid end date format")
-        
-        # Validate using Pydantic
-        try:
-            form = ChatForm(**form_data)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=str(e))
-        
-        # Get or create session
-        session_repo = SessionRepository(db)
-        if session_id:
-            try:
-                session_uuid = uuid.UUID(session_id)
-                session = session_repo.get_session(str(session_uuid))
-                if not session:
-                    # Create new session if not found
-                    client_ip = request.client.host
-                    session = session_repo.create_session(client_ip, settings.ip_hash_salt)
-            except ValueError:
-                # Invalid UUID, create new session
-                client_ip = request.client.host
-                session = session_repo.create_session(client_ip, settings.ip_hash_salt)
-        else:
-            # Create new session
-            client_ip = request.client.host
-            session = session_repo.create_session(client_ip, settings.ip_hash_salt)
+        form = _parse_chat_form(message, city, country, start_date, end_date, budget_tier)
+        session = _resolve_session(request, db, settings, session_id)
         
         # Process chat message
-        orchestrator = LLMOrchestrator(settings, db)
+        orchestrator = LLMOrchestrator(
+            settings,
+            db,
+            openai_client=openai_client,
+            opentripmap_client=opentripmap_client,
+            rapidapi_client=rapidapi_client,
+        )
         try:
-            # Combine structured destination fields for LLM context only
-            destination_context = None
-            if form.city and form.country:
-                destination_context = f"{form.city}, {form.country}"
-            elif form.city:
-                destination_context = form.city
-            elif form.country:
-                destination_context = form.country
-
             result = await orchestrator.process_chat_message(
                 session_id=str(session.id),
                 user_message=form.message,
-                destination=destination_context,
+                destination=_destination_context(form),
                 start_date=start_date,
                 end_date=end_date,
                 budget_tier=form.budget_tier,
             )
         finally:
-            orchestrator.close()
+            await orchestrator.aclose()
         
         # Get conversation history
         message_repo = MessageRepository(db)
@@ -243,6 +267,68 @@ async def chat(
         raise HTTPException(status_code=500, detail="Internal server error: Error in chat endpoint")
 
 
+def _sse_event(data: Any, event: Optional[str] = None) -> bytes:
+    """Encode one server-sent event with a JSON payload."""
+    payload = b"data: " + orjson.dumps(data) + b"\n\n"
+    return b"event: " + event.encode() + b"\n" + payload if event else payload
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: Request,
+    message: str = Form(...),
+    city: Optional[str] = Form(None),
+    country: Optional[str] = Form(None),
+    start_date: Optional[str] = Form(None),
+    end_date: Optional[str] = Form(None),
+    budget_tier: Optional[str] = Form("mid"),
+    session_id: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+    settings: Settings = Depends(get_app_settings),
+    openai_client: Optional[httpx.AsyncClient] = Depends(get_openai_client),
+    opentripmap_client: Optional[httpx.AsyncClient] = Depends(get_opentripmap_client),
+    rapidapi_client: Optional[httpx.AsyncClient] = Depends(get_rapidapi_client),
+):
+    """Handle chat form submission, streaming the reply as server-sent events.
+    Each chunk of the reply is a ``data:`` event holding a JSON string. A
+    final ``done`` event carries the turn's outcome, including the
+    itinerary_id when the reply finalized one. The session ID to send with
+    the next message is returned in the X-Session-ID header.
+    """
+    form = _parse_chat_form(message, city, country, start_date, end_date, budget_tier)
+    session = _resolve_session(request, db, settings, session_id)
+    
+    async def reply():
+        orchestrator = LLMOrchestrator(
+            settings,
+            db,
+            openai_client=openai_client,
+            opentripmap_client=opentripmap_client,
+            rapidapi_client=rapidapi_client,
+        )
+        result: Dict[str, Any] = {}
+        try:
+            async for chunk in orchestrator.stream_chat_message(
+                session_id=str(session.id),
+                user_message=form.message,
+                destination=_destination_context(form),
+                start_date=start_date,
+                end_date=end_date,
+                budget_tier=form.budget_tier,
+                result=result,
+            ):
+                yield _sse_event(chunk)
+        finally:
+            await orchestrator.aclose()
+        yield _sse_event(result, event="done")
+    
+    return StreamingResponse(
+        reply(),
+        media_type="text/event-stream",
+        headers={"X-Session-ID": str(session.id), "Cache-Control": "no-cache"},
+    )
+
+
 @router.get("/api/v1/itineraries/{itinerary_id}")
 async def export_itinerary(
     itinerary_id: str,
@@ -251,6 +337,11 @@ async def export_itinerary(
     """Export itinerary as JSON."""
     
     try:
+        try:
+            uuid.UUID(itinerary_id)
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Itinerary not found")
+
         itinerary_repo = ItineraryRepository(db)
         itinerary = itinerary_repo.get_itinerary(itinerary_id)
         
@@ -311,7 +402,7 @@ async def export_itinerary(
             
             export_data["days"].append(day_data)
         
-        return JSONResponse(content=export_data)
+        return ORJSONResponse(content=export_data)
         
     except HTTPException:
         raise
@@ -325,7 +416,7 @@ async def admin_dashboard(
     request: Request,
     admin_user: str = Depends(get_admin_user),
     db: Session = Depends(get_db),
-    settings: Settings = Depends(get_settings),
+    settings: Settings = Depends(get_app_settings),
 ):
     """Admin dashboard."""
     
@@ -335,7 +426,7 @@ async def admin_dashboard(
         cache_repo = CacheRepository(db)
         
         # Spend cap info
-        current_month = datetime.utcnow().strftime("%Y-%m")
+        current_month = current_month_key()
         monthly_stats = ledger_repo.get_monthly_stats(current_month)
         daily_costs = ledger_repo.get_daily_costs(30)
         recent_usage = ledger_repo.get_recent_usage(20)
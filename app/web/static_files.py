@@ -0,0 +1,33 @@
+"""Static file serving with browser caching headers."""
+
+import os
+
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that adds a ``Cache-Control`` header to every file response.
+
+    Lets browsers reuse stylesheets and icons across page loads instead of
+    revalidating each one on every chat round-trip.
+    """
+
+    def __init__(self, *args, max_age: int = 86400, immutable: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        directives = ["public", f"max-age={max_age}"]
+        if immutable:
+            directives.append("immutable")
+        self.cache_control = ", ".join(directives)
+
+    def file_response(
+        self,
+        full_path: "os.PathLike[str] | str",
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers["Cache-Control"] = self.cache_control
+        return response
@@ -48,6 +48,6 @@ async def test_live_radius_returns_pois():
         assert isinstance(results, list)
         assert len(results) > 0
 
-        client.close()
+        await client.aclose()
     finally:
         db.close()
@@ -52,4 +52,4 @@ async def test_search_hotels_live(db_session):
         # If key is valid and API reachable, expect 1+ results
         assert len(out) >= 0  # DO NOT assert >0 to avoid flakiness
     finally:
-        provider.close()
+        await provider.aclose()
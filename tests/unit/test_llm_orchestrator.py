@@ -0,0 +1,599 @@
+"""Unit tests for the LLM orchestrator's tool-action handling.
+
+Covers:
+- Unknown actions and argument validation errors
+- Dispatch of validated actions to the provider-backed handlers
+- Itinerary finalization persisting days and items
+- The pre-serialized, read-only tool schema sent to the LLM
+- Concurrent execution of independent search tool calls
+- Streaming replies and buffering of streamed tool calls
+"""
+
+import asyncio
+from datetime import date, time
+from typing import Any, Dict, List, Optional
+
+import orjson
+import pytest
+import pytest_asyncio
+from pydantic import ValidationError
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.config import Settings
+from app.db.base import Base
+from app.orchestration.actions_schema import (
+    ACTION_ADAPTER, TOOL_SCHEMA, TOOL_SCHEMA_JSON, ActionResult, SearchPOIsAction
+)
+from app.orchestration.llm_orchestrator import (
+    LLMOrchestrator, _format_form_context, _may_contain_pseudo_call, create_openai_client
+)
+from app.orchestration.spend_cap import SpendCapManager
+from app.repositories.itineraries import ItineraryRepository
+from app.repositories.messages import MessageRepository
+from app.repositories.sessions import SessionRepository
+
+
+@pytest.fixture()
+def settings() -> Settings:
+    return Settings(
+        openai_api_key="test-openai",
+        admin_password="admin",
+        secret_key="secret",
+        ip_hash_salt="salt",
+        opentripmap_api_key="otm-test",
+        debug=True,
+        api_cache_ttl_seconds=60,
+    )
+
+
+@pytest.fixture()
+def db_session():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest_asyncio.fixture()
+async def orchestrator(settings: Settings, db_session):
+    orch = LLMOrchestrator(settings, db_session)
+    try:
+        yield orch
+    finally:
+        await orch.aclose()
+
+
+@pytest.fixture()
+def session_id(db_session) -> str:
+    return str(SessionRepository(db_session).create_session("127.0.0.1", "salt").id)
+
+
+@pytest.mark.asyncio
+async def test_unknown_action_is_rejected(orchestrator: LLMOrchestrator, session_id: str):
+    result = await orchestrator._execute_action({"action": "book_flight", "city": "Rome"}, session_id)
+    assert result.success is False
+    assert result.action == "book_flight"
+    assert "Unknown action" in result.error
+
+
+@pytest.mark.asyncio
+async def test_invalid_arguments_are_reported(orchestrator: LLMOrchestrator, session_id: str):
+    result = await orchestrator._execute_action({"action": "search_hotels"}, session_id)
+    assert result.success is False
+    assert result.action == "search_hotels"
+    assert "city" in result.error
+
+
+@pytest.mark.asyncio
+async def test_search_hotels_dispatches_validated_action(orchestrator: LLMOrchestrator, session_id: str):
+    captured: Dict[str, Any] = {}
+
+    async def fake_search_hotels(city, country=None, budget_tier="mid", limit=10):
+        captured.update(city=city, country=country, budget_tier=budget_tier, limit=limit)
+        return [{"name": "Hotel 1"}]
+
+    orchestrator.hotel_provider.search_hotels = fake_search_hotels  # type: ignore
+
+    result = await orchestrator._execute_action(
+        {"action": "search_hotels", "city": "Rome", "budget_tier": "budget"}, session_id
+    )
+    assert result.success is True
+    assert result.data["count"] == 1
+    assert result.empty is False
+    assert captured == {"city": "Rome", "country": None, "budget_tier": "budget", "limit": 10}
+
+
+@pytest.mark.asyncio
+async def test_empty_hotel_search_is_flagged(orchestrator: LLMOrchestrator, session_id: str):
+    async def fake_search_hotels(city, country=None, budget_tier="mid", limit=10):
+        return []
+
+    orchestrator.hotel_provider.search_hotels = fake_search_hotels  # type: ignore
+
+    result = await orchestrator._execute_action({"action": "search_hotels", "city": "Rome"}, session_id)
+    assert result.success is True
+    assert result.empty is True
+
+
+@pytest.mark.asyncio
+async def test_finalize_itinerary_persists_days_and_items(
+    orchestrator: LLMOrchestrator, session_id: str, db_session
+):
+    days: List[Dict[str, Any]] = [
+        {
+            "day_index": 1,
+            "date": "2026-05-01",
+            "activities": [
+                {"type": "poi", "name": "Colosseum", "notes": "Book ahead", "start_time": "09:30"},
+                {"type": "meal", "name": "Trattoria"},
+            ],
+        },
+        {"day_index": 2, "date": "2026-05-02", "activities": [{"type": "poi", "name": "Pantheon"}]},
+    ]
+
+    result = await orchestrator._execute_action(
+        {
+            "action": "finalize_itinerary",
+            "city": "Rome",
+            "country": "Italy",
+            "start_date": "2026-05-01",
+            "end_date": "2026-05-02",
+            "budget_tier": "mid",
+            "days": days,
+        },
+        session_id,
+    )
+    assert result.success is True
+    assert result.data["days_count"] == 2
+
+    itinerary = ItineraryRepository(db_session).get_itinerary(result.data["itinerary_id"])
+    assert itinerary is not None
+    ordered = sorted(itinerary.days, key=lambda d: d.day_index)
+    assert [len(d.items) for d in ordered] == [2, 1]
+    assert {i.notes for i in ordered[0].items} == {"Colosseum - Book ahead", "Trattoria"}
+    assert {i.start_time for i in ordered[0].items} == {time(9, 30), None}
+    assert [d.date for d in ordered] == [date(2026, 5, 1), date(2026, 5, 2)]
+
+
+class FakeResponse:
+    def __init__(self, payload: Dict[str, Any]):
+        self.content = orjson.dumps(payload)
+
+    def raise_for_status(self) -> None:
+        return None
+
+
+@pytest.mark.asyncio
+async def test_llm_request_embeds_preserialized_tool_schema(orchestrator: LLMOrchestrator, session_id: str):
+    sent: Dict[str, Any] = {}
+
+    async def fake_post(url, content=None, headers=None, **kwargs):
+        sent.update(url=url, body=orjson.loads(content), headers=headers)
+        return FakeResponse({
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5},
+            "choices": [{"message": {"content": "Hello!"}}],
+        })
+
+    orchestrator.openai_client.post = fake_post  # type: ignore
+
+    result = await orchestrator._call_llm_with_tools([{"role": "user", "content": "Hi"}], session_id)
+    assert result["success"] is True
+    assert result["content"] == "Hello!"
+    assert sent["headers"]["Content-Type"] == "application/json"
+    assert sent["body"]["tools"] == [orjson.loads(TOOL_SCHEMA_JSON)]
+    assert sent["body"]["tools"][0]["function"]["name"] == "execute_travel_action"
+
+
+def test_tool_schema_is_read_only():
+    with pytest.raises(TypeError):
+        TOOL_SCHEMA["type"] = "other"  # type: ignore[index]
+    with pytest.raises(TypeError):
+        TOOL_SCHEMA["function"]["parameters"]["required"][0] = "city"  # type: ignore[index]
+
+
+def test_actions_are_frozen_and_ignore_foreign_fields():
+    action = ACTION_ADAPTER.validate_python(
+        {"action": "search_pois", "city": "Rome", "budget_tier": "mid"}
+    )
+    assert isinstance(action, SearchPOIsAction)
+    with pytest.raises(ValidationError):
+        action.city = "Paris"  # type: ignore[misc]
+
+
+@pytest.mark.asyncio
+async def test_finalize_rejects_unknown_activity_type(orchestrator: LLMOrchestrator, session_id: str):
+    result = await orchestrator._execute_action(
+        {
+            "action": "finalize_itinerary",
+            "city": "Rome",
+            "start_date": "2026-05-01",
+            "end_date": "2026-05-01",
+            "days": [
+                {"day_index": 1, "date": "2026-05-01", "activities": [{"type": "spa", "name": "Terme"}]}
+            ],
+        },
+        session_id,
+    )
+    assert result.success is False
+    assert "days.0.activities.0.type" in result.error
+
+
+def test_finalize_dates_are_parsed_on_ingress():
+    action = ACTION_ADAPTER.validate_python(
+        {
+            "action": "finalize_itinerary",
+            "city": "Rome",
+            "start_date": "2026-05-01",
+            "end_date": "2026-05-03",
+            "days": [],
+        }
+    )
+    assert action.start_date == date(2026, 5, 1)
+    assert action.end_date == date(2026, 5, 3)
+
+
+@pytest.mark.asyncio
+async def test_shared_openai_client_is_not_closed_by_orchestrator(settings: Settings, db_session):
+    shared = create_openai_client(settings)
+    try:
+        orch = LLMOrchestrator(settings, db_session, openai_client=shared)
+        await orch.aclose()
+        assert orch.openai_client is shared
+        assert shared.is_closed is False
+    finally:
+        await shared.aclose()
+
+
+
+@pytest.mark.asyncio
+async def test_llm_semaphore_is_shared_across_orchestrators(settings: Settings, db_session):
+    first = LLMOrchestrator(settings, db_session)
+    second = LLMOrchestrator(settings, db_session)
+    try:
+        assert first._llm_sem is second._llm_sem
+    finally:
+        await first.aclose()
+        await second.aclose()
+
+@pytest.mark.asyncio
+async def test_unknown_budget_tier_is_rejected(orchestrator: LLMOrchestrator, session_id: str):
+    result = await orchestrator._execute_action(
+        {"action": "search_hotels", "city": "Rome", "budget_tier": "luxury"}, session_id
+    )
+    assert result.success is False
+    assert "budget_tier" in result.error
+
+
+@pytest.mark.asyncio
+async def test_raw_tool_arguments_are_decoded_in_one_pass(orchestrator: LLMOrchestrator, session_id: str):
+    async def fake_search_hotels(city, country=None, budget_tier="mid", limit=10):
+        return []
+
+    orchestrator.hotel_provider.search_hotels = fake_search_hotels  # type: ignore
+
+    result = await orchestrator._execute_action('{"action": "search_hotels", "city": "Rome"}', session_id)
+    assert result.success is True
+    assert result.action == "search_hotels"
+
+    for bad in ('{"action": "search_hotels", "city":', '["search_hotels"]'):
+        result = await orchestrator._execute_action(bad, session_id)
+        assert result.success is False
+        assert result.error == "Invalid tool call format"
+
+    result = await orchestrator._execute_action('{"action": "book_flight"}', session_id)
+    assert result.action == "book_flight"
+    assert "Unknown action" in result.error
+
+
+@pytest.mark.asyncio
+async def test_search_tool_calls_run_concurrently_and_keep_order(
+    orchestrator: LLMOrchestrator, session_id: str
+):
+    pois_started = asyncio.Event()
+
+    async def fake_search_hotels(city, country=None, budget_tier="mid", limit=10):
+        # Only completes if the POI search is running at the same time
+        await asyncio.wait_for(pois_started.wait(), timeout=1)
+        return [{"name": "Hotel 1"}]
+
+    async def fake_search_places_by_radius(lat, lon, kinds=None, limit=20):
+        pois_started.set()
+        return [{"name": "Colosseum"}]
+
+    orchestrator.hotel_provider.search_hotels = fake_search_hotels  # type: ignore
+    orchestrator.opentripmap.search_places_by_radius = fake_search_places_by_radius  # type: ignore
+
+    def call(arguments: str) -> Dict[str, Any]:
+        return {"function": {"name": "execute_travel_action", "arguments": arguments}}
+
+    result = await orchestrator._handle_tool_calls(
+        [
+            call('{"action": "search_hotels", "city": "Rome"}'),
+            call('{"action": "search_pois", "city": "Rome"}'),
+            call('{"action": "book_flight"}'),
+        ],
+        session_id,
+        prompt_tokens=0,
+        completion_tokens=0,
+    )
+    assert result["success"] is True
+    content = result["content"]
+    assert content.index("hotels in Rome") < content.index("places in Rome") < content.index("book_flight")
+
+
+@pytest.mark.asyncio
+async def test_fallback_call_reuses_original_messages(orchestrator: LLMOrchestrator, session_id: str):
+    sent: List[Dict[str, Any]] = []
+
+    async def fake_post(url, content=None, headers=None, **kwargs):
+        sent.append(orjson.loads(content))
+        return FakeResponse({
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5},
+            "choices": [{"message": {"content": "Here is a plan from what I know."}}],
+        })
+
+    orchestrator.openai_client.post = fake_post  # type: ignore
+
+    messages = [
+        {"role": "system", "content": "prompt"},
+        {"role": "user", "content": "Plan a trip to Atlantis"},
+    ]
+    result = await orchestrator._handle_tool_calls(
+        [{"function": {"name": "execute_travel_action",
+                       "arguments": '{"action": "search_pois", "city": "Atlantis"}'}}],
+        session_id,
+        prompt_tokens=1,
+        completion_tokens=1,
+        messages=messages,
+    )
+    assert result["content"] == "Here is a plan from what I know."
+    assert result["prompt_tokens"] == 11
+
+    body = sent[0]
+    assert body["messages"][:2] == messages
+    assert body["messages"][2]["content"].startswith("Tool results:")
+    assert body["tool_choice"] == "none"
+    assert body["tools"] == [orjson.loads(TOOL_SCHEMA_JSON)]
+
+
+@pytest.mark.asyncio
+async def test_chat_history_is_sent_once_in_order(
+    orchestrator: LLMOrchestrator, session_id: str, db_session
+):
+    sent: List[Dict[str, Any]] = []
+
+    async def fake_post(url, content=None, headers=None, **kwargs):
+        sent.append(orjson.loads(content))
+        return FakeResponse({
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5},
+            "choices": [{"message": {"content": f"Reply {len(sent)}"}}],
+        })
+
+    orchestrator.openai_client.post = fake_post  # type: ignore
+
+    await orchestrator.process_chat_message(session_id, "First question")
+    await orchestrator.process_chat_message(session_id, "Second question")
+
+    turns = [(m["role"], m["content"]) for m in sent[1]["messages"] if m["role"] != "system"]
+    assert turns == [
+        ("user", "First question"),
+        ("assistant", "Reply 1"),
+        ("user", "Second question"),
+    ]
+
+    stored = MessageRepository(db_session).get_messages_by_session(session_id)
+    assert [(m.role, m.content) for m in stored] == [
+        ("user", "First question"),
+        ("assistant", "Reply 1"),
+        ("user", "Second question"),
+        ("assistant", "Reply 2"),
+    ]
+
+
+
+@pytest.mark.asyncio
+async def test_call_that_would_cross_spend_cap_is_not_made(
+    settings: Settings, db_session, session_id: str
+):
+    # Far below the cost of a 1500-token completion
+    capped = settings.model_copy(update={"monthly_spend_cap_usd": 0.01})
+    orch = LLMOrchestrator(capped, db_session)
+
+    async def fake_post(*args, **kwargs):
+        raise AssertionError("OpenAI must not be called when the cap would be crossed")
+
+    orch.openai_client.post = fake_post  # type: ignore
+    try:
+        result = await orch.process_chat_message(session_id, "Plan a trip to Rome")
+    finally:
+        await orch.aclose()
+
+    assert result["spend_capped"] is True
+    stored = MessageRepository(db_session).get_messages_by_session(session_id)
+    assert [m.role for m in stored] == ["user", "assistant"]
+
+
+class FakeStream:
+    """Minimal stand-in for the response of ``AsyncClient.stream``."""
+
+    def __init__(self, chunks: List[Dict[str, Any]]):
+        self._lines = [f"data: {orjson.dumps(c).decode()}" for c in chunks] + ["", "data: [DONE]"]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def raise_for_status(self) -> None:
+        return None
+
+    async def aiter_lines(self):
+        for line in self._lines:
+            yield line
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_text_deltas_and_stores_reply(
+    orchestrator: LLMOrchestrator, db_session, session_id: str
+):
+    chunks = [
+        {"choices": [{"delta": {"content": "Hello"}}]},
+        {"choices": [{"delta": {"content": " there"}, "finish_reason": "stop"}]},
+        {"choices": [], "usage": {"prompt_tokens": 12, "completion_tokens": 2}},
+    ]
+    orchestrator.openai_client.stream = lambda *args, **kwargs: FakeStream(chunks)  # type: ignore
+
+    received = [c async for c in orchestrator.stream_chat_message(session_id, "Hi")]
+
+    assert received == ["Hello", " there"]
+    stored = MessageRepository(db_session).get_messages_by_session(session_id)
+    assert [(m.role, m.content) for m in stored] == [("user", "Hi"), ("assistant", "Hello there")]
+    assert stored[1].tokens_in == 12
+
+
+@pytest.mark.asyncio
+async def test_stream_buffers_tool_call_fragments(
+    orchestrator: LLMOrchestrator, session_id: str
+):
+    arguments = '{"action": "search_hotels", "city": "Paris", "budget_tier": "mid"}'
+    chunks = [
+        {"choices": [{"delta": {"tool_calls": [
+            {"index": 0, "function": {"name": "execute_travel_action", "arguments": arguments[:20]}}
+        ]}}]},
+        {"choices": [{"delta": {"tool_calls": [
+            {"index": 0, "function": {"arguments": arguments[20:]}}
+        ]}, "finish_reason": "tool_calls"}]},
+    ]
+    orchestrator.openai_client.stream = lambda *args, **kwargs: FakeStream(chunks)  # type: ignore
+
+    handled: List[Any] = []
+
+    async def fake_handle(tool_calls, *args, **kwargs):
+        handled.extend(tool_calls)
+        return {"success": True, "content": "Found hotels", "itinerary_id": None}
+
+    orchestrator._handle_tool_calls = fake_handle  # type: ignore
+
+    received = [c async for c in orchestrator.stream_chat_message(session_id, "Hotels in Paris")]
+
+    assert received == ["Found hotels"]
+    assert handled == [{"function": {"name": "execute_travel_action", "arguments": arguments}}]
+
+
+@pytest.mark.asyncio
+async def test_stream_holds_back_pseudo_tool_calls(
+    orchestrator: LLMOrchestrator, db_session, session_id: str
+):
+    chunks = [
+        {"choices": [{"delta": {"content": "Sure, "}}]},
+        {"choices": [{"delta": {"content": "on it.\n[execute_"}}]},
+        {"choices": [{"delta": {"content": 'travel_action]\n{"action": "finalize_itinerary"}'}}]},
+    ]
+    orchestrator.openai_client.stream = lambda *args, **kwargs: FakeStream(chunks)  # type: ignore
+
+    async def fake_handle(tool_calls, *args, **kwargs):
+        return {"success": True, "content": "Itinerary saved", "itinerary_id": "it-1"}
+
+    orchestrator._handle_tool_calls = fake_handle  # type: ignore
+
+    result: Dict[str, Any] = {}
+    received = [c async for c in orchestrator.stream_chat_message(session_id, "Plan it", result=result)]
+
+    assert received == ["Sure, ", "on it.\n", "\n\nItinerary saved"]
+    stored = MessageRepository(db_session).get_messages_by_session(session_id)
+    assert stored[1].content == "".join(received)
+    assert result == {"success": True, "spend_capped": False, "itinerary_id": "it-1"}
+
+
+@pytest.mark.asyncio
+async def test_stream_flushes_held_back_text_without_tool_call(
+    orchestrator: LLMOrchestrator, session_id: str
+):
+    chunks = [
+        {"choices": [{"delta": {"content": "See [the map"}}]},
+        {"choices": [{"delta": {"content": "](https://example.com) {for} action"}}]},
+    ]
+    orchestrator.openai_client.stream = lambda *args, **kwargs: FakeStream(chunks)  # type: ignore
+
+    received = [c async for c in orchestrator.stream_chat_message(session_id, "Map?")]
+
+    assert received == ["See ", "[the map](https://example.com) {for} action"]
+
+def test_parse_pseudo_tool_calls(orchestrator: LLMOrchestrator):
+    content = 'Sure, searching now.\n[execute_travel_action]\n{"action": "search_pois", "city": "Rome", "extra": {"a": 1}}'
+    calls, preface = orchestrator._parse_pseudo_tool_calls(content)
+    assert preface == "Sure, searching now.\n"
+    assert calls == [{
+        "function": {
+            "name": "execute_travel_action",
+            "arguments": '{"action": "search_pois", "city": "Rome", "extra": {"a": 1}}',
+        }
+    }]
+
+    assert orchestrator._parse_pseudo_tool_calls("No tool call [action] here") == (None, "")
+
+    # Braces inside string values do not end the object early
+    tricky = '[action] {"action": "search_pois", "city": "Rome}"} trailing {'
+    calls, _ = orchestrator._parse_pseudo_tool_calls(tricky)
+    assert calls[0]["function"]["arguments"] == '{"action": "search_pois", "city": "Rome}"}'
+    assert _may_contain_pseudo_call(content)
+    assert not _may_contain_pseudo_call("Try the {local} bakeries")
+    assert not _may_contain_pseudo_call("Plenty of action in Rome")
+
+
+def test_format_form_context():
+    assert _format_form_context(None, None, None, None) is None
+    assert _format_form_context("Rome", "2025-05-01", None, "mid") == (
+        "Travel planning context:\nDestination: Rome\nBudget tier: mid"
+    )
+    assert _format_form_context(None, "2025-05-01", "2025-05-03", None) == (
+        "Travel planning context:\nTravel dates: 2025-05-01 to 2025-05-03"
+    )
+
+
+def test_generate_tool_response(orchestrator: LLMOrchestrator):
+    empty_pois = ActionResult.ok("search_pois", {"count": 0, "city": "Rome"}, empty=True)
+    hotels = ActionResult.ok("search_hotels", {"count": 2, "city": "Rome", "budget_tier": "mid"})
+    failed = ActionResult.fail("search_hotels", "timeout")
+
+    # Single result fast path
+    assert orchestrator._generate_tool_response([empty_pois]) == ""
+    assert orchestrator._generate_tool_response([failed]) == "❌ search_hotels failed: timeout"
+    assert orchestrator._generate_tool_response([hotels]).startswith("🏨 Found 2 mid-range hotels in Rome!")
+
+    # Several results are joined, skipping the empty POI search
+    assert orchestrator._generate_tool_response([empty_pois, hotels, failed]) == (
+        "🏨 Found 2 mid-range hotels in Rome! I'll recommend the best options for your stay. "
+        "❌ search_hotels failed: timeout"
+    )
+    assert orchestrator._generate_tool_response([empty_pois, empty_pois]) == ""
+
+
+def test_monthly_spend_is_memoized_and_kept_current(settings: Settings, db_session):
+    manager = SpendCapManager(settings, db_session)
+    queries: List[Optional[str]] = []
+    real_get_monthly_spend = manager.ledger_repo.get_monthly_spend
+
+    def counting_get_monthly_spend(month_key=None):
+        queries.append(month_key)
+        return real_get_monthly_spend(month_key)
+
+    manager.ledger_repo.get_monthly_spend = counting_get_monthly_spend  # type: ignore
+
+    assert manager.can_make_call("gpt-4", 100, 100) is True
+    manager.record_llm_call(None, "gpt-4", 1000, 1000)
+    status = manager.get_spend_status()
+
+    assert len(queries) == 1
+    assert status["spent_usd"] == pytest.approx(0.09)
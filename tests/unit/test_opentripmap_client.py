@@ -8,15 +8,19 @@ Covers:
 """
 
 import asyncio
+import time
 from types import SimpleNamespace
 from typing import Any, Dict
 
+import httpx
+import orjson
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.config import Settings
 from app.db.base import Base
+from app.providers import opentripmap_client
 from app.providers.opentripmap_client import OpenTripMapClient
 
 
@@ -45,19 +49,50 @@ def db_session():
         db.close()
 
 
+@pytest.fixture(autouse=True)
+def clear_response_memo():
+    opentripmap_client._response_memo.clear()
+    yield
+    opentripmap_client._response_memo.clear()
+
+
 class FakeResponse:
     def __init__(self, json_data: Dict[str, Any], status_code: int = 200):
-        self._json = json_data
+        self.content = orjson.dumps(json_data)
         self.status_code = status_code
+        self.headers = {"content-length": str(len(self.content))}
 
-    def json(self) -> Dict[str, Any]:
-        return self._json
+    async def aiter_bytes(self):
+        # Two chunks, to exercise reassembly of the body
+        half = len(self.content) // 2
+        yield self.content[:half]
+        yield self.content[half:]
 
     def raise_for_status(self):
         if not (200 <= self.status_code < 400):
             raise Exception(f"HTTP {self.status_code}")
 
 
+class FakeStream:
+    """Async context manager around a fake GET, standing in for client.stream()."""
+
+    def __init__(self, response):
+        self._response = response
+
+    async def __aenter__(self):
+        return await self._response
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+def patch_get(client: OpenTripMapClient, fake_get) -> None:
+    """Route the client's streamed GETs to an async ``fake_get(url, params=...)``."""
+    client.client.stream = lambda method, url, params=None, **kwargs: FakeStream(  # type: ignore
+        fake_get(url, params=params)
+    )
+
+
 @pytest.mark.asyncio
 async def test_radius_search_uses_geojson_and_normalizes(settings: Settings, db_session):
     client = OpenTripMapClient(settings=settings, db=db_session)
@@ -81,7 +116,7 @@ async def test_radius_search_uses_geojson_and_normalizes(settings: Settings, db_
 
     captured = {}
 
-    def fake_get(url, params=None, **kwargs):
+    async def fake_get(url, params=None, **kwargs):
         captured["url"] = url
         captured["params"] = params or {}
         # Assert we request geojson to match normalization path
@@ -90,7 +125,7 @@ async def test_radius_search_uses_geojson_and_normalizes(settings: Settings, db_
         return FakeResponse(geojson)
 
     # Patch the underlying httpx client
-    client.client.get = fake_get  # type: ignore
+    patch_get(client, fake_get)
 
     places = await client.search_places_by_radius(lat=37.9838, lon=23.7275, radius=1000, kinds="interesting_places", limit=10)
 
@@ -101,7 +136,7 @@ async def test_radius_search_uses_geojson_and_normalizes(settings: Settings, db_
     # Categories parsed into list
     assert isinstance(places[0]["categories"], list)
 
-    client.close()
+    await client.aclose()
 
 
 @pytest.mark.asyncio
@@ -111,17 +146,17 @@ async def test_bbox_search_uses_geojson_and_handles_empty(settings: Settings, db
     # Empty feature collection
     geojson = {"type": "FeatureCollection", "features": []}
 
-    def fake_get(url, params=None, **kwargs):
+    async def fake_get(url, params=None, **kwargs):
         assert (params or {}).get("format") == "geojson"
         assert url.endswith("/bbox")
         return FakeResponse(geojson)
 
-    client.client.get = fake_get  # type: ignore
+    patch_get(client, fake_get)
 
     places = await client.search_places_by_bbox(bbox="23.7,37.96,23.8,38.0", kinds=None, limit=5)
     assert places == []
 
-    client.close()
+    await client.aclose()
 
 
 @pytest.mark.asyncio
@@ -137,11 +172,11 @@ async def test_get_place_details_normalizes_result(settings: Settings, db_sessio
         "address": {"house_number": None, "road": "Acropolis", "city": "Athens", "country": "Greece"},
     }
 
-    def fake_get(url, params=None, **kwargs):
+    async def fake_get(url, params=None, **kwargs):
         assert url.endswith("/xid/X123")
         return FakeResponse(details)
 
-    client.client.get = fake_get  # type: ignore
+    patch_get(client, fake_get)
 
     out = await client.get_place_details("X123")
     assert out is not None
@@ -150,7 +185,7 @@ async def test_get_place_details_normalizes_result(settings: Settings, db_sessio
     assert out["country"] == "Greece"
     assert isinstance(out["categories"], list)
 
-    client.close()
+    await client.aclose()
 
 
 @pytest.mark.asyncio
@@ -161,13 +196,12 @@ async def test_http_error_returns_empty_structures(settings: Settings, db_sessio
         def raise_for_status(self):
             raise Exception("HTTP 500")
 
-        def json(self):
-            return {}
+        content = b"{}"
 
-    def fake_get_error(url, params=None, **kwargs):
+    async def fake_get_error(url, params=None, **kwargs):
         return ErrorResponse()
 
-    client.client.get = fake_get_error  # type: ignore
+    patch_get(client, fake_get_error)
 
     places = await client.search_places_by_radius(lat=0, lon=0)
     assert places == []
@@ -175,4 +209,201 @@ async def test_http_error_returns_empty_structures(settings: Settings, db_sessio
     detail = await client.get_place_details("XERR")
     assert detail is None
 
-    client.close()
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_place_details_many_uses_cache_and_keeps_order(settings: Settings, db_session):
+    client = OpenTripMapClient(settings=settings, db=db_session)
+
+    def details(xid: str) -> Dict[str, Any]:
+        return {"xid": xid, "name": f"Place {xid}", "point": {"lon": 23.7, "lat": 37.9}}
+
+    # X1 is already cached, so only X2 and X3 go to the API
+    client.cache_repo.cache_response(
+        provider="opentripmap",
+        endpoint="place_details",
+        params={"xid": "X1", "apikey": settings.opentripmap_api_key},
+        response=details("X1"),
+        ttl_seconds=60,
+    )
+    requested = []
+
+    async def fake_get(url, params=None, **kwargs):
+        xid = url.rsplit("/", 1)[-1]
+        requested.append(xid)
+        if xid == "X3":
+            return FakeResponse({}, status_code=404)
+        return FakeResponse(details(xid))
+
+    patch_get(client, fake_get)
+
+    out = await client.get_place_details_many(["X1", "X2", "X3"])
+    assert sorted(requested) == ["X2", "X3"]
+    assert out[0]["external_id"] == "X1"
+    assert out[1]["external_id"] == "X2"
+    assert out[2] is None
+
+    await client.aclose()
+
+
+def test_normalize_places_upserts_in_bulk(settings: Settings, db_session):
+    client = OpenTripMapClient(settings=settings, db=db_session)
+
+    def feature(xid: str, name: str) -> Dict[str, Any]:
+        return {
+            "type": "Feature",
+            "properties": {"xid": xid, "name": name, "kinds": "historic"},
+            "geometry": {"type": "Point", "coordinates": [23.73, 37.98]},
+        }
+
+    first = client._normalize_places([feature("X1", "Old name"), feature("X2", "Spot 2"), feature("", "No id")])
+    second = client._normalize_places([feature("X1", "New name")])
+
+    assert "place_id" not in first[2]
+    assert second[0]["place_id"] == first[0]["place_id"]
+    stored = client.places_repo.get_place_by_external_id("opentripmap", "X1")
+    assert stored.name == "New name"
+    assert client.places_repo.get_place_by_external_id("opentripmap", "X2") is not None
+
+
+@pytest.mark.asyncio
+async def test_repeated_search_is_served_from_memo(settings: Settings, db_session):
+    client = OpenTripMapClient(settings=settings, db=db_session)
+    geojson = {
+        "type": "FeatureCollection",
+        "features": [{
+            "type": "Feature",
+            "properties": {"xid": "X1", "name": "Spot 1"},
+            "geometry": {"type": "Point", "coordinates": [23.73, 37.98]},
+        }],
+    }
+    calls = []
+
+    async def fake_get(url, params=None, **kwargs):
+        calls.append(url)
+        return FakeResponse(geojson)
+
+    patch_get(client, fake_get)
+
+    first = await client.search_places_by_bbox(bbox="23.7,37.96,23.8,38.0")
+    client.cache_repo.get_cached_entry = lambda *a, **k: pytest.fail("DB cache queried")  # type: ignore
+    second = await client.search_places_by_bbox(bbox="23.7,37.96,23.8,38.0")
+
+    assert len(calls) == 1
+    assert [p["external_id"] for p in second] == [p["external_id"] for p in first] == ["X1"]
+
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_returns_normalized_places_without_upserting(settings: Settings, db_session):
+    client = OpenTripMapClient(settings=settings, db=db_session)
+    geojson = {
+        "type": "FeatureCollection",
+        "features": [{
+            "type": "Feature",
+            "properties": {"xid": "X1", "name": "Spot 1", "kinds": "historic"},
+            "geometry": {"type": "Point", "coordinates": [23.73, 37.98]},
+        }],
+    }
+
+    async def fake_get(url, params=None, **kwargs):
+        return FakeResponse(geojson)
+
+    patch_get(client, fake_get)
+    first = await client.search_places_by_radius(lat=37.98, lon=23.73)
+
+    # Served from the DB cache entry, not the memo or the API
+    opentripmap_client._response_memo.clear()
+    client.client.stream = None  # type: ignore
+    client.places_repo.bulk_upsert_places = lambda rows: pytest.fail("places re-upserted")  # type: ignore
+    second = await client.search_places_by_radius(lat=37.98, lon=23.73)
+
+    assert second == [{k: v for k, v in first[0].items() if k != "raw_json"}]
+    assert second[0]["place_id"] == first[0]["place_id"]
+    assert second[0]["categories"] == ["historic"]
+
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_oversized_response_is_rejected(settings: Settings, db_session, monkeypatch):
+    client = OpenTripMapClient(settings=settings, db=db_session)
+    monkeypatch.setattr(opentripmap_client, "_MAX_RESPONSE_BYTES", 64)
+    features = [
+        {"type": "Feature", "properties": {"xid": f"X{i}"}, "geometry": {"coordinates": [0, 0]}}
+        for i in range(10)
+    ]
+
+    async def fake_get(url, params=None, **kwargs):
+        response = FakeResponse({"type": "FeatureCollection", "features": features})
+        response.headers = {}  # no declared length: caught while streaming
+        return response
+
+    patch_get(client, fake_get)
+
+    assert await client.search_places_by_bbox(bbox="23.7,37.96,23.8,38.0") == []
+
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried(settings: Settings, db_session, monkeypatch):
+    client = OpenTripMapClient(settings=settings, db=db_session)
+    monkeypatch.setattr(opentripmap_client, "_RETRY_BASE_DELAY", 0)
+    details = {"xid": "X1", "name": "Acropolis", "point": {"lon": 23.7, "lat": 37.9}}
+    statuses = [503, 200, 404, 404]
+
+    class StatusResponse(FakeResponse):
+        def raise_for_status(self):
+            if self.status_code >= 400:
+                request = httpx.Request("GET", "https://api.opentripmap.com")
+                raise httpx.HTTPStatusError(
+                    "error", request=request, response=httpx.Response(self.status_code, request=request)
+                )
+
+    async def fake_get(url, params=None, **kwargs):
+        return StatusResponse(details, status_code=statuses.pop(0))
+
+    patch_get(client, fake_get)
+
+    # A 503 is retried; a 404 is not
+    assert (await client.get_place_details("X1"))["name"] == "Acropolis"
+    assert await client.get_place_details("X2") is None
+    assert statuses == [404]
+
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_shared_http_client_is_not_closed_by_client(settings: Settings, db_session):
+    shared = opentripmap_client.create_opentripmap_client()
+    try:
+        client = OpenTripMapClient(settings=settings, db=db_session, http_client=shared)
+        await client.aclose()
+        assert client.client is shared
+        assert shared.is_closed is False
+    finally:
+        await shared.aclose()
+
+
+@pytest.mark.asyncio
+async def test_db_cache_hit_is_memoized_for_remaining_ttl(settings: Settings, db_session):
+    client = OpenTripMapClient(settings=settings, db=db_session)
+    details = {"xid": "X1", "name": "Acropolis", "point": {"lon": 23.7, "lat": 37.9}}
+    client.cache_repo.cache_response(
+        provider="opentripmap",
+        endpoint="place_details",
+        params={"xid": "X1", "apikey": settings.opentripmap_api_key},
+        response=details,
+        ttl_seconds=10,
+    )
+
+    assert (await client.get_place_details("X1"))["name"] == "Acropolis"
+
+    # The row only has 10s left, not the client's 60s TTL
+    expires_at, _ = opentripmap_client._response_memo[client._place_details_key("X1")]
+    assert expires_at - time.monotonic() <= 10
+
+    await client.aclose()
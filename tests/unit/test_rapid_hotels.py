@@ -8,7 +8,7 @@ Covers:
 - Normalization and DB upsert path
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Optional
 
 import pytest
 from sqlalchemy import create_engine
@@ -16,7 +16,7 @@ from sqlalchemy.orm import sessionmaker
 
 from app.config import Settings
 from app.db.base import Base
-from app.providers.hotels.rapid_hotels import RapidAPIHotelProvider
+from app.providers.hotels.rapid_hotels import RapidAPIHotelProvider, create_rapidapi_client
 
 
 @pytest.fixture()
@@ -75,7 +75,7 @@ async def test_no_api_key_returns_empty(db_session):
     out = await provider.search_hotels(city="Athens", country="Greece", budget_tier="mid", limit=5)
     assert out == []
 
-    provider.close()
+    await provider.aclose()
 
 
 @pytest.mark.asyncio
@@ -90,7 +90,7 @@ async def test_price_filters_mapping(settings: Settings, db_session):
     }
     assert provider._get_price_filters("premium") == {"price_filter_currencycode": "EUR", "price_filter_min": "150"}
 
-    provider.close()
+    await provider.aclose()
 
 
 @pytest.mark.asyncio
@@ -100,10 +100,10 @@ async def test_search_location_uses_cache(settings: Settings, db_session):
     cached_payload = {"result": [{"dest_id": "-814876", "city_name": "Athens"}]}
 
     # Monkeypatch cache to hit
-    provider.cache_repo.get_cached_response = lambda provider=None, endpoint=None, params=None: cached_payload  # type: ignore
+    provider.cache_repo.get_cached_response = lambda provider=None, endpoint=None, params=None, key=None: cached_payload  # type: ignore
 
     # client.get should not be called when cache hits
-    def fail_get(*args, **kwargs):
+    async def fail_get(*args, **kwargs):
         raise AssertionError("HTTP client should not be called on cache hit")
 
     provider.client.get = fail_get  # type: ignore
@@ -112,7 +112,7 @@ async def test_search_location_uses_cache(settings: Settings, db_session):
     assert location is not None
     assert location.get("dest_id") == "-814876"
 
-    provider.close()
+    await provider.aclose()
 
 
 @pytest.mark.asyncio
@@ -120,11 +120,11 @@ async def test_search_location_http_success_and_cached(settings: Settings, db_se
     provider = RapidAPIHotelProvider(settings=settings, db=db_session)
 
     # No cache initially
-    provider.cache_repo.get_cached_response = lambda provider=None, endpoint=None, params=None: None  # type: ignore
+    provider.cache_repo.get_cached_response = lambda provider=None, endpoint=None, params=None, key=None: None  # type: ignore
 
     captured: Dict[str, Any] = {"cached": None, "url": None, "params": None}
 
-    def fake_cache_response(provider: str, endpoint: str, params: Dict[str, Any], response: Dict[str, Any], ttl_seconds: int):
+    def fake_cache_response(provider: str, endpoint: str, params: Dict[str, Any], response: Dict[str, Any], ttl_seconds: int, key: Optional[str] = None):
         # capture cache call
         captured["cached"] = {
             "provider": provider,
@@ -132,6 +132,7 @@ async def test_search_location_http_success_and_cached(settings: Settings, db_se
             "params": params,
             "response": response,
             "ttl": ttl_seconds,
+            "key": key,
         }
         return SimpleObj()
 
@@ -140,7 +141,7 @@ async def test_search_location_http_success_and_cached(settings: Settings, db_se
 
     provider.cache_repo.cache_response = fake_cache_response  # type: ignore
 
-    def fake_get(url, params=None, **kwargs):
+    async def fake_get(url, params=None, **kwargs):
         captured["url"] = url
         captured["params"] = params
         assert url.endswith("/locations/search")
@@ -155,8 +156,12 @@ async def test_search_location_http_success_and_cached(settings: Settings, db_se
     assert captured["cached"] is not None
     assert captured["cached"]["endpoint"] == "locations"
     assert captured["cached"]["ttl"] == settings.api_cache_ttl_seconds * 24
+    # The key built for the lookup is reused for the write
+    assert captured["cached"]["key"] == provider.cache_repo.make_cache_key(
+        "rapidapi_hotels", "locations", captured["params"]
+    )
 
-    provider.close()
+    await provider.aclose()
 
 
 @pytest.mark.asyncio
@@ -165,9 +170,9 @@ async def test_search_hotels_by_destination_uses_cache(settings: Settings, db_se
 
     hotels_payload = {"result": [{"hotel_id": "H1"}, {"hotel_id": "H2"}, {"hotel_id": "H3"}]}
 
-    provider.cache_repo.get_cached_response = lambda provider=None, endpoint=None, params=None: hotels_payload  # type: ignore
+    provider.cache_repo.get_cached_response = lambda provider=None, endpoint=None, params=None, key=None: hotels_payload  # type: ignore
 
-    def fail_get(*args, **kwargs):
+    async def fail_get(*args, **kwargs):
         raise AssertionError("HTTP client should not be called on cache hit")
 
     provider.client.get = fail_get  # type: ignore
@@ -177,18 +182,18 @@ async def test_search_hotels_by_destination_uses_cache(settings: Settings, db_se
     assert isinstance(hotels, list)
     assert {h.get("hotel_id") for h in hotels} == {"H1", "H2", "H3"}
 
-    provider.close()
+    await provider.aclose()
 
 
 @pytest.mark.asyncio
 async def test_search_hotels_by_destination_http_success_limits_and_caches(settings: Settings, db_session):
     provider = RapidAPIHotelProvider(settings=settings, db=db_session)
 
-    provider.cache_repo.get_cached_response = lambda provider=None, endpoint=None, params=None: None  # type: ignore
+    provider.cache_repo.get_cached_response = lambda provider=None, endpoint=None, params=None, key=None: None  # type: ignore
 
     captured: Dict[str, Any] = {"cached": None}
 
-    def fake_cache_response(provider: str, endpoint: str, params: Dict[str, Any], response: Dict[str, Any], ttl_seconds: int):
+    def fake_cache_response(provider: str, endpoint: str, params: Dict[str, Any], response: Dict[str, Any], ttl_seconds: int, key: Optional[str] = None):
         captured["cached"] = {"endpoint": endpoint, "ttl": ttl_seconds, "params": params}
         return object()
 
@@ -196,7 +201,7 @@ async def test_search_hotels_by_destination_http_success_limits_and_caches(setti
 
     results = [{"hotel_id": f"H{i}", "hotel_name": f"Hotel {i}"} for i in range(10)]
 
-    def fake_get(url, params=None, **kwargs):
+    async def fake_get(url, params=None, **kwargs):
         assert url.endswith("/hotels/search")
         # Budget tier filters must be in params
         assert params.get("price_filter_currencycode") == "EUR"
@@ -212,28 +217,13 @@ async def test_search_hotels_by_destination_http_success_limits_and_caches(setti
     assert captured["cached"]["endpoint"] == "hotels_search"
     assert captured["cached"]["ttl"] == settings.api_cache_ttl_seconds
 
-    provider.close()
+    await provider.aclose()
 
 
 @pytest.mark.asyncio
 async def test_normalize_hotels_creates_db_records(settings: Settings, db_session):
     provider = RapidAPIHotelProvider(settings=settings, db=db_session)
 
-    class DummyHotel:
-        def __init__(self, id_value: str):
-            self.id = id_value
-
-    created: List[Dict[str, Any]] = []
-
-    def fake_create_or_update_hotel(**kwargs):
-        created.append(kwargs)
-        # ensure required keys exist
-        assert kwargs["provider"] == "rapidapi"
-        assert kwargs["external_id"].startswith("rapidapi_")
-        return DummyHotel("uuid-1")
-
-    provider.hotel_repo.create_or_update_hotel = fake_create_or_update_hotel  # type: ignore
-
     hotels_data = [
         {
             "hotel_id": "123",
@@ -244,17 +234,46 @@ async def test_normalize_hotels_creates_db_records(settings: Settings, db_sessio
             "min_total_price": 120.0,
             "review_score": 8.0,  # 0-10 scale
             "url": "https://example.com/h/123",
-        }
+        },
+        {"hotel_id": "456", "hotel_name": "Other Hotel"},
     ]
 
     normalized = provider._normalize_hotels(hotels_data, city="Athens", country="Greece")
-    assert len(normalized) == 1
+    assert len(normalized) == 2
     out = normalized[0]
-    assert out["hotel_id"] == "uuid-1"
     assert out["rating"] == pytest.approx(4.0)  # 8/2
     assert out["price_eur_per_night"] == 120.0
 
-    provider.close()
+    stored = provider.hotel_repo.get_hotel(out["hotel_id"])
+    assert stored is not None
+    assert stored.external_id == "rapidapi_123"
+    assert stored.provider == "rapidapi"
+    # The raw provider object is not kept unless enabled
+    assert "raw_json" not in out
+    assert stored.raw_json is None
+
+    # A second search updates the existing rows instead of duplicating them
+    hotels_data[0]["hotel_name"] = "Renamed Hotel"
+    again = provider._normalize_hotels(hotels_data, city="Athens", country="Greece")
+    assert [h["hotel_id"] for h in again] == [h["hotel_id"] for h in normalized]
+    db_session.expire_all()
+    assert provider.hotel_repo.get_hotel(out["hotel_id"]).name == "Renamed Hotel"
+
+    await provider.aclose()
+
+
+@pytest.mark.asyncio
+async def test_normalize_hotels_persists_raw_json_when_enabled(settings: Settings, db_session):
+    raw_settings = settings.model_copy(update={"persist_raw_hotel_json": True})
+    provider = RapidAPIHotelProvider(settings=raw_settings, db=db_session)
+
+    hotel = {"hotel_id": "789", "hotel_name": "Raw Hotel"}
+    normalized = provider._normalize_hotels([hotel], city="Athens", country="Greece")
+
+    assert normalized[0]["raw_json"] == hotel
+    assert provider.hotel_repo.get_hotel(normalized[0]["hotel_id"]).raw_json == hotel
+
+    await provider.aclose()
 
 
 @pytest.mark.asyncio
@@ -277,4 +296,17 @@ async def test_search_hotels_end_to_end_calls_helpers(settings: Settings, db_ses
     out = await provider.search_hotels(city="Athens", country="Greece", budget_tier="mid", limit=10)
     assert out == [{"external_id": "rapidapi_H1", "name": "Hotel 1", "city": "Athens", "country": "Greece"}]
 
-    provider.close()
+    await provider.aclose()
+
+
+@pytest.mark.asyncio
+async def test_shared_http_client_is_not_closed_by_provider(settings: Settings, db_session):
+    shared = create_rapidapi_client(settings)
+    try:
+        provider = RapidAPIHotelProvider(settings=settings, db=db_session, http_client=shared)
+        await provider.aclose()
+        assert provider.client is shared
+        assert shared.headers["X-RapidAPI-Key"] == settings.rapidapi_key
+        assert shared.is_closed is False
+    finally:
+        await shared.aclose()